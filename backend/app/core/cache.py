@@ -0,0 +1,78 @@
+"""
+Кэш с временем жизни записей в памяти процесса (без внешних зависимостей)
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Значения хранятся ttl секунд. get_or_set вычисляет отсутствующее значение
+    один раз: параллельные запросы того же ключа ждут первого вычисления,
+    а не запускают свое.
+
+    Кэш не общий между воркерами: каждый воркер вычисляет значение сам.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[float, float, Any]] = {}  # (истекает, записано, значение)
+        # Блокировки вычисления по хэшу ключа: их число не растет с числом ключей
+        self._key_locks = [threading.Lock() for _ in range(64)]
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Значение или None, если его нет или оно устарело"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            return entry[2]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        now = time.monotonic()
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_entries:
+                self._evict()
+            self._entries[key] = (now + (self.ttl if ttl is None else ttl), now, value)
+
+    def get_or_set(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """Значение из кэша или результат loader() (вызывается не больше одного раза одновременно)"""
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._key_locks[hash(key) % len(self._key_locks)]:
+            # Пока ждали, значение мог вычислить другой поток
+            value = self.get(key)
+            if value is None:
+                value = loader()
+                self.set(key, value, ttl)
+            return value
+
+    def age(self, key: Hashable) -> Optional[float]:
+        """Сколько секунд назад записано значение (None - значения нет)"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return time.monotonic() - entry[1]
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Удаляет значение по ключу или все значения"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def _evict(self):
+        """Удаляет устаревшие значения, а если их нет - самое старое (вызывается под блокировкой)"""
+        now = time.monotonic()
+        expired = [k for k, entry in self._entries.items() if entry[0] <= now]
+        for k in expired:
+            del self._entries[k]
+        if not expired and self._entries:
+            oldest = min(self._entries, key=lambda k: self._entries[k][0])
+            del self._entries[oldest]
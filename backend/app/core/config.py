@@ -10,6 +10,109 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+
+    # AI ассистент: адрес Ollama (None - из переменной окружения OLLAMA_HOST) и модель
+    OLLAMA_HOST: Optional[str] = None
+    AI_MODEL_NAME: str = "llama3.2:1b"
+    # Альтернативные модели через запятую, если AI_MODEL_NAME не установлена или не загружается
+    AI_MODEL_ALTERNATIVES: str = "llama3.2:1b,llama3.2,llama3.2:3b,llama3"
+    # Фоновая проверка доступности Ollama
+    AI_HEALTH_PROBE_INTERVAL_SECONDS: float = 30.0
+    AI_HEALTH_PROBE_TIMEOUT_SECONDS: float = 5.0
+    # Таймауты запросов к модели
+    AI_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    AI_REQUEST_TIMEOUT_SECONDS: float = 120.0
+    # Прогрев модели при старте и удержание ее в памяти Ollama
+    AI_WARMUP_ENABLED: bool = True
+    # Ждать прогрева перед приемом запросов (не дольше AI_WARMUP_TIMEOUT_SECONDS)
+    AI_WARMUP_BLOCK_STARTUP: bool = False
+    AI_WARMUP_TIMEOUT_SECONDS: float = 120.0
+    # Сколько Ollama держит модель в памяти после запроса (формат Ollama: "30m", "-1" - всегда)
+    AI_KEEP_ALIVE: str = "30m"
+    # Интервал пингов для удержания модели (0 - отключить); должен быть меньше AI_KEEP_ALIVE
+    AI_KEEP_ALIVE_PING_INTERVAL_SECONDS: float = 600.0
+    # Не больше N одновременных запросов к модели от одного пользователя (в пределах воркера)
+    AI_MAX_CONCURRENT_CHATS_PER_USER: int = 2
+    # Как часто проверять, не отключился ли клиент, пока модель генерирует ответ
+    AI_DISCONNECT_POLL_INTERVAL_SECONDS: float = 0.5
+    # Выключатель: сколько ошибок подряд размыкают его и паузы между пробными запросами
+    AI_BREAKER_FAILURE_THRESHOLD: int = 3
+    AI_BREAKER_BASE_BACKOFF_SECONDS: float = 2.0
+    AI_BREAKER_MAX_BACKOFF_SECONDS: float = 120.0
+
+    # AI ассистент: бюджет токенов на историю диалога и сжатое содержание старых реплик
+    AI_HISTORY_TOKEN_BUDGET: int = 1200
+    AI_SUMMARY_TOKEN_BUDGET: int = 300
+    # Окно контекста модели (num_ctx) и резерв на ответ (num_predict); промпт получает остаток
+    AI_CONTEXT_WINDOW_TOKENS: int = 4096
+    AI_RESPONSE_TOKEN_RESERVE: int = 768
+    # Сколько токенов промпта отдавать контексту о питомцах, специалистах и товарах
+    AI_PROMPT_CONTEXT_TOKEN_BUDGET: int = 900
+    # Особые пометки питомца длиннее этого обрезаются
+    AI_PROMPT_NOTES_MAX_TOKENS: int = 80
+
+    # Локальный FAQ: порог близости для ответа без модели и для fallback-ответа (0..1)
+    AI_FAQ_ENABLED: bool = True
+    AI_FAQ_DIRECT_THRESHOLD: float = 0.6
+    AI_FAQ_FALLBACK_THRESHOLD: float = 0.3
+    # Как часто перестраивать индекс по статьям (изменения статей перестраивают его сразу)
+    AI_FAQ_REFRESH_INTERVAL_SECONDS: float = 600.0
+    
+    # Напоминания о прививках: за сколько дней до срока создавать и насколько просроченные учитывать
+    VACCINATION_REMINDER_LEAD_DAYS: int = 14
+    VACCINATION_OVERDUE_WINDOW_DAYS: int = 60
+    # Сколько питомцев обрабатывать в одной транзакции ночной задачи
+    VACCINATION_BATCH_SIZE: int = 50000
+    
+    # Диспетчер напоминаний: как часто искать наступившие напоминания и сколько обрабатывать за проход
+    REMINDER_DISPATCH_ENABLED: bool = True
+    REMINDER_DISPATCH_INTERVAL_SECONDS: float = 60.0
+    REMINDER_DISPATCH_BATCH_SIZE: int = 1000
+    REMINDER_DISPATCH_MAX_BATCHES_PER_TICK: int = 20
+    # Максимум напоминаний в одном пакетном запросе
+    REMINDER_BULK_MAX_ITEMS: int = 1000
+    
+    # История показателей питомца: сколько точек отдавать для графика по умолчанию и максимум
+    VITALS_HISTORY_DEFAULT_POINTS: int = 200
+    VITALS_HISTORY_MAX_POINTS: int = 1000
+    
+    # Аналитика по всем питомцам пересчитывается не чаще раза в столько секунд
+    ANALYTICS_CACHE_TTL_SECONDS: float = 300.0
+    
+    # Запись к ветеринару: у ветеринаров нет своего графика, используются часы по умолчанию
+    VET_WORK_DAYS: str = "0,1,2,3,4"  # 0 - понедельник
+    VET_WORK_START: str = "09:00"
+    VET_WORK_END: str = "18:00"
+    # Длительность записи без услуги и шаг сетки слотов
+    APPOINTMENT_SLOT_MINUTES: int = 30
+    # Максимальный период, за который отдаются свободные слоты
+    APPOINTMENT_SLOTS_MAX_DAYS: int = 31
+    
+    # Поиск партнеров рядом: максимальный радиус в км
+    PARTNER_NEARBY_MAX_RADIUS_KM: float = 50.0
+    
+    # График партнера: максимум особых дат (праздники и т.п.) в одном запросе
+    PARTNER_SCHEDULE_MAX_EXCEPTIONS: int = 366
+    
+    # Лента акций: максимальное время жизни кэша первой страницы в секундах
+    PROMOTIONS_FEED_CACHE_TTL_SECONDS: int = 60
+    
+    # Счетчики просмотров акций и статей: интервал записи накопленного в БД в секундах
+    VIEW_COUNTER_FLUSH_INTERVAL_SECONDS: float = 10.0
+    
+    # Цены со скидками: как часто учитывать начало и окончание акций (секунды)
+    EFFECTIVE_PRICES_REFRESH_SECONDS: float = 30.0
+    
+    # Очередь консультаций: срок ответа в минутах для приоритетов 0, 1, 2 (через запятую)
+    CONSULTATION_SLA_MINUTES: str = "1440,240,60"
+    
+    # События в реальном времени: local - в пределах воркера, postgres - между воркерами (LISTEN/NOTIFY)
+    EVENTS_BACKEND: str = "local"
+    EVENTS_KEEPALIVE_SECONDS: float = 15.0
+    EVENTS_QUEUE_SIZE: int = 100  # Непрочитанных событий на соединение
+    
+    # Справочник ветеринаров: время жизни снимка в памяти воркера (секунды)
+    VET_DIRECTORY_CACHE_TTL_SECONDS: int = 300
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,106 @@
+"""
+Простые метрики процесса в формате Prometheus (без внешних зависимостей)
+"""
+import threading
+from typing import Callable, Dict, Tuple
+
+LabelsKey = Tuple[Tuple[str, str], ...]
+
+
+def _labels_key(labels: Dict[str, object]) -> LabelsKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelsKey) -> str:
+    if not key:
+        return ""
+    parts = []
+    for k, v in key:
+        value = v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{k}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class MetricsRegistry:
+    """
+    Счетчики, гауги и сводки (count/sum/max) текущего процесса.
+
+    Значения не агрегируются между воркерами: каждый воркер отдает свои
+    метрики, суммирование выполняет система мониторинга.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelsKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelsKey, float]] = {}
+        self._gauge_callbacks: Dict[str, Callable[[], float]] = {}
+        self._summaries: Dict[str, Dict[LabelsKey, Dict[str, float]]] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str):
+        """Задает описание метрики (строка # HELP)"""
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Увеличивает счетчик"""
+        key = _labels_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        """Устанавливает значение гауги"""
+        with self._lock:
+            self._gauges.setdefault(name, {})[_labels_key(labels)] = value
+
+    def register_gauge(self, name: str, callback: Callable[[], float]):
+        """Гауга, значение которой вычисляется при каждом чтении метрик"""
+        self._gauge_callbacks[name] = callback
+
+    def observe(self, name: str, value: float, **labels):
+        """Добавляет наблюдение в сводку (count, sum, max)"""
+        key = _labels_key(labels)
+        with self._lock:
+            series = self._summaries.setdefault(name, {})
+            summary = series.setdefault(key, {"count": 0, "sum": 0.0, "max": 0.0})
+            summary["count"] += 1
+            summary["sum"] += value
+            summary["max"] = max(summary["max"], value)
+
+    def render(self) -> str:
+        """Текстовый формат Prometheus"""
+        lines = []
+        with self._lock:
+            counters = {n: dict(s) for n, s in self._counters.items()}
+            gauges = {n: dict(s) for n, s in self._gauges.items()}
+            summaries = {n: {k: dict(v) for k, v in s.items()} for n, s in self._summaries.items()}
+
+        for name, callback in self._gauge_callbacks.items():
+            try:
+                gauges.setdefault(name, {})[()] = float(callback())
+            except Exception:
+                continue
+
+        for metric_type, metrics in (("counter", counters), ("gauge", gauges)):
+            for name in sorted(metrics):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for key, value in metrics[name].items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+
+        for name in sorted(summaries):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} summary")
+            for key, summary in summaries[name].items():
+                labels = _format_labels(key)
+                lines.append(f"{name}_count{labels} {summary['count']}")
+                lines.append(f"{name}_sum{labels} {summary['sum']}")
+                lines.append(f"{name}_max{labels} {summary['max']}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Глобальный реестр метрик
+metrics = MetricsRegistry()
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import and_, create_engine, func, inspect, select, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
@@ -21,3 +21,63 @@ def get_db():
     finally:
         db.close()
 
+
+def _delete_duplicates(conn, table, columns) -> int:
+    """
+    Удаляет строки с повторяющимися значениями columns, оставляя самую новую
+    (с наибольшим id). Строки с NULL в ключе не трогаются: уникальный индекс их допускает.
+    """
+    key_present = and_(*(column.isnot(None) for column in columns))
+    newest = select(func.max(table.c.id)).where(key_present).group_by(*columns)
+    result = conn.execute(table.delete().where(key_present, table.c.id.not_in(newest)))
+    return result.rowcount or 0
+
+
+def sync_schema():
+    """
+    Дополняет существующие таблицы тем, чего не делает create_all:
+    новыми nullable-колонками и индексами из моделей.
+
+    Миграций в проекте нет, поэтому изменения моделей должны быть только
+    добавляющими; колонки NOT NULL без значения по умолчанию не добавляются.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    preparer = engine.dialect.identifier_preparer
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            columns = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in columns:
+                    continue
+                if not column.nullable:
+                    print(f"⚠️  Колонка {table.name}.{column.name} NOT NULL - добавьте ее вручную")
+                    continue
+                conn.execute(text(
+                    f"ALTER TABLE {preparer.format_table(table)} "
+                    f"ADD COLUMN {preparer.format_column(column)} {column.type.compile(dialect=engine.dialect)}"
+                ))
+                print(f"✅ Добавлена колонка {table.name}.{column.name}")
+            indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in indexes:
+                    continue
+                if index.unique:
+                    # Уникальный индекс не создастся, пока в таблице есть дубликаты, а без
+                    # него не работают upsert (ON CONFLICT) - ошибка прерывает запуск.
+                    # Дубликаты удаляются автоматически, только если индекс это разрешает
+                    if index.info.get("keep_newest"):
+                        removed = _delete_duplicates(conn, table, list(index.columns))
+                        if removed:
+                            print(f"⚠️  Удалено дубликатов {table.name} перед созданием {index.name}: {removed}")
+                    index.create(conn)
+                    print(f"✅ Создан индекс {index.name}")
+                    continue
+                try:
+                    with conn.begin_nested():
+                        index.create(conn)
+                    print(f"✅ Создан индекс {index.name}")
+                except Exception as e:
+                    print(f"⚠️  Индекс {index.name} не создан: {e}")
@@ -0,0 +1,27 @@
+"""
+Ночная задача: напоминания о прививках для всех питомцев
+
+Запуск (например, из cron раз в сутки):
+    python -m app.generate_vaccination_reminders
+"""
+from app.database import SessionLocal, engine, Base
+from app.models import user, pet, reference, reminder, vaccination  # noqa: F401 - регистрация таблиц
+from app.services.vaccination_engine import vaccination_engine
+
+# Создаем таблицы
+Base.metadata.create_all(bind=engine)
+
+db = SessionLocal()
+
+try:
+    stats = vaccination_engine.generate_reminders(db)
+    print(
+        f"✅ Напоминания о прививках: питомцев {stats['pets']}, сроков в окне {stats['due']}, "
+        f"создано {stats['created']} за {stats['seconds']} с"
+    )
+except Exception as e:
+    print(f"❌ Ошибка при создании напоминаний о прививках: {e}")
+    db.rollback()
+    raise
+finally:
+    db.close()
@@ -6,6 +6,7 @@ from app.models.reference import TypeOfAnimal
 from app.models.article import Article
 from app.core.security import get_password_hash
 from app.models.user import User, Profile
+from app.services.vaccination_engine import vaccination_engine
 
 # Создаем таблицы
 Base.metadata.create_all(bind=engine)
@@ -58,6 +59,10 @@ try:
             db.add(db_article)
     
     db.commit()
+    
+    # Правила вакцинации по умолчанию для добавленных видов животных
+    created_rules = vaccination_engine.ensure_default_rules(db)
+    print(f"Добавлено правил вакцинации: {created_rules}")
     print("База данных успешно инициализирована!")
     
 except Exception as e:
@@ -1,19 +1,66 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
-from app.routers import auth, pet, reference, parser, assistant, chat, vet_cabinet, partner_cabinet, owner_cabinet, admin
+from fastapi.responses import PlainTextResponse
+from app.database import engine, Base, SessionLocal, sync_schema
+from app.routers import auth, pet, reference, parser, assistant, chat, vet_cabinet, partner_cabinet, owner_cabinet, admin, analytics, events
 
 # Импортируем все модели для создания таблиц
 from app.models import user as user_model, pet as pet_model, reference as reference_model, article as article_model, reminder as reminder_model
 from app.models import vet_cabinet as vet_cabinet_model, partner_cabinet as partner_cabinet_model
+from app.models import conversation as conversation_model, vaccination as vaccination_model
+from app.models import notification as notification_model, vital as vital_model
 
-# Создаем таблицы
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.ai_service import ai_service
+from app.services.vaccination_engine import vaccination_engine
+from app.services.reminder_dispatcher import reminder_dispatcher
+from app.services.view_counter import view_counter
+from app.services.effective_prices import effective_prices
+from app.services.events_hub import events_hub
+from app.services.partner_geo import partner_geo
+from app.services.partner_hours import partner_hours
+
+# Создаем таблицы и добавляем новые колонки и индексы в существующие
 Base.metadata.create_all(bind=engine)
+sync_schema()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Правила вакцинации компилируются один раз; расчет сроков не читает таблицу правил
+    db = SessionLocal()
+    try:
+        vaccination_engine.load_rules(db)
+        # Ячейки сетки для геолокаций, сохраненных до появления поиска рядом
+        partner_geo.backfill_cells(db)
+        # Интервалы работы в минутах недели для графиков, сохраненных до их появления
+        partner_hours.backfill(db)
+    finally:
+        db.close()
+    # Проверка Ollama и прогрев модели выполняются в фоне и не задерживают старт воркера
+    ai_service.start_background_tasks()
+    events_hub.start()
+    reminder_dispatcher.start()
+    view_counter.start()
+    effective_prices.start()
+    if settings.AI_WARMUP_ENABLED and settings.AI_WARMUP_BLOCK_STARTUP:
+        # Воркер начинает принимать запросы только с загруженной моделью
+        await ai_service.wait_until_ready(settings.AI_WARMUP_TIMEOUT_SECONDS)
+    yield
+    await reminder_dispatcher.stop()
+    await view_counter.stop()
+    await effective_prices.stop()
+    await ai_service.stop_background_tasks()
+    events_hub.stop()
+
 
 app = FastAPI(
     title="VetCard API",
     description="API для ветеринарной карты",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Настройка CORS
@@ -36,6 +83,8 @@ app.include_router(vet_cabinet.router, prefix="/api/v1/vet", tags=["vet-cabinet"
 app.include_router(partner_cabinet.router, prefix="/api/v1/partner", tags=["partner-cabinet"])
 app.include_router(owner_cabinet.router, prefix="/api/v1/owner", tags=["owner-cabinet"])
 app.include_router(admin.router, prefix="/api/v1/admin", tags=["admin"])
+app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["analytics"])
+app.include_router(events.router, prefix="/api/v1/events", tags=["events"])
 
 
 @app.get("/")
@@ -47,3 +96,22 @@ async def root():
 async def health():
     return {"status": "ok"}
 
+
+
+@app.get("/health/ai")
+async def health_ai():
+    """Состояние AI ассистента по результатам последней фоновой проверки (модель не вызывается)"""
+    health = ai_service.get_health()
+    if not health["model_available"]:
+        health["status"] = "degraded" if health["reachable"] else "unavailable"
+    elif settings.AI_WARMUP_ENABLED and not health["warmup"]["warmed_up"]:
+        health["status"] = "warming_up"
+    else:
+        health["status"] = "ok"
+    return health
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Метрики процесса в формате Prometheus"""
+    return metrics.render()
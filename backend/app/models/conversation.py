@@ -0,0 +1,47 @@
+"""
+Модели для хранения диалогов с AI ассистентом
+"""
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.database import Base
+
+
+class Conversation(Base):
+    """Диалог пользователя с AI ассистентом"""
+    __tablename__ = "ai_conversations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    title = Column(String, nullable=True)
+    # Сжатое содержание старых реплик, которые уже не помещаются в окно истории
+    summary = Column(Text, nullable=True)
+    # ID последнего сообщения, вошедшего в summary
+    summarized_until_id = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    user = relationship("User")
+    messages = relationship(
+        "ConversationMessage",
+        back_populates="conversation",
+        cascade="all, delete-orphan",
+        order_by="ConversationMessage.id"
+    )
+
+
+class ConversationMessage(Base):
+    """Сообщение в диалоге с AI ассистентом"""
+    __tablename__ = "ai_conversation_messages"
+    __table_args__ = (
+        Index("ix_ai_conversation_messages_conversation_id_id", "conversation_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    conversation_id = Column(Integer, ForeignKey("ai_conversations.id"), nullable=False)
+    sender = Column(String, nullable=False)  # 'user' or 'ai'
+    text = Column(Text, nullable=False)
+    token_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    conversation = relationship("Conversation", back_populates="messages")
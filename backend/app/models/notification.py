@@ -0,0 +1,35 @@
+"""
+Модель очереди уведомлений (outbox)
+"""
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, DateTime, Text, UniqueConstraint, Index
+from datetime import datetime
+from app.database import Base
+
+
+class NotificationOutbox(Base):
+    """
+    Уведомление, ожидающее доставки пользователю.
+
+    Записывается в той же транзакции, что и отметка напоминания, поэтому
+    уведомление не теряется и не дублируется при сбоях диспетчера.
+    """
+    __tablename__ = "notification_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    reminder_id = Column(Integer, ForeignKey("reminders.id", ondelete="CASCADE"), nullable=True)
+    # Дата напоминания, для которой создано уведомление: после переноса даты уведомление создается заново
+    due_date = Column(Date, nullable=True)
+    channel = Column(String, default="in_app", nullable=False)
+    title = Column(String, nullable=False)
+    body = Column(Text, nullable=True)
+    status = Column(String, default="pending", nullable=False)  # pending, sent, failed
+    attempts = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("reminder_id", "due_date", name="uq_notification_outbox_reminder_due"),
+        Index("ix_notification_outbox_user_id", "user_id", "id"),
+        Index("ix_notification_outbox_status", "status", "id"),
+    )
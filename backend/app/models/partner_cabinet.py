@@ -1,7 +1,7 @@
 """
 Модели для кабинета партнера
 """
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Text, Float, DateTime, Time
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Text, Float, Date, DateTime, Time, BigInteger, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -19,6 +19,52 @@ class PartnerSchedule(Base):
     is_closed = Column(Boolean, default=False)
     
     partner = relationship("User")
+    
+    __table_args__ = (
+        # Один день недели на партнера; нужен для пакетного upsert графика.
+        # В старых БД дубликаты удаляются при создании индекса (остается последняя запись)
+        Index("ux_partner_schedules_partner_day", "partner_id", "day_of_week", unique=True,
+              info={"keep_newest": True}),
+    )
+
+
+class PartnerScheduleException(Base):
+    """Особый график на дату (праздник, санитарный день): заменяет график дня недели"""
+    __tablename__ = "partner_schedule_exceptions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    partner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    exception_date = Column(Date, nullable=False)
+    open_time = Column(Time, nullable=True)
+    close_time = Column(Time, nullable=True)
+    is_closed = Column(Boolean, default=True)
+    note = Column(String(255), nullable=True)
+    
+    __table_args__ = (
+        Index("ux_partner_schedule_exceptions_partner_date", "partner_id", "exception_date", unique=True),
+        # Кто работает по особому графику в заданную дату
+        Index("ix_partner_schedule_exceptions_date", "exception_date"),
+    )
+
+
+class PartnerOpenInterval(Base):
+    """
+    Время работы партнера в минутах от начала недели (понедельник 00:00 = 0).
+
+    Пересчитывается из PartnerSchedule при каждом изменении графика;
+    интервал [start_minute, end_minute) не переходит через конец недели.
+    """
+    __tablename__ = "partner_open_intervals"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    partner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    start_minute = Column(Integer, nullable=False)
+    end_minute = Column(Integer, nullable=False)
+    
+    __table_args__ = (
+        # Кто открыт в заданную минуту недели
+        Index("ix_partner_open_intervals_minutes", "start_minute", "end_minute"),
+    )
 
 
 class PartnerLocation(Base):
@@ -30,6 +76,8 @@ class PartnerLocation(Base):
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
     address = Column(String, nullable=True)
+    # Ячейка сетки координат для поиска рядом (см. services/partner_geo.py)
+    grid_cell = Column(BigInteger, nullable=True, index=True)
     
     partner = relationship("User")
 
@@ -92,6 +140,11 @@ class PartnerPromotion(Base):
     partner = relationship("User")
     product = relationship("RefShop", foreign_keys=[product_id])
     service = relationship("PartnerService", foreign_keys=[service_id])
+    
+    __table_args__ = (
+        # Лента действующих акций: is_active = true и диапазон дат
+        Index("ix_partner_promotions_active_dates", "is_active", "start_date", "end_date"),
+    )
 
 
 class ProductView(Base):
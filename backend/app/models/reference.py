@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey, Float, DateTime
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -55,6 +55,11 @@ class RefShop(Base):
     subcategory_id = Column(Integer, ForeignKey("product_subcategories.id"), nullable=True)
     price = Column(String, nullable=True)  # Цена товара
     stock_quantity = Column(Integer, nullable=True)  # Количество на складе
+    # Цена с лучшей действующей скидкой по акциям (пересчитывается сервисом effective_prices)
+    effective_price = Column(Float, nullable=True, index=True)
+    discount_percent = Column(Integer, nullable=True)
+    discount_promotion_id = Column(Integer, nullable=True)
+    discount_ends_at = Column(DateTime, nullable=True)
 
     subcategory = relationship("ProductSubcategory", lazy="joined")
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, ForeignKey, Index
 from app.database import Base
 
 
@@ -6,9 +6,24 @@ class Reminder(Base):
     __tablename__ = "reminders"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    # Питомец напоминания; у старых напоминаний только animal_name
+    pet_id = Column(Integer, ForeignKey("pets.id", ondelete="SET NULL"), nullable=True)
     animal_name = Column(String, nullable=False)
     assistant_sms = Column(String, nullable=False)
     date_assistant = Column(Date, nullable=False)
     status = Column(Boolean, default=True)  # True = Запланировано, False = Сделано
+    # Когда уведомление о напоминании поставлено в очередь отправки (None - еще не отправлялось)
+    notified_at = Column(DateTime, nullable=True)
 
+    __table_args__ = (
+        # Очередь диспетчера: только неотправленные напоминания, поэтому индекс
+        # не растет вместе с историей и поиск срочных не сканирует таблицу
+        Index(
+            "ix_reminders_due_pending", "status", "date_assistant",
+            postgresql_where=notified_at.is_(None),
+            sqlite_where=notified_at.is_(None)
+        ),
+        # Лента событий питомца
+        Index("ix_reminders_pet_date", "pet_id", "date_assistant"),
+    )
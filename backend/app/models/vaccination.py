@@ -0,0 +1,49 @@
+"""
+Модели правил вакцинации и созданных по ним напоминаний
+"""
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Date, DateTime, UniqueConstraint, Index
+from datetime import datetime
+from app.database import Base
+
+
+class VaccinationRule(Base):
+    """
+    Правило вакцинации для вида животных.
+
+    Первичный курс: doses доз, первая в возрасте first_dose_age_days дней,
+    следующие через dose_interval_days. Затем ревакцинация каждые
+    booster_interval_days дней (если задано).
+    """
+    __tablename__ = "vaccination_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    species_id = Column(Integer, ForeignKey("type_of_animals.id"), nullable=False, index=True)
+    code = Column(String, nullable=False)  # Например: dog_dhppi, cat_rabies
+    name = Column(String, nullable=False)  # Название прививки для владельца
+    first_dose_age_days = Column(Integer, nullable=False)
+    doses = Column(Integer, default=1, nullable=False)
+    dose_interval_days = Column(Integer, default=0, nullable=False)
+    booster_interval_days = Column(Integer, nullable=True)
+    is_active = Column(Boolean, default=True)
+
+    __table_args__ = (
+        UniqueConstraint("species_id", "code", name="uq_vaccination_rules_species_code"),
+    )
+
+
+class VaccinationReminderLog(Base):
+    """Напоминание о прививке, уже созданное для питомца (защищает от дублей при повторном запуске)"""
+    __tablename__ = "vaccination_reminder_log"
+
+    id = Column(Integer, primary_key=True, index=True)
+    pet_id = Column(Integer, ForeignKey("pets.id", ondelete="CASCADE"), nullable=False)
+    rule_id = Column(Integer, ForeignKey("vaccination_rules.id", ondelete="CASCADE"), nullable=False)
+    dose_number = Column(Integer, nullable=False)  # 1..doses - первичный курс, дальше ревакцинации
+    due_date = Column(Date, nullable=False)
+    reminder_id = Column(Integer, ForeignKey("reminders.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("pet_id", "rule_id", "due_date", name="uq_vaccination_reminder_log_pet_rule_date"),
+        Index("ix_vaccination_reminder_log_due_date", "due_date"),
+    )
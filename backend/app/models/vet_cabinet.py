@@ -1,7 +1,7 @@
 """
 Модели для кабинета ветеринара
 """
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Text, DateTime, Date
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Text, DateTime, Date, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -20,10 +20,22 @@ class VetAppointment(Base):
     status = Column(String, default="pending")  # pending, confirmed, completed, cancelled
     notes = Column(Text, nullable=True)  # Заметки ветеринара
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Запись в клинику партнера: услуга и ее длительность (None - стандартный слот)
+    service_id = Column(Integer, ForeignKey("partner_services.id"), nullable=True)
+    duration_minutes = Column(Integer, nullable=True)
     
     vet = relationship("User", foreign_keys=[vet_id])
     pet_owner = relationship("User", foreign_keys=[pet_owner_id])
     pet = relationship("Pet", lazy="joined")
+    
+    __table_args__ = (
+        # Лента событий питомца
+        Index("ix_vet_appointments_pet_date", "pet_id", "appointment_date"),
+        # Занятость ветеринара или клиники за период
+        Index("ix_vet_appointments_vet_date", "vet_id", "appointment_date"),
+        # Записи владельца за период
+        Index("ix_vet_appointments_owner_date", "pet_owner_id", "appointment_date"),
+    )
 
 
 class VetConsultation(Base):
@@ -43,6 +55,39 @@ class VetConsultation(Base):
     vet = relationship("User", foreign_keys=[vet_id])
     pet_owner = relationship("User", foreign_keys=[pet_owner_id])
     pet = relationship("Pet", lazy="joined")
+    
+    __table_args__ = (
+        # Лента событий питомца
+        Index("ix_vet_consultations_pet_created", "pet_id", "created_at"),
+    )
+
+
+class ConsultationQueueItem(Base):
+    """
+    Вопрос в общей очереди клиники или специализации. Ветеринар забирает его
+    из очереди (claim) - тогда создается VetConsultation, назначенная ему.
+    """
+    __tablename__ = "consultation_queue"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    pet_owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    pet_id = Column(Integer, ForeignKey("pets.id", ondelete="CASCADE"), nullable=False)
+    question = Column(Text, nullable=False)
+    # Пул: клиника и/или специализация (в нижнем регистре, без пробелов по краям)
+    pool_clinic = Column(String, nullable=True)
+    pool_specialization = Column(String, nullable=True)
+    priority = Column(Integer, default=0)  # 0 - обычный, 1 - срочный, 2 - экстренный
+    due_at = Column(DateTime, nullable=False)  # Срок ответа (SLA)
+    status = Column(String, default="queued")  # queued, claimed, answered
+    claimed_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
+    consultation_id = Column(Integer, ForeignKey("vet_consultations.id", ondelete="SET NULL"), nullable=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # Следующий вопрос: ожидающие по приоритету и сроку
+        Index("ix_consultation_queue_next", "status", "priority", "due_at"),
+    )
 
 
 class VetArticle(Base):
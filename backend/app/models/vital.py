@@ -0,0 +1,25 @@
+"""
+Модель измерений веса и других показателей питомца
+"""
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, Index
+from datetime import datetime
+from app.database import Base
+
+
+class PetVital(Base):
+    """Одно измерение показателя питомца (вес, температура, пульс...)"""
+    __tablename__ = "pet_vitals"
+
+    id = Column(Integer, primary_key=True, index=True)
+    pet_id = Column(Integer, ForeignKey("pets.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String, nullable=False)  # weight, temperature, heart_rate, respiratory_rate
+    value = Column(Float, nullable=False)
+    measured_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    note = Column(String, nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # История показателя питомца за период
+        Index("ix_pet_vitals_pet_kind_measured", "pet_id", "kind", "measured_at"),
+    )
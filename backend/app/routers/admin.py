@@ -16,6 +16,7 @@ from app.schemas.admin import (
 )
 from app.dependencies import get_current_user
 from app.core.security import get_password_hash
+from app.services.vet_directory import vet_directory
 
 router = APIRouter()
 
@@ -222,6 +223,7 @@ async def create_user(
     db.commit()
     db.refresh(new_user)
     db.refresh(new_profile)
+    vet_directory.invalidate()
     
     return UserDetailResponse(
         user=UserResponse(
@@ -288,6 +290,7 @@ async def update_user(
     
     db.commit()
     db.refresh(user)
+    vet_directory.invalidate()
     
     profile = db.query(Profile).filter(Profile.user_id == user.id).first()
     
@@ -361,6 +364,7 @@ async def update_user_profile(
     
     db.commit()
     db.refresh(profile)
+    vet_directory.invalidate()
     
     return UserDetailResponse(
         user=UserResponse(
@@ -411,6 +415,7 @@ async def delete_user(
     # Удаление пользователя
     db.delete(user)
     db.commit()
+    vet_directory.invalidate()
     
     return None
 
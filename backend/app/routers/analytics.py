@@ -0,0 +1,41 @@
+"""
+Роутер аналитики по всем питомцам (ветеринары и администраторы)
+"""
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, status
+from app.models.user import User
+from app.schemas.analytics import PopulationAnalyticsResponse
+from app.dependencies import get_current_user
+from app.services.population_analytics import population_analytics
+
+router = APIRouter()
+
+
+def verify_analytics_role(current_user: User = Depends(get_current_user)):
+    """Проверка, что пользователь - ветеринар или администратор"""
+    if not current_user.profile or current_user.profile.role not in (2, 4):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Доступ разрешен только ветеринарам и администраторам"
+        )
+    return current_user
+
+
+@router.get("/population/", response_model=PopulationAnalyticsResponse)
+async def get_population_analytics(
+    refresh: bool = False,
+    current_user: User = Depends(verify_analytics_role)
+):
+    """
+    Распределения веса и возраста по видам и возрастным группам, просроченные прививки и напоминания.
+    
+    Результат кэшируется (ANALYTICS_CACHE_TTL_SECONDS); refresh=true пересчитывает
+    сразу (только для администраторов).
+    """
+    if refresh and current_user.profile.role != 4:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Пересчет аналитики доступен только администраторам"
+        )
+    # Расчет читает всю таблицу pets - выполняем вне event loop
+    return await asyncio.to_thread(population_analytics.population, refresh)
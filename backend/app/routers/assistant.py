@@ -1,10 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Dict, List, Optional
+from app.core.config import settings
 from app.database import get_db
 from app.models.reminder import Reminder
+from app.models.notification import NotificationOutbox
 from app.models.user import User
-from app.schemas.reminder import ReminderCreate, ReminderResponse, ReminderUpdate
+from app.models.pet import Pet
+from app.schemas.reminder import (
+    ReminderCreate, ReminderResponse, ReminderUpdate,
+    ReminderBulkCreate, ReminderBulkUpdate, ReminderBulkComplete,
+    ReminderBulkItemResult, ReminderBulkResponse
+)
+from app.schemas.notification import NotificationResponse
 from app.dependencies import get_current_user
 
 router = APIRouter()
@@ -24,7 +33,8 @@ async def get_reminders(
             animalName=reminder.animal_name,
             assistant_sms=reminder.assistant_sms,
             date_assistant=reminder.date_assistant,
-            status=reminder.status
+            status=reminder.status,
+            pet_id=reminder.pet_id
         ))
     
     return result
@@ -36,10 +46,18 @@ async def create_reminder(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    pet_names = _owned_pet_names(db, current_user, [reminder_data.pet_id])
+    if reminder_data.pet_id is not None and reminder_data.pet_id not in pet_names:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Питомец не найден"
+        )
+    
     # Автоматически берем user_id из токена
     db_reminder = Reminder(
         user_id=current_user.id,
-        animal_name=reminder_data.animal_name or "",
+        pet_id=reminder_data.pet_id,
+        animal_name=reminder_data.animal_name or pet_names.get(reminder_data.pet_id, ""),
         assistant_sms=reminder_data.assistant_sms,
         date_assistant=reminder_data.date_assistant,
         status=reminder_data.status
@@ -53,10 +71,208 @@ async def create_reminder(
         animalName=db_reminder.animal_name,
         assistant_sms=db_reminder.assistant_sms,
         date_assistant=db_reminder.date_assistant,
-        status=db_reminder.status
+        status=db_reminder.status,
+        pet_id=db_reminder.pet_id
     )
 
 
+def _owned_pet_names(db: Session, current_user: User, pet_ids) -> Dict[int, str]:
+    """Имена питомцев пользователя из списка pet_ids (чужие и несуществующие не попадают)"""
+    pet_ids = {pet_id for pet_id in pet_ids if pet_id is not None}
+    if not pet_ids:
+        return {}
+    return dict(db.query(Pet.id, Pet.name).filter(
+        Pet.id.in_(pet_ids),
+        Pet.user_id == current_user.id
+    ).all())
+
+
+def _reminder_key(pet_id: Optional[int], animal_name: str, assistant_sms: str, date_assistant) -> tuple:
+    """Ключ повтора: питомец (по id, а без привязки - по имени), текст и дата"""
+    return (pet_id, animal_name if pet_id is None else None, assistant_sms, date_assistant)
+
+
+def _check_bulk_size(count: int):
+    if count > settings.REMINDER_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Не больше {settings.REMINDER_BULK_MAX_ITEMS} напоминаний за один запрос"
+        )
+
+
+def _to_response(reminder) -> ReminderResponse:
+    return ReminderResponse(
+        id=reminder["id"],
+        animalName=reminder["animal_name"],
+        assistant_sms=reminder["assistant_sms"],
+        date_assistant=reminder["date_assistant"],
+        status=reminder["status"],
+        pet_id=reminder.get("pet_id")
+    )
+
+
+@router.post("/reminder/bulk/", response_model=ReminderBulkResponse)
+async def create_reminders_bulk(
+    bulk_data: ReminderBulkCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Создание нескольких напоминаний одной транзакцией (например, план ухода на год).
+    
+    Напоминание с тем же питомцем, текстом и датой, что уже есть у пользователя
+    или раньше в этом же запросе, не создается (result = duplicate).
+    """
+    _check_bulk_size(len(bulk_data.items))
+    
+    # Уже существующие напоминания на эти даты - одним запросом
+    dates = {item.date_assistant for item in bulk_data.items}
+    existing = {}
+    if dates:
+        for row in db.query(
+            Reminder.id, Reminder.pet_id, Reminder.animal_name, Reminder.assistant_sms, Reminder.date_assistant
+        ).filter(
+            Reminder.user_id == current_user.id,
+            Reminder.date_assistant.in_(dates)
+        ).all():
+            existing[_reminder_key(row.pet_id, row.animal_name, row.assistant_sms, row.date_assistant)] = row.id
+    
+    pet_names = _owned_pet_names(db, current_user, [item.pet_id for item in bulk_data.items])
+    
+    results = []
+    new_rows = []
+    batch = {}  # Ключ напоминания -> позиция в new_rows
+    for index, item in enumerate(bulk_data.items):
+        if item.pet_id is not None and item.pet_id not in pet_names:
+            results.append(ReminderBulkItemResult(
+                index=index, result="not_found", detail="Питомец не найден"
+            ))
+            continue
+        row = {
+            "user_id": current_user.id,
+            "pet_id": item.pet_id,
+            "animal_name": item.animal_name or pet_names.get(item.pet_id, ""),
+            "assistant_sms": item.assistant_sms,
+            "date_assistant": item.date_assistant,
+            "status": item.status
+        }
+        key = _reminder_key(row["pet_id"], row["animal_name"], row["assistant_sms"], row["date_assistant"])
+        if key in existing or key in batch:
+            results.append(ReminderBulkItemResult(
+                index=index, id=existing.get(key), result="duplicate",
+                detail="Такое напоминание уже есть"
+            ))
+            continue
+        batch[key] = len(new_rows)
+        new_rows.append(row)
+        results.append(ReminderBulkItemResult(index=index, result="created"))
+    
+    if new_rows:
+        ids = db.execute(
+            insert(Reminder).returning(Reminder.id, sort_by_parameter_order=True),
+            new_rows
+        ).scalars().all()
+        db.commit()
+        for row, reminder_id in zip(new_rows, ids):
+            row["id"] = reminder_id
+    
+    for result, item in zip(results, bulk_data.items):
+        key = _reminder_key(
+            item.pet_id, item.animal_name or pet_names.get(item.pet_id, ""), item.assistant_sms, item.date_assistant
+        )
+        if result.result != "not_found" and result.id is None and key in batch:
+            row = new_rows[batch[key]]
+            result.id = row["id"]
+            if result.result == "created":
+                result.reminder = _to_response(row)
+    
+    return ReminderBulkResponse(processed=len(new_rows), results=results)
+
+
+@router.put("/reminder/bulk/", response_model=ReminderBulkResponse)
+async def update_reminders_bulk(
+    bulk_data: ReminderBulkUpdate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Изменение нескольких напоминаний одной транзакцией; не указанные поля не меняются"""
+    _check_bulk_size(len(bulk_data.items))
+    
+    ids = {item.id for item in bulk_data.items}
+    current = {
+        row.id: dict(row._mapping)
+        for row in db.query(
+            Reminder.id, Reminder.animal_name, Reminder.assistant_sms,
+            Reminder.date_assistant, Reminder.status, Reminder.pet_id
+        ).filter(
+            Reminder.id.in_(ids),
+            Reminder.user_id == current_user.id
+        ).all()
+    } if ids else {}
+    
+    results = []
+    changes = {}
+    for index, item in enumerate(bulk_data.items):
+        if item.id not in current:
+            results.append(ReminderBulkItemResult(
+                index=index, id=item.id, result="not_found",
+                detail="Напоминание не найдено"
+            ))
+            continue
+        # Все поля напоминания обязательные, поэтому null означает "не менять"
+        values = {
+            field: value
+            for field, value in item.model_dump(exclude_unset=True, exclude={"id"}).items()
+            if value is not None
+        }
+        # Перенесенное или снова запланированное напоминание диспетчер отправит заново
+        if "date_assistant" in values or values.get("status") is True:
+            values["notified_at"] = None
+        current[item.id].update({k: v for k, v in values.items() if k != "notified_at"})
+        changes.setdefault(item.id, {"id": item.id}).update(values)
+        results.append(ReminderBulkItemResult(index=index, id=item.id, result="updated"))
+    
+    # UPDATE по первичному ключу для всех строк сразу (executemany)
+    rows = [row for row in changes.values() if len(row) > 1]
+    if rows:
+        db.execute(update(Reminder), rows)
+    db.commit()
+    
+    for result in results:
+        if result.result == "updated":
+            result.reminder = _to_response(current[result.id])
+    
+    return ReminderBulkResponse(processed=len(changes), results=results)
+
+
+@router.post("/reminder/bulk/complete/", response_model=ReminderBulkResponse)
+async def complete_reminders_bulk(
+    bulk_data: ReminderBulkComplete,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Отметить несколько напоминаний выполненными одним запросом UPDATE"""
+    _check_bulk_size(len(bulk_data.ids))
+    
+    completed = set()
+    if bulk_data.ids:
+        completed = set(db.execute(
+            update(Reminder).where(
+                Reminder.id.in_(set(bulk_data.ids)),
+                Reminder.user_id == current_user.id
+            ).values(status=False).returning(Reminder.id).execution_options(synchronize_session=False)
+        ).scalars().all())
+        db.commit()
+    
+    results = [
+        ReminderBulkItemResult(index=index, id=reminder_id, result="completed")
+        if reminder_id in completed else
+        ReminderBulkItemResult(index=index, id=reminder_id, result="not_found", detail="Напоминание не найдено")
+        for index, reminder_id in enumerate(bulk_data.ids)
+    ]
+    return ReminderBulkResponse(processed=len(completed), results=results)
+
+
 @router.put("/reminder/{reminder_id}/", response_model=ReminderResponse)
 async def update_reminder(
     reminder_id: int,
@@ -85,6 +301,10 @@ async def update_reminder(
         else:
             setattr(db_reminder, field, value)
     
+    # Перенесенное или снова запланированное напоминание диспетчер отправит заново
+    if "date_assistant" in update_data or update_data.get("status") is True:
+        db_reminder.notified_at = None
+    
     db.commit()
     db.refresh(db_reminder)
     
@@ -93,7 +313,8 @@ async def update_reminder(
         animalName=db_reminder.animal_name,
         assistant_sms=db_reminder.assistant_sms,
         date_assistant=db_reminder.date_assistant,
-        status=db_reminder.status
+        status=db_reminder.status,
+        pet_id=db_reminder.pet_id
     )
 
 
@@ -117,8 +338,29 @@ async def delete_reminder(
             detail="Нет доступа к этому напоминанию"
         )
     
+    db.query(NotificationOutbox).filter(
+        NotificationOutbox.reminder_id == db_reminder.id
+    ).delete(synchronize_session=False)
     db.delete(db_reminder)
     db.commit()
     
     return None
 
+
+@router.get("/notifications/", response_model=List[NotificationResponse])
+async def get_notifications(
+    before_id: Optional[int] = None,
+    limit: int = 50,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Уведомления пользователя из очереди, новые первыми.
+    
+    Следующая страница - before_id = id последнего полученного уведомления.
+    """
+    query = db.query(NotificationOutbox).filter(NotificationOutbox.user_id == current_user.id)
+    if before_id is not None:
+        query = query.filter(NotificationOutbox.id < before_id)
+    return query.order_by(NotificationOutbox.id.desc()).limit(max(1, min(limit, 200))).all()
+
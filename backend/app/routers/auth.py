@@ -13,6 +13,7 @@ from app.core.security import (
 )
 from app.core.config import settings
 from app.dependencies import get_current_user
+from app.services.vet_directory import vet_directory
 
 router = APIRouter()
 
@@ -216,6 +217,8 @@ async def update_profile(
         exclude_unset=True,
         exclude={"id", "profile_id", "username", "email"}
     )
+    # Справочник ветеринаров меняется, если профиль был или стал ветеринарским
+    was_vet = profile.role == 2
     for field, value in update_data.items():
         if hasattr(profile, field):
             setattr(profile, field, value)
@@ -223,6 +226,8 @@ async def update_profile(
     db.commit()
     db.refresh(profile)
     db.refresh(current_user)
+    if was_vet or profile.role == 2:
+        vet_directory.invalidate()
     
     return ProfileResponse(
         id=current_user.id,
@@ -1,124 +1,339 @@
 """
 Роутер для AI чата
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from contextlib import aclosing
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.database import get_db
+from typing import Any, Dict, List
+from app.core.metrics import metrics
+from app.database import get_db, SessionLocal
 from app.models.user import User, Profile
 from app.models.pet import Pet
 from app.models.reference import TypeOfAnimal, RefShop
+from app.models.conversation import Conversation
 from app.dependencies import get_current_user
-from app.schemas.chat import ChatRequest, ChatResponse
+from app.schemas.chat import (
+    ChatRequest, ChatResponse,
+    ConversationResponse, ConversationDetailResponse
+)
 from app.services.ai_service import ai_service
+from app.services.conversation_service import conversation_service
+from app.services.chat_guard import chat_limiter, run_until_disconnect, ClientDisconnected
 
 router = APIRouter()
 
+# Нестандартный статус nginx для запросов, закрытых клиентом до ответа
+CLIENT_CLOSED_REQUEST = 499
+
+
+def _load_ai_context(db: Session, current_user: User) -> Dict[str, Any]:
+    """Собирает данные для контекста AI: питомцы, виды животных, специалисты и товары"""
+    # Получаем питомцев пользователя
+    pets = db.query(Pet).filter(Pet.user_id == current_user.id).all()
+    
+    # Получаем словарь видов животных
+    species_types = db.query(TypeOfAnimal).filter(TypeOfAnimal.is_active == True).all()
+    species_dict = {st.id: st.name_ru for st in species_types}
+    
+    # Получаем список ветеринаров (специалистов)
+    veterinarians_query = db.query(User).join(Profile).filter(
+        Profile.role == 2,
+        User.is_active == True
+    ).all()
+    
+    veterinarians = []
+    for vet in veterinarians_query:
+        if vet.profile:
+            vet_dict = {
+                "id": vet.id,
+                "username": vet.username,
+                "email": vet.email,
+                "first_name": vet.profile.first_name,
+                "last_name": vet.profile.last_name,
+                "third_name": vet.profile.third_name,
+                "phone": vet.profile.phone,
+                "clinic": vet.profile.clinic,
+                "position": vet.profile.position,
+                "specialization": vet.profile.specialization,
+                "city": vet.profile.city,
+                "address": vet.profile.address,
+                "description": vet.profile.description
+            }
+            veterinarians.append(vet_dict)
+    
+    # Получаем список активных товаров
+    products_query = db.query(RefShop).filter(RefShop.is_active == True).limit(20).all()
+    
+    products = []
+    for product in products_query:
+        product_dict = {
+            "id": product.id,
+            "name_ru": product.name_ru,
+            "name_kg": product.name_kg,
+            "description": product.description,
+            "img_url": product.img_url,
+            "price": product.price,
+            "stock_quantity": product.stock_quantity,
+            "is_active": product.is_active
+        }
+        # Добавляем информацию о подкатегории, если есть
+        if product.subcategory:
+            product_dict["subcategory"] = {
+                "id": product.subcategory.id,
+                "name_ru": product.subcategory.name_ru,
+                "name_kg": product.subcategory.name_kg,
+                "category": {
+                    "id": product.subcategory.category.id,
+                    "name_ru": product.subcategory.category.name_ru
+                } if product.subcategory.category else None
+            }
+        products.append(product_dict)
+    
+    return {
+        "pets": pets,
+        "species_dict": species_dict,
+        "veterinarians": veterinarians,
+        "products": products
+    }
+
+
+def _open_conversation(db: Session, current_user: User, chat_request: ChatRequest) -> Conversation:
+    """Загружает диалог с сервера или создает новый"""
+    if chat_request.conversation_id is not None:
+        conversation = conversation_service.get_conversation(db, current_user, chat_request.conversation_id)
+        if not conversation:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Диалог не найден"
+            )
+        return conversation
+    
+    legacy_history = None
+    if chat_request.conversation_history:
+        legacy_history = [
+            {"sender": msg.sender, "text": msg.text}
+            for msg in chat_request.conversation_history
+        ]
+    return conversation_service.create_conversation(
+        db, current_user, chat_request.message, legacy_history
+    )
+
+
+def _acquire_chat_slot(current_user: User):
+    """Занимает слот пользователя для запроса к модели или возвращает 429"""
+    if not chat_limiter.try_acquire(current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Слишком много одновременных запросов к AI ассистенту. Дождитесь ответа на предыдущий вопрос."
+        )
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Форматирует событие Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
 
 @router.post("/chat/", response_model=ChatResponse)
 async def chat_with_ai(
     chat_request: ChatRequest,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Отправка сообщения в AI ассистент и получение ответа
+    Отправка сообщения в AI ассистент и получение ответа.
+    
+    Если клиент отключается до ответа, генерация в Ollama прерывается.
     """
+    _acquire_chat_slot(current_user)
     try:
-        # Получаем питомцев пользователя
-        pets = db.query(Pet).filter(Pet.user_id == current_user.id).all()
+        conversation = _open_conversation(db, current_user, chat_request)
         
-        # Получаем словарь видов животных
-        species_types = db.query(TypeOfAnimal).filter(TypeOfAnimal.is_active == True).all()
-        species_dict = {st.id: st.name_ru for st in species_types}
-        
-        # Получаем список ветеринаров (специалистов)
-        veterinarians_query = db.query(User).join(Profile).filter(
-            Profile.role == 2,
-            User.is_active == True
-        ).all()
-        
-        veterinarians = []
-        for vet in veterinarians_query:
-            if vet.profile:
-                vet_dict = {
-                    "id": vet.id,
-                    "username": vet.username,
-                    "email": vet.email,
-                    "first_name": vet.profile.first_name,
-                    "last_name": vet.profile.last_name,
-                    "third_name": vet.profile.third_name,
-                    "phone": vet.profile.phone,
-                    "clinic": vet.profile.clinic,
-                    "position": vet.profile.position,
-                    "specialization": vet.profile.specialization,
-                    "city": vet.profile.city,
-                    "address": vet.profile.address,
-                    "description": vet.profile.description
-                }
-                veterinarians.append(vet_dict)
-        
-        # Получаем список активных товаров
-        products_query = db.query(RefShop).filter(RefShop.is_active == True).limit(20).all()
-        
-        products = []
-        for product in products_query:
-            product_dict = {
-                "id": product.id,
-                "name_ru": product.name_ru,
-                "name_kg": product.name_kg,
-                "description": product.description,
-                "img_url": product.img_url,
-                "price": product.price,
-                "stock_quantity": product.stock_quantity,
-                "is_active": product.is_active
-            }
-            # Добавляем информацию о подкатегории, если есть
-            if product.subcategory:
-                product_dict["subcategory"] = {
-                    "id": product.subcategory.id,
-                    "name_ru": product.subcategory.name_ru,
-                    "name_kg": product.subcategory.name_kg,
-                    "category": {
-                        "id": product.subcategory.category.id,
-                        "name_ru": product.subcategory.category.name_ru
-                    } if product.subcategory.category else None
-                }
-            products.append(product_dict)
-        
-        # Подготавливаем историю разговора
-        conversation_history = None
-        if chat_request.conversation_history:
-            conversation_history = [
-                {"sender": msg.sender, "text": msg.text}
-                for msg in chat_request.conversation_history
-            ]
+        # Окно истории в пределах бюджета токенов + краткое содержание старых реплик
+        conversation_history, history_summary = conversation_service.build_history(db, conversation)
+        # Не держим транзакцию открытой, пока модель генерирует ответ:
+        # в SQLite незавершенная запись блокирует запросы других пользователей
+        db.commit()
+        ai_context = _load_ai_context(db, current_user)
         
         # Получаем ответ от AI с контекстом о специалистах и товарах
-        ai_response = await ai_service.chat(
+        usage = {}
+        ai_response = await run_until_disconnect(request, ai_service.chat(
             message=chat_request.message,
             user=current_user,
-            pets=pets,
-            species_dict=species_dict,
             conversation_history=conversation_history,
-            veterinarians=veterinarians,
-            products=products
-        )
+            history_summary=history_summary,
+            usage=usage,
+            **ai_context
+        ))
+        
+        conversation_service.add_message(db, conversation, "user", chat_request.message)
+        conversation_service.add_message(db, conversation, "ai", ai_response)
+        db.commit()
         
         # Проверяем, нужно ли предложить создать напоминание
-        reminder_suggestion = await ai_service.create_reminder_suggestion(
+        reminder_suggestion = await run_until_disconnect(request, ai_service.create_reminder_suggestion(
             message=chat_request.message,
             user=current_user,
-            pets=pets
-        )
+            pets=ai_context["pets"]
+        ))
         
         return ChatResponse(
             response=ai_response,
-            reminder_suggestion=reminder_suggestion
+            reminder_suggestion=reminder_suggestion,
+            conversation_id=conversation.id,
+            prompt_tokens=usage.get("prompt_tokens")
         )
         
+    except ClientDisconnected:
+        # Ответ уже некому отправлять
+        db.rollback()
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except HTTPException:
+        raise
     except Exception as e:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка при обработке запроса: {str(e)}"
         )
+    finally:
+        chat_limiter.release(current_user.id)
+
+
+@router.post("/chat/stream/")
+async def chat_with_ai_stream(
+    chat_request: ChatRequest,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Потоковая версия чата (Server-Sent Events).
+    
+    События:
+    - meta: {"conversation_id"} - сразу после начала ответа
+    - delta: {"text"} - очередной фрагмент ответа
+    - done: {"conversation_id", "reminder_suggestion", "prompt_tokens"} - ответ завершен
+    
+    Если клиент отключается, генерация в Ollama прерывается.
+    """
+    _acquire_chat_slot(current_user)
+    user_id = current_user.id
+    try:
+        conversation = _open_conversation(db, current_user, chat_request)
+        conversation_history, history_summary = conversation_service.build_history(db, conversation)
+        db.commit()
+        conversation_id = conversation.id
+        # Контекст загружаем после commit: сессия запроса закрывается до начала потока,
+        # а объекты, загруженные после commit, остаются доступными для чтения
+        ai_context = _load_ai_context(db, current_user)
+    except Exception:
+        chat_limiter.release(user_id)
+        db.rollback()
+        raise
+    
+    async def event_stream():
+        chunks = []
+        usage = {}
+        try:
+            yield _sse("meta", {"conversation_id": conversation_id})
+            # aclosing гарантирует закрытие потока к Ollama при отключении клиента
+            async with aclosing(ai_service.chat_stream(
+                message=chat_request.message,
+                user=current_user,
+                conversation_history=conversation_history,
+                history_summary=history_summary,
+                usage=usage,
+                **ai_context
+            )) as stream:
+                async for chunk in stream:
+                    if await request.is_disconnected():
+                        metrics.inc("vetcard_ai_client_disconnects_total")
+                        return
+                    chunks.append(chunk)
+                    yield _sse("delta", {"text": chunk})
+            
+            _save_turn(conversation_id, chat_request.message, "".join(chunks))
+            
+            reminder_suggestion = await ai_service.create_reminder_suggestion(
+                message=chat_request.message,
+                user=current_user,
+                pets=ai_context["pets"]
+            )
+            yield _sse("done", {
+                "conversation_id": conversation_id,
+                "reminder_suggestion": reminder_suggestion,
+                "prompt_tokens": usage.get("prompt_tokens")
+            })
+        finally:
+            chat_limiter.release(user_id)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _save_turn(conversation_id: int, user_message: str, ai_response: str):
+    """Сохраняет вопрос и ответ в отдельной сессии (сессия запроса к этому моменту закрыта)"""
+    db = SessionLocal()
+    try:
+        conversation = db.get(Conversation, conversation_id)
+        if conversation is None:
+            return
+        conversation_service.add_message(db, conversation, "user", user_message)
+        conversation_service.add_message(db, conversation, "ai", ai_response)
+        db.commit()
+    finally:
+        db.close()
+
+
+@router.get("/conversations/", response_model=List[ConversationResponse])
+async def get_conversations(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Получить список диалогов пользователя"""
+    conversations = db.query(Conversation).filter(
+        Conversation.user_id == current_user.id
+    ).order_by(Conversation.updated_at.desc()).all()
+    return conversations
+
+
+@router.get("/conversations/{conversation_id}/", response_model=ConversationDetailResponse)
+async def get_conversation(
+    conversation_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Получить диалог со всеми сообщениями"""
+    conversation = conversation_service.get_conversation(db, current_user, conversation_id)
+    if not conversation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Диалог не найден"
+        )
+    return conversation
 
+
+@router.delete("/conversations/{conversation_id}/", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_conversation(
+    conversation_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Удалить диалог"""
+    conversation = conversation_service.get_conversation(db, current_user, conversation_id)
+    if not conversation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Диалог не найден"
+        )
+    
+    db.delete(conversation)
+    db.commit()
+    return None
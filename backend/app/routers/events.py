@@ -0,0 +1,48 @@
+"""
+Роутер событий в реальном времени (Server-Sent Events)
+"""
+import asyncio
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.dependencies import get_current_user
+from app.models.user import User
+from app.services.events_hub import events_hub, format_sse
+
+router = APIRouter()
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Поток событий пользователя (text/event-stream): новые и измененные записи
+    к ветеринару, консультации, вопросы в очереди, уведомления о напоминаниях.
+    Событие содержит объект целиком; после переподключения списки нужно перечитать.
+    """
+    user_id = current_user.id
+    
+    async def event_stream():
+        queue = events_hub.subscribe(user_id)
+        try:
+            yield format_sse("ready", {"user_id": user_id})
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=settings.EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    # Комментарий SSE держит соединение открытым через прокси
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event["event"], event["data"])
+        finally:
+            events_hub.unsubscribe(user_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,19 +1,27 @@
 """
 Роутер для функционала владельца питомца (записи, консультации)
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.database import get_db
 from app.dependencies import get_current_user
 from app.models.user import User, Profile
 from app.models.pet import Pet
-from app.models.vet_cabinet import VetAppointment, VetConsultation
+from app.models.vet_cabinet import VetAppointment, VetConsultation, ConsultationQueueItem
 from app.schemas.vet_cabinet import (
     VetAppointmentResponse, VetAppointmentCreate,
-    VetConsultationResponse, VetConsultationCreate
+    VetConsultationResponse, VetConsultationCreate,
+    ConsultationQueueCreate, ConsultationQueueItemResponse,
+    AppointmentSlot
 )
-from datetime import datetime
+from app.core.config import settings
+from app.services.availability import availability_engine
+from app.services.appointment_list import appointment_list
+from app.services.consultation_queue import consultation_queue, normalize_pool
+from app.services.events_hub import events_hub
+from app.services.pet_timeline import InvalidCursor
+from datetime import date, datetime, timedelta
 
 router = APIRouter()
 
@@ -47,43 +55,127 @@ async def create_appointment(
             detail="Питомец не найден или не принадлежит вам"
         )
     
-    # Проверяем, что ветеринар существует и имеет роль ветеринара
-    vet = db.query(User).join(Profile).filter(
-        User.id == appointment_data.vet_id,
-        Profile.role == 2
-    ).first()
-    
-    if not vet:
+    # Записаться можно к ветеринару или в клинику партнера
+    role = availability_engine.provider_role(db, appointment_data.vet_id)
+    if role is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Ветеринар не найден"
         )
     
+    duration = availability_engine.service_duration(db, appointment_data.vet_id, appointment_data.service_id)
+    if duration is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Услуга не найдена"
+        )
+    
+    appointment_date = availability_engine.local_time(appointment_data.appointment_date)
+    # Проверка и вставка под блокировкой календаря: одновременные запросы не займут одно время
+    availability_engine.lock_calendar(db, appointment_data.vet_id)
+    error = availability_engine.booking_error(db, appointment_data.vet_id, role, appointment_date, duration)
+    if error:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=error
+        )
+    
     appointment = VetAppointment(
         vet_id=appointment_data.vet_id,
         pet_owner_id=current_user.id,
         pet_id=appointment_data.pet_id,
-        appointment_date=appointment_data.appointment_date,
+        appointment_date=appointment_date,
         reason=appointment_data.reason,
-        status="pending"
+        status="pending",
+        service_id=appointment_data.service_id,
+        duration_minutes=duration
     )
     
     db.add(appointment)
     db.commit()
     db.refresh(appointment)
+    events_hub.publish(
+        [appointment.vet_id], "appointment.created",
+        VetAppointmentResponse.model_validate(appointment).model_dump(mode="json")
+    )
     
     return appointment
 
 
+@router.get("/slots/", response_model=List[AppointmentSlot])
+async def get_free_slots(
+    vet_id: int,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    service_id: Optional[int] = None,
+    current_user: User = Depends(verify_owner_role),
+    db: Session = Depends(get_db)
+):
+    """
+    Свободное время ветеринара или клиники партнера (vet_id) с date_from по date_to.
+    
+    Для клиники длительность слота берется из услуги service_id, рабочие часы -
+    из графика клиники; для ветеринаров - стандартные часы приема.
+    """
+    role = availability_engine.provider_role(db, vet_id)
+    if role is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ветеринар не найден"
+        )
+    
+    duration = availability_engine.service_duration(db, vet_id, service_id)
+    if duration is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Услуга не найдена"
+        )
+    
+    date_from = date_from or date.today()
+    date_to = date_to or date_from + timedelta(days=6)
+    if date_to < date_from or (date_to - date_from).days >= settings.APPOINTMENT_SLOTS_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Период должен быть не длиннее {settings.APPOINTMENT_SLOTS_MAX_DAYS} дней"
+        )
+    
+    slots = availability_engine.free_slots(db, vet_id, role, date_from, date_to, duration)
+    return [AppointmentSlot(start=start, end=end) for start, end in slots]
+
+
 @router.get("/appointments/", response_model=List[VetAppointmentResponse])
 async def get_my_appointments(
+    response: Response,
+    status_filter: Optional[str] = None,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=appointment_list.MAX_LIMIT),
     current_user: User = Depends(verify_owner_role),
     db: Session = Depends(get_db)
 ):
-    """Получить список моих записей"""
-    appointments = db.query(VetAppointment).filter(
+    """
+    Получить список моих записей, от новых к старым.
+
+    from/to - период [from, to). С limit курсор следующей страницы
+    возвращается в заголовке X-Next-Cursor.
+    """
+    query = db.query(VetAppointment).filter(
         VetAppointment.pet_owner_id == current_user.id
-    ).order_by(VetAppointment.appointment_date.desc()).all()
+    )
+    try:
+        appointments, next_cursor = appointment_list.page(
+            query, descending=True, date_from=date_from, date_to=date_to,
+            status_filter=status_filter, cursor=cursor, limit=limit
+        )
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректный курсор"
+        )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return appointments
 
 
@@ -129,10 +221,73 @@ async def create_consultation(
     db.add(consultation)
     db.commit()
     db.refresh(consultation)
+    events_hub.publish(
+        [consultation.vet_id], "consultation.created",
+        VetConsultationResponse.model_validate(consultation).model_dump(mode="json")
+    )
     
     return consultation
 
 
+@router.post("/consultations/queue/", response_model=ConsultationQueueItemResponse, status_code=status.HTTP_201_CREATED)
+async def submit_consultation_to_queue(
+    queue_data: ConsultationQueueCreate,
+    current_user: User = Depends(verify_owner_role),
+    db: Session = Depends(get_db)
+):
+    """
+    Задать вопрос клинике и/или специалистам (специализации): ответит первый
+    свободный ветеринар пула. Ответ появится в списке консультаций.
+    """
+    pet = db.query(Pet).filter(
+        Pet.id == queue_data.pet_id,
+        Pet.user_id == current_user.id
+    ).first()
+    
+    if not pet:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Питомец не найден или не принадлежит вам"
+        )
+    
+    clinic = normalize_pool(queue_data.clinic)
+    specialization = normalize_pool(queue_data.specialization)
+    if clinic is None and specialization is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Укажите клинику или специализацию"
+        )
+    if queue_data.priority not in (0, 1, 2):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Приоритет: 0 - обычный, 1 - срочный, 2 - экстренный"
+        )
+    vet_ids = consultation_queue.pool_vet_ids(db, clinic, specialization)
+    if not vet_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Нет ветеринаров с такой клиникой или специализацией"
+        )
+    
+    item = consultation_queue.submit(db, current_user.id, queue_data.dict())
+    db.commit()
+    db.refresh(item)
+    events_hub.publish(vet_ids, "consultation_queue.updated", {"priority": item.priority, "due_at": item.due_at})
+    return item
+
+
+@router.get("/consultations/queue/", response_model=List[ConsultationQueueItemResponse])
+async def get_my_queued_consultations(
+    current_user: User = Depends(verify_owner_role),
+    db: Session = Depends(get_db)
+):
+    """Мои вопросы в очередях (ожидающие и забранные ветеринарами)"""
+    items = db.query(ConsultationQueueItem).filter(
+        ConsultationQueueItem.pet_owner_id == current_user.id
+    ).order_by(ConsultationQueueItem.created_at.desc()).all()
+    return items
+
+
 @router.get("/consultations/", response_model=List[VetConsultationResponse])
 async def get_my_consultations(
     current_user: User = Depends(verify_owner_role),
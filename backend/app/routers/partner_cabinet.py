@@ -1,9 +1,9 @@
 """
 Роутер для кабинета партнера
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.database import get_db
 from app.dependencies import get_current_user
 from app.models.user import User
@@ -14,12 +14,20 @@ from app.models.partner_cabinet import (
 )
 from app.schemas.partner_cabinet import (
     PartnerScheduleCreate, PartnerScheduleResponse,
+    PartnerScheduleWeek, PartnerScheduleWeekResponse,
     PartnerLocationCreate, PartnerLocationResponse,
     PartnerServiceCreate, PartnerServiceResponse,
     PartnerEmployeeCreate, PartnerEmployeeResponse,
     PartnerPromotionCreate, PartnerPromotionResponse,
-    ProductStatsResponse
+    ProductStatsResponse, PartnerNearbyResponse, PromotionFeedResponse
 )
+from app.core.config import settings
+from app.services.partner_geo import partner_geo
+from app.services.partner_hours import partner_hours, schedule_error, exception_error
+from app.services.promotion_feed import promotion_feed
+from app.services.view_counter import view_counter
+from app.services.effective_prices import effective_prices
+from app.services.pet_timeline import InvalidCursor
 from datetime import datetime, timedelta
 from sqlalchemy import func
 
@@ -65,6 +73,8 @@ async def create_schedule(
     if existing:
         for key, value in schedule_data.dict().items():
             setattr(existing, key, value)
+        db.flush()
+        partner_hours.rebuild(db, current_user.id)
         db.commit()
         db.refresh(existing)
         return existing
@@ -74,11 +84,62 @@ async def create_schedule(
             **schedule_data.dict()
         )
         db.add(schedule)
+        db.flush()
+        partner_hours.rebuild(db, current_user.id)
         db.commit()
         db.refresh(schedule)
         return schedule
 
 
+@router.get("/schedule/week", response_model=PartnerScheduleWeekResponse)
+async def get_schedule_week(
+    current_user: User = Depends(verify_partner_role),
+    db: Session = Depends(get_db)
+):
+    """График на неделю и предстоящие особые даты"""
+    return partner_hours.week(db, current_user.id, date_from=datetime.now().date())
+
+
+@router.put("/schedule/week", response_model=PartnerScheduleWeekResponse)
+async def set_schedule_week(
+    week_data: PartnerScheduleWeek,
+    current_user: User = Depends(verify_partner_role),
+    db: Session = Depends(get_db)
+):
+    """
+    Сохранить график на неделю и особые даты (праздники) одной транзакцией.
+
+    replace=true - график заменяется целиком, неуказанные дни и даты удаляются;
+    replace=false - указанные дни и даты добавляются или обновляются, остальные сохраняются.
+    """
+    days = [day.dict() for day in week_data.days]
+    exceptions = [exception.dict() for exception in week_data.exceptions]
+    for row in days + exceptions:
+        if row["is_closed"]:
+            row["open_time"] = row["close_time"] = None
+
+    # Пересечения проверяются по итоговой неделе с учетом несохраняемых дней
+    resulting = list(week_data.days)
+    if not week_data.replace:
+        given = {day["day_of_week"] for day in days}
+        resulting += [
+            schedule for schedule in db.query(PartnerSchedule).filter(
+                PartnerSchedule.partner_id == current_user.id
+            ).all()
+            if schedule.day_of_week not in given
+        ]
+    error = schedule_error(resulting) or exception_error(week_data.exceptions)
+    if error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error
+        )
+
+    partner_hours.save_week(db, current_user.id, days, exceptions, replace=week_data.replace)
+    db.commit()
+    return partner_hours.week(db, current_user.id, date_from=datetime.now().date())
+
+
 # Геолокация
 @router.get("/location", response_model=PartnerLocationResponse)
 async def get_location(
@@ -113,6 +174,7 @@ async def set_location(
     if location:
         for key, value in location_data.dict().items():
             setattr(location, key, value)
+        partner_geo.assign_cell(location)
         db.commit()
         db.refresh(location)
         return location
@@ -121,12 +183,46 @@ async def set_location(
             partner_id=current_user.id,
             **location_data.dict()
         )
+        partner_geo.assign_cell(location)
         db.add(location)
         db.commit()
         db.refresh(location)
         return location
 
 
+@router.get("/nearby", response_model=PartnerNearbyResponse)
+async def get_nearby_partners(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(3.0, gt=0),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    open_now: bool = Query(False),
+    open_at: Optional[datetime] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Клиники и магазины в радиусе radius_km от точки, от ближних к дальним (доступно без авторизации).
+
+    open_now - только открытые сейчас, open_at - открытые в указанное время (местное время клиник).
+    """
+    if radius_km > settings.PARTNER_NEARBY_MAX_RADIUS_KM:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Радиус поиска не больше {settings.PARTNER_NEARBY_MAX_RADIUS_KM} км"
+        )
+    if open_now and open_at is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Укажите либо open_now, либо open_at"
+        )
+    if open_at is not None:
+        open_at = open_at.astimezone().replace(tzinfo=None) if open_at.tzinfo is not None else open_at
+    elif open_now:
+        open_at = datetime.now()
+    return partner_geo.nearby(db, latitude, longitude, radius_km, limit=limit, offset=offset, open_at=open_at)
+
+
 # Услуги
 @router.get("/services", response_model=List[PartnerServiceResponse])
 async def get_services(
@@ -300,6 +396,75 @@ async def get_promotions(
     return promotions
 
 
+@router.get("/promotions/active", response_model=PromotionFeedResponse)
+async def get_active_promotions(
+    cursor: Optional[str] = None,
+    limit: int = Query(promotion_feed.DEFAULT_LIMIT, ge=1, le=promotion_feed.MAX_LIMIT),
+    partner_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Акции всех партнеров, действующие сейчас, от новых к старым (доступно без авторизации).
+    Следующая страница - cursor = next_cursor из ответа.
+    """
+    try:
+        return promotion_feed.page(db, cursor=cursor, limit=limit, partner_id=partner_id)
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректный курсор"
+        )
+
+
+@router.get("/promotions/{promotion_id}", response_model=PartnerPromotionResponse)
+async def view_promotion(
+    promotion_id: int,
+    db: Session = Depends(get_db)
+):
+    """Открыть акцию (доступно без авторизации); просмотр учитывается в views_count"""
+    promotion = db.query(PartnerPromotion).filter(
+        PartnerPromotion.id == promotion_id,
+        PartnerPromotion.is_active == True
+    ).first()
+    
+    if not promotion:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Акция не найдена"
+        )
+    
+    view_counter.hit("promotion", promotion.id)
+    response = PartnerPromotionResponse.model_validate(promotion)
+    # Вместе с просмотрами, еще не записанными в БД этим воркером
+    response.views_count = (promotion.views_count or 0) + view_counter.pending("promotion", promotion.id)
+    return response
+
+
+def _check_promotion(db: Session, partner_id: int, promotion_data: PartnerPromotionCreate):
+    """Скидка 1-100%, товар и услуга акции - только собственные партнера"""
+    if promotion_data.discount_percent is not None and not 1 <= promotion_data.discount_percent <= 100:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Скидка должна быть от 1 до 100%"
+        )
+    if promotion_data.product_id is not None and not db.query(RefShop.id).filter(
+        RefShop.id == promotion_data.product_id,
+        RefShop.user_id == partner_id
+    ).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Товар не найден"
+        )
+    if promotion_data.service_id is not None and not db.query(PartnerService.id).filter(
+        PartnerService.id == promotion_data.service_id,
+        PartnerService.partner_id == partner_id
+    ).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Услуга не найдена"
+        )
+
+
 @router.post("/promotions", response_model=PartnerPromotionResponse, status_code=status.HTTP_201_CREATED)
 async def create_promotion(
     promotion_data: PartnerPromotionCreate,
@@ -307,13 +472,17 @@ async def create_promotion(
     db: Session = Depends(get_db)
 ):
     """Создать акцию"""
+    _check_promotion(db, current_user.id, promotion_data)
     promotion = PartnerPromotion(
         partner_id=current_user.id,
         **promotion_data.dict()
     )
     db.add(promotion)
+    db.flush()
+    effective_prices.recompute(db, [promotion.product_id])
     db.commit()
     db.refresh(promotion)
+    promotion_feed.invalidate()
     return promotion
 
 
@@ -336,11 +505,16 @@ async def update_promotion(
             detail="Акция не найдена"
         )
     
+    _check_promotion(db, current_user.id, promotion_data)
+    previous_product_id = promotion.product_id
     for key, value in promotion_data.dict().items():
         setattr(promotion, key, value)
     
+    db.flush()
+    effective_prices.recompute(db, [previous_product_id, promotion.product_id])
     db.commit()
     db.refresh(promotion)
+    promotion_feed.invalidate()
     return promotion
 
 
@@ -363,7 +537,10 @@ async def delete_promotion(
         )
     
     db.delete(promotion)
+    db.flush()
+    effective_prices.recompute(db, [promotion.product_id])
     db.commit()
+    promotion_feed.invalidate()
     return None
 
 
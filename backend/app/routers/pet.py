@@ -1,11 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 from app.database import get_db
 from app.models.pet import Pet
 from app.models.user import User
-from app.schemas.pet import PetCreate, PetResponse, PetUpdate
+from app.models.reminder import Reminder
+from app.models.vaccination import VaccinationReminderLog
+from app.models.vital import PetVital
+from app.schemas.pet import (
+    PetCreate, PetResponse, PetUpdate, VaccinationScheduleItem, PetTimelineResponse,
+    PetVitalCreate, PetVitalResponse, PetVitalHistoryResponse
+)
 from app.dependencies import get_current_user
+from app.services.vaccination_engine import vaccination_engine
+from app.services.pet_timeline import pet_timeline_service, InvalidCursor
+from app.services.vitals_service import vitals_service, VITAL_KINDS
 
 router = APIRouter()
 
@@ -71,6 +81,11 @@ async def update_pet(
         )
     
     update_data = pet_data.model_dump(exclude_unset=True, exclude={"user"})  # Игнорируем user
+    
+    # Новый вес сохраняется и в истории измерений
+    new_weight = update_data.get("weight")
+    if new_weight is not None and new_weight != db_pet.weight and vitals_service.validate("weight", new_weight) is None:
+        vitals_service.record(db, db_pet, "weight", new_weight, created_by=current_user.id)
     for field, value in update_data.items():
         if field == "species" and value is not None:
             setattr(db_pet, "species", value)
@@ -103,8 +118,146 @@ async def delete_pet(
             detail="Нет доступа к этому питомцу"
         )
     
+    # Журнал напоминаний о прививках (в SQLite внешние ключи не каскадируются)
+    db.query(VaccinationReminderLog).filter(VaccinationReminderLog.pet_id == pet_id).delete(synchronize_session=False)
+    db.query(Reminder).filter(Reminder.pet_id == pet_id).update({"pet_id": None}, synchronize_session=False)
+    db.query(PetVital).filter(PetVital.pet_id == pet_id).delete(synchronize_session=False)
     db.delete(db_pet)
     db.commit()
     
     return None
 
+
+def _get_owned_pet(db: Session, pet_id: int, current_user: User) -> Pet:
+    """Питомец текущего пользователя или 404/403"""
+    db_pet = db.query(Pet).filter(Pet.id == pet_id).first()
+    
+    if not db_pet:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Питомец не найден"
+        )
+    
+    if db_pet.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Нет доступа к этому питомцу"
+        )
+    return db_pet
+
+
+@router.get("/{pet_id}/vaccinations/", response_model=List[VaccinationScheduleItem])
+async def get_pet_vaccinations(
+    pet_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """График прививок питомца по правилам вакцинации: просроченные, ближайшие и плановые"""
+    db_pet = _get_owned_pet(db, pet_id, current_user)
+    return vaccination_engine.pet_schedule(db, db_pet)
+
+
+@router.get("/{pet_id}/timeline/", response_model=PetTimelineResponse)
+async def get_pet_timeline(
+    pet_id: int,
+    cursor: Optional[str] = None,
+    limit: int = pet_timeline_service.DEFAULT_LIMIT,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Лента событий питомца: записи к ветеринару, консультации и напоминания
+    от новых к старым. Следующая страница - cursor = next_cursor из ответа.
+    """
+    db_pet = _get_owned_pet(db, pet_id, current_user)
+    try:
+        return pet_timeline_service.page(db, db_pet, cursor=cursor, limit=limit)
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректный курсор"
+        )
+
+
+@router.post("/{pet_id}/vitals/", response_model=PetVitalResponse, status_code=status.HTTP_201_CREATED)
+async def create_pet_vital(
+    pet_id: int,
+    vital_data: PetVitalCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Добавить измерение веса, температуры, пульса или частоты дыхания"""
+    db_pet = _get_owned_pet(db, pet_id, current_user)
+    
+    error = vitals_service.validate(vital_data.kind, vital_data.value)
+    if error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error
+        )
+    
+    vital = vitals_service.record(
+        db, db_pet, vital_data.kind, vital_data.value,
+        measured_at=vital_data.measured_at,
+        note=vital_data.note,
+        created_by=current_user.id
+    )
+    db.commit()
+    db.refresh(vital)
+    return vital
+
+
+@router.get("/{pet_id}/vitals/", response_model=PetVitalHistoryResponse)
+async def get_pet_vitals_history(
+    pet_id: int,
+    kind: str = "weight",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    points: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    История показателя за период для графика.
+    
+    Если измерений больше points, период делится на points равных интервалов
+    и для каждого возвращаются min/max/mean.
+    """
+    db_pet = _get_owned_pet(db, pet_id, current_user)
+    
+    if kind not in VITAL_KINDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Неизвестный показатель. Допустимые: {', '.join(VITAL_KINDS)}"
+        )
+    
+    return vitals_service.history(db, db_pet, kind, start=start, end=end, max_points=points)
+
+
+@router.delete("/{pet_id}/vitals/{vital_id}/", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_pet_vital(
+    pet_id: int,
+    vital_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Удалить ошибочное измерение"""
+    db_pet = _get_owned_pet(db, pet_id, current_user)
+    
+    vital = db.query(PetVital).filter(PetVital.id == vital_id, PetVital.pet_id == pet_id).first()
+    if not vital:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Измерение не найдено"
+        )
+    
+    db.delete(vital)
+    if vital.kind == "weight":
+        # Вес питомца - последнее оставшееся измерение
+        db.flush()
+        db_pet.weight = db.query(PetVital.value).filter(
+            PetVital.pet_id == pet_id,
+            PetVital.kind == "weight"
+        ).order_by(PetVital.measured_at.desc()).limit(1).scalar()
+    db.commit()
+    return None
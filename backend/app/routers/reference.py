@@ -11,6 +11,7 @@ from app.schemas.product_category import (
     ProductCategoryResponse, ProductSubcategoryResponse
 )
 from app.dependencies import get_current_user
+from app.services.effective_prices import effective_prices
 
 router = APIRouter()
 
@@ -23,10 +24,23 @@ async def get_animal_types(db: Session = Depends(get_db)):
 
 @router.get("/ref_shop/", response_model=List[RefShopResponse])
 async def get_products(
+    sort: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    # Показываем все активные товары
-    products = db.query(RefShop).filter(RefShop.is_active == True).all()
+    """
+    Активные товары. sort=price / sort=-price - по цене со скидкой
+    по возрастанию / убыванию (товары без цены в конце).
+    """
+    query = db.query(RefShop).filter(RefShop.is_active == True)
+    if sort in ("price", "-price"):
+        price_order = RefShop.effective_price.asc() if sort == "price" else RefShop.effective_price.desc()
+        query = query.order_by(RefShop.effective_price.is_(None), price_order, RefShop.id)
+    elif sort is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Допустимые значения sort: price, -price"
+        )
+    products = query.all()
     return products
 
 
@@ -68,6 +82,8 @@ async def create_product(
         stock_quantity=product_data.stock_quantity
     )
     db.add(db_product)
+    db.flush()
+    effective_prices.recompute(db, [db_product.id])
     db.commit()
     db.refresh(db_product)
     
@@ -115,6 +131,8 @@ async def update_product(
     product.price = product_data.price
     product.stock_quantity = product_data.stock_quantity
     
+    db.flush()
+    effective_prices.recompute(db, [product.id])
     db.commit()
     db.refresh(product)
     return product
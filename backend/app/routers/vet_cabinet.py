@@ -1,9 +1,9 @@
 """
 Роутер для кабинета ветеринара
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.database import get_db
 from app.dependencies import get_current_user
 from app.models.user import User, Profile
@@ -13,8 +13,16 @@ from app.models.vet_cabinet import VetAppointment, VetConsultation, VetArticle
 from app.schemas.vet_cabinet import (
     VetAppointmentResponse, VetAppointmentCreate, VetAppointmentUpdate,
     VetConsultationResponse, VetConsultationCreate, VetConsultationAnswer,
-    VetArticleResponse, VetArticleCreate, PetCardSummary, VeterinarianPublic
+    VetArticleResponse, VetArticleCreate, PetCardSummary, VeterinarianPublic,
+    ConsultationQueueSummary
 )
+from app.services.faq_engine import faq_engine
+from app.services.view_counter import view_counter
+from app.services.appointment_list import appointment_list
+from app.services.consultation_queue import consultation_queue
+from app.services.events_hub import events_hub
+from app.services.vet_directory import vet_directory
+from app.services.pet_timeline import InvalidCursor
 from datetime import datetime
 
 router = APIRouter()
@@ -22,36 +30,31 @@ router = APIRouter()
 
 @router.get("/list", response_model=List[VeterinarianPublic])
 async def get_veterinarians(
+    request: Request,
+    response: Response,
+    city: Optional[str] = None,
+    specialization: Optional[str] = None,
+    clinic: Optional[str] = None,
+    limit: int = Query(vet_directory.DEFAULT_LIMIT, ge=1, le=vet_directory.MAX_LIMIT),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db)
 ):
-    """Получить список всех ветеринаров (публичный endpoint)"""
-    veterinarians = db.query(User).join(Profile).filter(
-        Profile.role == 2,
-        User.is_active == True
-    ).all()
-    
-    result = []
-    for vet in veterinarians:
-        if vet.profile:
-            result.append(VeterinarianPublic(
-                id=vet.id,
-                username=vet.username,
-                email=vet.email,
-                first_name=vet.profile.first_name,
-                last_name=vet.profile.last_name,
-                third_name=vet.profile.third_name,
-                phone=vet.profile.phone,
-                clinic=vet.profile.clinic,
-                position=vet.profile.position,
-                specialization=vet.profile.specialization,
-                experience=vet.profile.experience,
-                license_number=vet.profile.license_number,
-                city=vet.profile.city,
-                address=vet.profile.address,
-                description=vet.profile.description
-            ))
+    """
+    Справочник ветеринаров (публичный endpoint). Фильтры city, specialization,
+    clinic - по вхождению без учета регистра; страница - limit (по умолчанию 20,
+    не больше 100) и offset, всего найдено - в заголовке X-Total-Count.
+    С If-None-Match и неизменившимся справочником возвращается 304.
+    """
+    vets, total, etag = vet_directory.page(
+        db, city=city, specialization=specialization, clinic=clinic, limit=limit, offset=offset
+    )
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
     
-    return result
+    response.headers.update(headers)
+    response.headers["X-Total-Count"] = str(total)
+    return vets
 
 
 def verify_vet_role(current_user: User = Depends(get_current_user)):
@@ -106,19 +109,37 @@ async def get_patients(
 
 @router.get("/appointments", response_model=List[VetAppointmentResponse])
 async def get_appointments(
+    response: Response,
     status_filter: str = None,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=appointment_list.MAX_LIMIT),
     current_user: User = Depends(verify_vet_role),
     db: Session = Depends(get_db)
 ):
-    """Получить список записей к ветеринару"""
+    """
+    Получить список записей к ветеринару по возрастанию даты.
+
+    from/to - период [from, to) (например, видимая неделя календаря).
+    С limit курсор следующей страницы возвращается в заголовке X-Next-Cursor.
+    """
     query = db.query(VetAppointment).filter(
         VetAppointment.vet_id == current_user.id
     )
     
-    if status_filter:
-        query = query.filter(VetAppointment.status == status_filter)
-    
-    appointments = query.order_by(VetAppointment.appointment_date).all()
+    try:
+        appointments, next_cursor = appointment_list.page(
+            query, date_from=date_from, date_to=date_to, status_filter=status_filter,
+            cursor=cursor, limit=limit
+        )
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректный курсор"
+        )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return appointments
 
 
@@ -149,6 +170,10 @@ async def update_appointment(
     
     db.commit()
     db.refresh(appointment)
+    events_hub.publish(
+        [appointment.pet_owner_id], "appointment.updated",
+        VetAppointmentResponse.model_validate(appointment).model_dump(mode="json")
+    )
     
     return appointment
 
@@ -171,6 +196,66 @@ async def get_consultations(
     return consultations
 
 
+@router.get("/consultations/queue", response_model=ConsultationQueueSummary)
+async def get_consultation_queue(
+    current_user: User = Depends(verify_vet_role),
+    db: Session = Depends(get_db)
+):
+    """Сколько вопросов ждет в очередях клиники и специализации ветеринара"""
+    return consultation_queue.summary(db, current_user)
+
+
+@router.post("/consultations/claim", response_model=VetConsultationResponse)
+async def claim_consultation(
+    current_user: User = Depends(verify_vet_role),
+    db: Session = Depends(get_db)
+):
+    """
+    Забрать следующий вопрос из очереди (выше приоритет, раньше срок ответа).
+    Вопрос становится консультацией этого ветеринара, другим он не выдается.
+    """
+    consultation = consultation_queue.claim(db, current_user)
+    if consultation is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="В очереди нет вопросов"
+        )
+    db.refresh(consultation)
+    events_hub.publish(
+        [consultation.pet_owner_id], "consultation.claimed",
+        VetConsultationResponse.model_validate(consultation).model_dump(mode="json")
+    )
+    return consultation
+
+
+@router.post("/consultations/{consultation_id}/release", status_code=status.HTTP_204_NO_CONTENT)
+async def release_consultation(
+    consultation_id: int,
+    current_user: User = Depends(verify_vet_role),
+    db: Session = Depends(get_db)
+):
+    """Вернуть забранный и еще не отвеченный вопрос в очередь"""
+    consultation = db.query(VetConsultation).filter(
+        VetConsultation.id == consultation_id,
+        VetConsultation.vet_id == current_user.id,
+        VetConsultation.status == "pending"
+    ).first()
+    
+    item = consultation_queue.release(db, current_user.id, consultation) if consultation else None
+    if item is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Консультация из очереди не найдена"
+        )
+    
+    db.commit()
+    events_hub.publish(
+        consultation_queue.pool_vet_ids(db, item.pool_clinic, item.pool_specialization),
+        "consultation_queue.updated", {"priority": item.priority, "due_at": item.due_at}
+    )
+    return None
+
+
 @router.post("/consultations/{consultation_id}/answer", response_model=VetConsultationResponse)
 async def answer_consultation(
     consultation_id: int,
@@ -193,9 +278,14 @@ async def answer_consultation(
     consultation.answer = answer_data.answer
     consultation.status = "answered"
     consultation.answered_at = datetime.utcnow()
+    consultation_queue.mark_answered(db, consultation.id)
     
     db.commit()
     db.refresh(consultation)
+    events_hub.publish(
+        [consultation.pet_owner_id], "consultation.answered",
+        VetConsultationResponse.model_validate(consultation).model_dump(mode="json")
+    )
     
     return consultation
 
@@ -212,6 +302,30 @@ async def get_my_articles(
     return articles
 
 
+@router.get("/articles/{article_id}", response_model=VetArticleResponse)
+async def view_article(
+    article_id: int,
+    db: Session = Depends(get_db)
+):
+    """Открыть опубликованную статью (публичный endpoint); просмотр учитывается в views_count"""
+    article = db.query(VetArticle).filter(
+        VetArticle.id == article_id,
+        VetArticle.is_published == True
+    ).first()
+    
+    if not article:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Статья не найдена"
+        )
+    
+    view_counter.hit("article", article.id)
+    response = VetArticleResponse.model_validate(article)
+    # Вместе с просмотрами, еще не записанными в БД этим воркером
+    response.views_count = (article.views_count or 0) + view_counter.pending("article", article.id)
+    return response
+
+
 @router.post("/articles", response_model=VetArticleResponse, status_code=status.HTTP_201_CREATED)
 async def create_article(
     article_data: VetArticleCreate,
@@ -230,6 +344,8 @@ async def create_article(
     db.add(article)
     db.commit()
     db.refresh(article)
+    # Статьи входят в индекс AI ассистента
+    faq_engine.invalidate()
     
     return article
 
@@ -261,6 +377,7 @@ async def update_article(
     
     db.commit()
     db.refresh(article)
+    faq_engine.invalidate()
     
     return article
 
@@ -285,6 +402,7 @@ async def delete_article(
     
     db.delete(article)
     db.commit()
+    faq_engine.invalidate()
     
     return None
 
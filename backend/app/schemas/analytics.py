@@ -0,0 +1,59 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+
+class DistributionSummary(BaseModel):
+    count: int
+    mean: Optional[float] = None
+    p10: Optional[float] = None
+    p25: Optional[float] = None
+    p50: Optional[float] = None
+    p75: Optional[float] = None
+    p90: Optional[float] = None
+
+
+class Histogram(BaseModel):
+    bin_edges: List[float]
+    counts: List[int]
+
+
+class AgeBandStats(BaseModel):
+    band: str
+    count: int
+    weight: DistributionSummary
+
+
+class SpeciesStats(BaseModel):
+    species_id: int
+    species: str
+    count: int
+    age: DistributionSummary  # Возраст в годах
+    weight: DistributionSummary  # Вес в кг
+    weight_histogram: Histogram
+    age_bands: List[AgeBandStats]
+
+
+class OverdueSpeciesStats(BaseModel):
+    species_id: int
+    species: str
+    pets: int
+
+
+class OverdueStats(BaseModel):
+    vaccination_pets: int  # Питомцы хотя бы с одной просроченной прививкой
+    vaccination_doses: int
+    vaccination_pets_by_species: List[OverdueSpeciesStats]
+    reminders: int  # Невыполненные напоминания с прошедшей датой
+    reminder_owners: int
+
+
+class PopulationAnalyticsResponse(BaseModel):
+    generated_at: datetime
+    total_pets: int
+    pets_with_birth_date: int
+    pets_with_weight: int
+    age_bands: List[str]
+    species: List[SpeciesStats]
+    overdue: OverdueStats
+    compute_ms: float
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional, List
+from datetime import datetime
 
 
 class ChatMessage(BaseModel):
@@ -9,10 +10,38 @@ class ChatMessage(BaseModel):
 
 class ChatRequest(BaseModel):
     message: str
+    conversation_id: Optional[int] = None  # ID диалога, хранящегося на сервере
+    # Устарело: история нужна только клиентам, которые еще не передают conversation_id
     conversation_history: Optional[List[ChatMessage]] = None
 
 
 class ChatResponse(BaseModel):
     response: str
     reminder_suggestion: Optional[dict] = None
+    conversation_id: Optional[int] = None
+    # Оценка размера промпта в токенах (0 - ответ из FAQ без обращения к модели)
+    prompt_tokens: Optional[int] = None
 
+
+class ConversationMessageResponse(BaseModel):
+    id: int
+    text: str
+    sender: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ConversationResponse(BaseModel):
+    id: int
+    title: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ConversationDetailResponse(ConversationResponse):
+    messages: List[ConversationMessageResponse] = []
@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import date, datetime
+
+
+class NotificationResponse(BaseModel):
+    id: int
+    reminder_id: Optional[int] = None
+    due_date: Optional[date] = None
+    channel: str
+    title: str
+    body: Optional[str] = None
+    status: str
+    created_at: datetime
+    sent_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
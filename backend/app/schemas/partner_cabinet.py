@@ -25,6 +25,39 @@ class PartnerScheduleResponse(PartnerScheduleBase):
         from_attributes = True
 
 
+class PartnerScheduleExceptionBase(BaseModel):
+    exception_date: date
+    open_time: Optional[time] = None
+    close_time: Optional[time] = None
+    is_closed: bool = True
+    note: Optional[str] = None
+
+
+class PartnerScheduleExceptionCreate(PartnerScheduleExceptionBase):
+    pass
+
+
+class PartnerScheduleExceptionResponse(PartnerScheduleExceptionBase):
+    id: int
+    partner_id: int
+    
+    class Config:
+        from_attributes = True
+
+
+class PartnerScheduleWeek(BaseModel):
+    """График на неделю одним запросом"""
+    days: List[PartnerScheduleCreate] = []
+    exceptions: List[PartnerScheduleExceptionCreate] = []
+    # True - неуказанные дни и исключения удаляются, False - сохраняются
+    replace: bool = True
+
+
+class PartnerScheduleWeekResponse(BaseModel):
+    days: List[PartnerScheduleResponse]
+    exceptions: List[PartnerScheduleExceptionResponse]
+
+
 class PartnerLocationBase(BaseModel):
     latitude: float
     longitude: float
@@ -114,6 +147,39 @@ class PartnerPromotionResponse(PartnerPromotionBase):
         from_attributes = True
 
 
+class PromotionFeedProduct(BaseModel):
+    id: int
+    name_ru: str
+    img_url: Optional[str] = None
+    price: Optional[str] = None
+
+
+class PromotionFeedService(BaseModel):
+    id: int
+    name_ru: str
+    price: Optional[float] = None
+    duration_minutes: Optional[int] = None
+
+
+class PromotionFeedItem(BaseModel):
+    """Действующая акция в общей ленте"""
+    id: int
+    partner_id: int
+    partner_name: Optional[str] = None
+    title: str
+    description: Optional[str] = None
+    discount_percent: Optional[int] = None
+    start_date: datetime
+    end_date: datetime
+    product: Optional[PromotionFeedProduct] = None
+    service: Optional[PromotionFeedService] = None
+
+
+class PromotionFeedResponse(BaseModel):
+    items: List[PromotionFeedItem]
+    next_cursor: Optional[str] = None
+
+
 class ProductStatsResponse(BaseModel):
     """Статистика просмотров товара"""
     product_id: int
@@ -123,3 +189,20 @@ class ProductStatsResponse(BaseModel):
     views_this_week: int
     views_this_month: int
 
+
+
+class PartnerNearbyItem(BaseModel):
+    """Партнер рядом с точкой поиска"""
+    partner_id: int
+    name: Optional[str] = None
+    type: Optional[str] = None
+    phone: Optional[str] = None
+    address: Optional[str] = None
+    latitude: float
+    longitude: float
+    distance_km: float
+
+
+class PartnerNearbyResponse(BaseModel):
+    total: int  # Всего партнеров в радиусе
+    items: List[PartnerNearbyItem]
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
-from typing import Optional
-from datetime import date
+from typing import List, Optional
+from datetime import date, datetime
 
 
 class PetBase(BaseModel):
@@ -40,3 +40,64 @@ class PetUpdate(BaseModel):
     special_notes: Optional[str] = None
     user: Optional[int] = None  # Фронтенд отправляет user, но мы его игнорируем
 
+
+
+class VaccinationScheduleItem(BaseModel):
+    rule_id: int
+    code: str
+    vaccine: str
+    dose_number: int
+    booster: bool  # True - ревакцинация после первичного курса
+    due_date: date
+    status: str  # done, overdue, missed, due, planned
+    reminder_created: bool
+
+
+class PetTimelineItem(BaseModel):
+    kind: str  # appointment, consultation, reminder
+    id: int
+    event_at: datetime
+    title: Optional[str] = None  # Причина визита, вопрос или текст напоминания
+    status: Optional[str] = None
+    details: Optional[str] = None  # Заметки ветеринара или ответ на консультацию
+    vet_id: Optional[int] = None
+
+
+class PetTimelineResponse(BaseModel):
+    items: List[PetTimelineItem]
+    next_cursor: Optional[str] = None  # None - больше событий нет
+
+
+class PetVitalCreate(BaseModel):
+    kind: str  # weight, temperature, heart_rate, respiratory_rate
+    value: float
+    measured_at: Optional[datetime] = None  # По умолчанию - текущее время
+    note: Optional[str] = None
+
+
+class PetVitalResponse(BaseModel):
+    id: int
+    kind: str
+    value: float
+    measured_at: datetime
+    note: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class PetVitalPoint(BaseModel):
+    start: datetime
+    end: datetime
+    count: int  # 1 - отдельное измерение, больше - агрегат интервала
+    min: float
+    max: float
+    mean: float
+
+
+class PetVitalHistoryResponse(BaseModel):
+    kind: str
+    unit: str
+    total: int  # Измерений за период
+    downsampled: bool
+    points: List[PetVitalPoint]
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field, model_validator
 from typing import Optional, Any
+from datetime import datetime
 
 
 class TypeOfAnimalResponse(BaseModel):
@@ -30,6 +31,10 @@ class RefShopCreate(RefShopBase):
 class RefShopResponse(RefShopBase):
     id: int
     user: Optional[int] = None
+    # Цена с учетом лучшей действующей акции на товар
+    effective_price: Optional[float] = None
+    discount_percent: Optional[int] = None
+    discount_ends_at: Optional[datetime] = None
     subcategory: Optional[dict] = None  # Информация о подкатегории
 
     @model_validator(mode='before')
@@ -50,7 +55,8 @@ class RefShopResponse(RefShopBase):
         elif hasattr(data, 'user_id'):
             # Для SQLAlchemy объектов
             result = {
-                **{k: getattr(data, k) for k in ['id', 'name_ru', 'name_kg', 'is_active', 'img_url', 'description', 'subcategory_id', 'price', 'stock_quantity']},
+                **{k: getattr(data, k) for k in ['id', 'name_ru', 'name_kg', 'is_active', 'img_url', 'description', 'subcategory_id', 'price', 'stock_quantity',
+                                                 'effective_price', 'discount_percent', 'discount_ends_at']},
                 'user': getattr(data, 'user_id', None)
             }
             # Добавляем информацию о подкатегории
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import date
 
 
@@ -15,6 +15,7 @@ class ReminderCreate(BaseModel):
     date_assistant: date
     status: bool = True
     animal_name: Optional[str] = ""
+    pet_id: Optional[int] = None  # Если указан и animal_name пустое, берется имя питомца
 
 
 class ReminderUpdate(BaseModel):
@@ -30,7 +31,37 @@ class ReminderResponse(BaseModel):
     assistant_sms: str
     date_assistant: date
     status: bool
+    pet_id: Optional[int] = None
 
     class Config:
         from_attributes = True
 
+
+
+class ReminderBulkCreate(BaseModel):
+    items: List[ReminderCreate]
+
+
+class ReminderBulkUpdateItem(ReminderUpdate):
+    id: int
+
+
+class ReminderBulkUpdate(BaseModel):
+    items: List[ReminderBulkUpdateItem]
+
+
+class ReminderBulkComplete(BaseModel):
+    ids: List[int]
+
+
+class ReminderBulkItemResult(BaseModel):
+    index: int  # Позиция элемента в запросе
+    id: Optional[int] = None
+    result: str  # created, duplicate, updated, completed, not_found
+    detail: Optional[str] = None
+    reminder: Optional[ReminderResponse] = None
+
+
+class ReminderBulkResponse(BaseModel):
+    processed: int  # Сколько элементов создано или изменено
+    results: List[ReminderBulkItemResult]
@@ -14,7 +14,8 @@ class VetAppointmentBase(BaseModel):
 
 
 class VetAppointmentCreate(VetAppointmentBase):
-    vet_id: int
+    vet_id: int  # Ветеринар или клиника партнера
+    service_id: Optional[int] = None  # Услуга клиники: длительность записи берется из нее
 
 
 class VetAppointmentResponse(VetAppointmentBase):
@@ -23,11 +24,18 @@ class VetAppointmentResponse(VetAppointmentBase):
     pet_owner_id: int
     status: str
     created_at: datetime
+    service_id: Optional[int] = None
+    duration_minutes: Optional[int] = None
     
     class Config:
         from_attributes = True
 
 
+class AppointmentSlot(BaseModel):
+    start: datetime
+    end: datetime
+
+
 class VetAppointmentUpdate(BaseModel):
     """Обновление записи ветеринаром"""
     status: Optional[str] = None  # pending, confirmed, completed, cancelled
@@ -56,6 +64,37 @@ class VetConsultationResponse(VetConsultationBase):
         from_attributes = True
 
 
+class ConsultationQueueCreate(VetConsultationBase):
+    """Вопрос в очередь клиники и/или специализации"""
+    clinic: Optional[str] = None
+    specialization: Optional[str] = None
+    priority: int = 0  # 0 - обычный, 1 - срочный, 2 - экстренный
+
+
+class ConsultationQueueItemResponse(VetConsultationBase):
+    id: int
+    pet_owner_id: int
+    pool_clinic: Optional[str] = None
+    pool_specialization: Optional[str] = None
+    priority: int
+    due_at: datetime
+    status: str
+    claimed_by: Optional[int] = None
+    claimed_at: Optional[datetime] = None
+    consultation_id: Optional[int] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class ConsultationQueueSummary(BaseModel):
+    """Очередь, доступная ветеринару, без выдачи самих вопросов"""
+    queued: int
+    overdue: int
+    next_due_at: Optional[datetime] = None
+
+
 class VetConsultationAnswer(BaseModel):
     answer: str
 
@@ -100,19 +139,16 @@ class PetCardSummary(BaseModel):
 
 
 class VeterinarianPublic(BaseModel):
-    """Публичная информация о ветеринаре"""
+    """Публичная информация о ветеринаре (без контактов и номера лицензии)"""
     id: int
     username: str
-    email: str
     first_name: Optional[str] = None
     last_name: Optional[str] = None
     third_name: Optional[str] = None
-    phone: Optional[str] = None
     clinic: Optional[str] = None
     position: Optional[str] = None
     specialization: Optional[str] = None
     experience: Optional[str] = None  # Может быть строкой или числом
-    license_number: Optional[str] = None
     city: Optional[str] = None
     address: Optional[str] = None
     description: Optional[str] = None
@@ -3,59 +3,358 @@
 """
 try:
     import ollama
+    import httpx
     OLLAMA_AVAILABLE = True
 except ImportError:
     OLLAMA_AVAILABLE = False
     ollama = None
+    httpx = None
 
-from typing import List, Dict, Optional, Any
+import asyncio
+import time
+from contextlib import aclosing
+from datetime import datetime
+from typing import List, Dict, Optional, Any, AsyncIterator
+from app.core.config import settings
+from app.core.metrics import metrics
 from app.models.pet import Pet
 from app.models.user import User
 from app.services.pet_tools import PetTools
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.faq_engine import faq_engine
+from app.services.prompt_budget import ContextSection, compact_sections
+from app.services.tokens import estimate_tokens, truncate_to_tokens
 
 
 class AIService:
     """Сервис для взаимодействия с AI моделью llama3.2"""
     
-    def __init__(self, model_name: str = "llama3.2:1b"):
+    # Служебные токены шаблона чата на каждое сообщение (роль, разделители)
+    MESSAGE_TOKEN_OVERHEAD = 4
+    
+    def __init__(self, model_name: str = settings.AI_MODEL_NAME):
+        # Конструктор не обращается к сети: список моделей загружается
+        # фоновой задачей после старта приложения (см. start_background_tasks)
         self.model_name = model_name
+        # Модели, которые пробуем по порядку, если модель по умолчанию не установлена
+        self.model_alternatives = [
+            m.strip() for m in settings.AI_MODEL_ALTERNATIVES.split(",") if m.strip()
+        ]
         self.system_prompt = self._get_system_prompt()
-        self._check_model_availability()
+        self._client = ollama.AsyncClient(
+            host=settings.OLLAMA_HOST,
+            timeout=httpx.Timeout(
+                settings.AI_REQUEST_TIMEOUT_SECONDS,
+                connect=settings.AI_CONNECT_TIMEOUT_SECONDS
+            )
+        ) if OLLAMA_AVAILABLE else None
+        # При недоступности Ollama запросы сразу получают fallback-ответ, не дожидаясь таймаута
+        self.breaker = CircuitBreaker(
+            "ollama",
+            failure_threshold=settings.AI_BREAKER_FAILURE_THRESHOLD,
+            base_backoff_seconds=settings.AI_BREAKER_BASE_BACKOFF_SECONDS,
+            max_backoff_seconds=settings.AI_BREAKER_MAX_BACKOFF_SECONDS
+        )
+        metrics.describe("vetcard_ai_requests_total", "Запросы к модели по результату")
+        metrics.describe("vetcard_ai_prompt_tokens", "Оценка размера промпта в токенах")
+        metrics.describe("vetcard_ai_prompt_compactions_total", "Сжатые и удаленные части промпта по разделам")
+        self._tasks: List[asyncio.Task] = []
+        # Устанавливается после первой попытки прогрева модели (успешной или нет)
+        self._ready = asyncio.Event()
+        self._warmup: Dict[str, Any] = {
+            "warmed_up": False,
+            "warmed_at": None,
+            "load_ms": None,
+            "error": None,
+        }
+        self._health: Dict[str, Any] = {
+            "checked_at": None,
+            "reachable": False,
+            "available_models": [],
+            "latency_ms": None,
+            "error": None,
+        }
     
-    def _check_model_availability(self):
-        """Проверяет доступность модели и пытается найти альтернативу"""
+    def start_background_tasks(self):
+        """Запускает фоновые проверку Ollama, прогрев модели и обновление индекса FAQ (вызывается при старте приложения)"""
+        if self._tasks:
+            return
+        if settings.AI_FAQ_ENABLED:
+            # Индекс FAQ и статей нужен и без Ollama: по нему строятся fallback-ответы
+            self._tasks.append(asyncio.create_task(faq_engine.refresh_loop()))
         if not OLLAMA_AVAILABLE:
+            self._ready.set()
             return
-        
+        self._tasks.append(asyncio.create_task(self._probe_loop()))
+        if settings.AI_WARMUP_ENABLED and settings.AI_KEEP_ALIVE_PING_INTERVAL_SECONDS > 0:
+            self._tasks.append(asyncio.create_task(self._keep_alive_loop()))
+    
+    async def stop_background_tasks(self):
+        """Останавливает фоновые задачи сервиса"""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+    
+    async def wait_until_ready(self, timeout: float) -> bool:
+        """Ждет первой проверки Ollama и прогрева модели, но не дольше timeout секунд"""
         try:
-            # Пытаемся найти доступную модель
-            models_response = ollama.list()
-            # ollama.list() возвращает объект с атрибутом models (список объектов Model)
-            available_models = [m.model for m in models_response.models] if hasattr(models_response, 'models') else []
+            await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        return self._warmup["warmed_up"]
+    
+    async def _probe_loop(self):
+        """Периодически обновляет список моделей и состояние Ollama, прогревает модель"""
+        while True:
+            await self.probe()
+            if settings.AI_WARMUP_ENABLED and self._health["reachable"] and not self._warmup["warmed_up"]:
+                await self.warm_up()
+            self._ready.set()
+            await asyncio.sleep(settings.AI_HEALTH_PROBE_INTERVAL_SECONDS)
+    
+    async def _keep_alive_loop(self):
+        """
+        Периодически обращается к модели, чтобы Ollama не выгрузила ее из памяти
+        по таймауту простоя (первый запрос после выгрузки ждет загрузку модели)
+        """
+        while True:
+            await asyncio.sleep(settings.AI_KEEP_ALIVE_PING_INTERVAL_SECONDS)
+            if self._warmup["warmed_up"] and self.breaker.state == CircuitBreaker.CLOSED:
+                await self.warm_up()
+    
+    async def warm_up(self) -> bool:
+        """
+        Загружает модель в память Ollama пустым запросом generate с keep_alive.
+        
+        Если модель не загружается, пробует альтернативы в том же порядке,
+        что и _check_model_availability, и переключается на первую загрузившуюся.
+        """
+        if not OLLAMA_AVAILABLE:
+            return False
+        
+        candidates = [self.model_name] + [m for m in self.model_alternatives if m != self.model_name]
+        available_models = self._health["available_models"]
+        if available_models:
+            # Как и в _check_model_availability: в крайнем случае - первая установленная модель
+            candidates = [m for m in candidates if m in available_models]
+            if available_models[0] not in candidates:
+                candidates.append(available_models[0])
+        
+        for model in candidates:
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(
+                    self._client.generate(
+                        model=model, prompt="", keep_alive=settings.AI_KEEP_ALIVE,
+                        options={"num_ctx": settings.AI_CONTEXT_WINDOW_TOKENS}
+                    ),
+                    timeout=settings.AI_WARMUP_TIMEOUT_SECONDS
+                )
+            except Exception as e:
+                error = str(e) or e.__class__.__name__
+                print(f"⚠️  Не удалось загрузить модель {model}: {error}")
+                self._warmup["error"] = error
+                continue
             
-            # Проверяем, доступна ли модель по умолчанию
-            if self.model_name not in available_models:
-                # Пытаемся найти альтернативу
-                alternatives = [
-                    "llama3.2:1b",
-                    "llama3.2",
-                    "llama3.2:3b",
-                    "llama3"
-                ]
-                
-                for alt in alternatives:
-                    if alt in available_models:
-                        old_name = self.model_name
-                        self.model_name = alt
-                        print(f"⚠️  Модель {old_name} не найдена, используется {alt}")
-                        break
-                else:
-                    if available_models:
-                        old_name = self.model_name
-                        self.model_name = available_models[0]
-                        print(f"⚠️  Модель {old_name} не найдена, используется первая доступная: {self.model_name}")
+            elapsed = time.perf_counter() - started
+            if model != self.model_name:
+                print(f"⚠️  Модель {self.model_name} не загружается, используется {model}")
+                self.model_name = model
+            self._warmup.update({
+                "warmed_up": True,
+                "warmed_at": datetime.utcnow(),
+                "load_ms": round(elapsed * 1000, 2),
+                "error": None,
+            })
+            metrics.observe("vetcard_ai_warmup_seconds", elapsed, model=model)
+            return True
+        
+        self._warmup["warmed_up"] = False
+        return False
+    
+    async def probe(self) -> Dict[str, Any]:
+        """
+        Запрашивает список моделей у Ollama (без вызова самой модели)
+        и кэширует результат вместе с задержкой ответа
+        """
+        if not OLLAMA_AVAILABLE:
+            return self.get_health()
+        
+        started = time.perf_counter()
+        try:
+            models_response = await asyncio.wait_for(
+                self._client.list(),
+                timeout=settings.AI_HEALTH_PROBE_TIMEOUT_SECONDS
+            )
+            available_models = self._extract_model_names(models_response)
+            self._health.update({
+                "reachable": True,
+                "available_models": available_models,
+                "error": None,
+            })
+            self._check_model_availability(available_models)
         except Exception as e:
-            print(f"⚠️  Не удалось проверить доступность моделей: {e}")
+            error = str(e) or e.__class__.__name__
+            if self._health["error"] != error:
+                print(f"⚠️  Не удалось проверить доступность моделей: {error}")
+            self._health.update({
+                "reachable": False,
+                "error": error,
+            })
+        self._health["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        self._health["checked_at"] = datetime.utcnow()
+        return self.get_health()
+    
+    def get_health(self) -> Dict[str, Any]:
+        """Последний закэшированный результат проверки Ollama"""
+        return {
+            "ollama_installed": OLLAMA_AVAILABLE,
+            "model": self.model_name,
+            "model_available": self.model_name in self._health["available_models"],
+            **self._health,
+            "warmup": dict(self._warmup),
+            "circuit": self.breaker.snapshot(),
+        }
+    
+    @staticmethod
+    def _is_backend_failure(error: Exception) -> bool:
+        """Ошибка говорит о недоступности Ollama (а не о проблеме конкретного запроса)"""
+        if isinstance(error, (ConnectionError, asyncio.TimeoutError)):
+            return True
+        if httpx is not None and isinstance(error, httpx.TransportError):
+            return True
+        if OLLAMA_AVAILABLE and isinstance(error, ollama.ResponseError):
+            return error.status_code >= 500
+        return False
+    
+    async def _call_model(self, messages: List[Dict[str, str]]) -> Any:
+        """
+        Вызывает модель через выключатель.
+        
+        Raises:
+            CircuitOpenError: Ollama считается недоступной, вызов не выполнялся
+        """
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Ollama недоступна")
+        
+        try:
+            response = await self._client.chat(
+                model=self.model_name,
+                messages=messages,
+                stream=False,
+                keep_alive=settings.AI_KEEP_ALIVE,
+                options=self._model_options()
+            )
+        except asyncio.CancelledError:
+            # Клиент отключился: закрытие соединения останавливает генерацию в Ollama
+            self.breaker.release()
+            metrics.inc("vetcard_ai_requests_total", outcome="cancelled")
+            raise
+        except Exception as e:
+            self._record_model_error(e)
+            raise
+        
+        self.breaker.record_success()
+        metrics.inc("vetcard_ai_requests_total", outcome="ok")
+        return response
+    
+    async def _stream_model(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        """
+        Потоковый вызов модели через выключатель, отдает фрагменты ответа.
+        
+        Закрытие генератора (например, при отключении клиента) закрывает
+        HTTP-соединение с Ollama, и она прекращает генерацию.
+        
+        Raises:
+            CircuitOpenError: Ollama считается недоступной, вызов не выполнялся
+        """
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Ollama недоступна")
+        
+        stream = None
+        finished = False
+        failed = False
+        try:
+            stream = await self._client.chat(
+                model=self.model_name,
+                messages=messages,
+                stream=True,
+                keep_alive=settings.AI_KEEP_ALIVE,
+                options=self._model_options()
+            )
+            async for part in stream:
+                content = (part.get("message") or {}).get("content", "")
+                if content:
+                    yield content
+            finished = True
+        except Exception as e:
+            failed = True
+            self._record_model_error(e)
+            raise
+        finally:
+            if stream is not None and hasattr(stream, "aclose"):
+                await stream.aclose()
+            if finished:
+                self.breaker.record_success()
+                metrics.inc("vetcard_ai_requests_total", outcome="ok")
+            elif not failed:
+                self.breaker.release()
+                metrics.inc("vetcard_ai_requests_total", outcome="cancelled")
+    
+    @staticmethod
+    def _model_options() -> Dict[str, Any]:
+        """
+        Параметры генерации: явное окно контекста (по умолчанию Ollama использует 2048
+        и молча обрезает длинные промпты) и предел длины ответа.
+        Окно должно совпадать с прогревом, иначе Ollama перезагрузит модель.
+        """
+        return {
+            "num_ctx": settings.AI_CONTEXT_WINDOW_TOKENS,
+            "num_predict": settings.AI_RESPONSE_TOKEN_RESERVE,
+        }
+    
+    def _record_model_error(self, error: Exception):
+        """Учитывает ошибку вызова модели в выключателе и метриках"""
+        if self._is_backend_failure(error):
+            self.breaker.record_failure()
+            metrics.inc("vetcard_ai_requests_total", outcome="unavailable")
+        else:
+            self.breaker.record_success()
+            metrics.inc("vetcard_ai_requests_total", outcome="error")
+    
+    @staticmethod
+    def _extract_model_names(models_response: Any) -> List[str]:
+        """Извлекает имена моделей из ответа ollama.list() (dict или объект в разных версиях клиента)"""
+        models = models_response.get("models", []) if isinstance(models_response, dict) else getattr(models_response, "models", [])
+        names = []
+        for m in models or []:
+            name = m.get("model") or m.get("name") if isinstance(m, dict) else getattr(m, "model", None)
+            if name:
+                names.append(name)
+        return names
+    
+    def _check_model_availability(self, available_models: List[str]):
+        """Проверяет доступность модели и пытается найти альтернативу"""
+        # Проверяем, доступна ли модель по умолчанию
+        if not available_models or self.model_name in available_models:
+            return
+        
+        # Пытаемся найти альтернативу
+        for alt in self.model_alternatives:
+            if alt in available_models:
+                old_name = self.model_name
+                self.model_name = alt
+                print(f"⚠️  Модель {old_name} не найдена, используется {alt}")
+                break
+        else:
+            old_name = self.model_name
+            self.model_name = available_models[0]
+            print(f"⚠️  Модель {old_name} не найдена, используется первая доступная: {self.model_name}")
     
     def _get_system_prompt(self) -> str:
         """Системный промпт для AI ассистента"""
@@ -83,23 +382,31 @@ class AIService:
 - Предлагай конкретные действия, когда это уместно
 - Рекомендуй конкретных специалистов и товары из предоставленных данных"""
     
-    def _build_context(
-        self, 
-        user: User, 
-        pets: List[Pet], 
+    def _build_context_sections(
+        self,
+        message: str,
+        pets: List[Pet],
         species_dict: Dict[int, str],
         veterinarians: Optional[List[Dict[str, Any]]] = None,
         products: Optional[List[Dict[str, Any]]] = None
-    ) -> str:
-        """Строит контекст о пользователе, его питомцах, доступных специалистах и товарах"""
-        context_parts = []
+    ) -> List[ContextSection]:
+        """
+        Строит контекст о питомцах, доступных специалистах и товарах.
         
+        Контекст разбит на разделы, чтобы при нехватке бюджета токенов сжимать
+        сначала наименее ценные: товары, затем специалистов, затем питомцев.
+        """
         # Информация о питомцах
+        pets_section = ContextSection("pets", priority=3, min_items=1, header=[
+            "=== ИНФОРМАЦИЯ О ПИТОМЦАХ ПОЛЬЗОВАТЕЛЯ ===",
+            "ВАЖНО: При ответах на вопросы используй конкретные данные о питомцах пользователя!"
+        ])
         if pets:
-            context_parts.append("=== ИНФОРМАЦИЯ О ПИТОМЦАХ ПОЛЬЗОВАТЕЛЯ ===")
-            context_parts.append("ВАЖНО: При ответах на вопросы используй конкретные данные о питомцах пользователя!")
-            for pet in pets:
+            # Питомцы, упомянутые в вопросе, идут первыми и сжимаются последними
+            message_lower = message.lower()
+            for pet in sorted(pets, key=lambda p: p.name.lower() not in message_lower):
                 species_name = species_dict.get(pet.species, "Неизвестный вид")
+                health_analysis = PetTools.analyze_pet_health(pet, species_dict)
                 pet_info = f"\nПитомец: {pet.name}"
                 pet_info += f"\n  Вид: {species_name}"
                 if pet.birth_date:
@@ -109,66 +416,187 @@ class AIService:
                 if pet.weight:
                     pet_info += f"\n  Вес: {pet.weight} кг"
                 if pet.special_notes:
-                    pet_info += f"\n  Особые пометки: {pet.special_notes}"
-                context_parts.append(pet_info)
-                
+                    notes = truncate_to_tokens(pet.special_notes, settings.AI_PROMPT_NOTES_MAX_TOKENS)
+                    pet_info += f"\n  Особые пометки: {notes}"
                 # Добавляем анализ здоровья
-                health_analysis = PetTools.analyze_pet_health(pet, species_dict)
                 if health_analysis.get("age"):
-                    context_parts.append(f"  Возраст {pet.name}: {health_analysis['age']}")
+                    pet_info += f"\n  Возраст {pet.name}: {health_analysis['age']}"
+                
+                # Краткая форма: одна строка без пометок
+                facts = [species_name, pet.breed, health_analysis.get("age")]
+                compact = f"Питомец: {pet.name} ({', '.join(f for f in facts if f)})"
+                pets_section.add(pet_info, compact)
         else:
-            context_parts.append("У пользователя пока нет зарегистрированных питомцев.")
+            pets_section.header = []
+            pets_section.add("У пользователя пока нет зарегистрированных питомцев.")
         
         # Информация о специалистах (ветеринарах)
-        if veterinarians:
-            context_parts.append("\n=== ДОСТУПНЫЕ СПЕЦИАЛИСТЫ (ВЕТЕРИНАРЫ) ===")
-            context_parts.append("При необходимости консультации или записи на прием, рекомендую следующих специалистов:")
-            for vet in veterinarians[:5]:  # Ограничиваем до 5 для контекста
-                vet_info = f"- {vet.get('first_name', '')} {vet.get('last_name', '')}".strip()
-                if not vet_info or vet_info == "-":
-                    vet_info = f"- {vet.get('username', 'Ветеринар')}"
-                if vet.get('clinic'):
-                    vet_info += f" ({vet.get('clinic')})"
-                if vet.get('specialization'):
-                    vet_info += f", специализация: {vet.get('specialization')}"
-                if vet.get('city'):
-                    vet_info += f", город: {vet.get('city')}"
-                context_parts.append(vet_info)
-            if len(veterinarians) > 5:
-                context_parts.append(f"... и еще {len(veterinarians) - 5} специалистов")
+        vets_section = ContextSection("veterinarians", priority=2, header=[
+            "\n=== ДОСТУПНЫЕ СПЕЦИАЛИСТЫ (ВЕТЕРИНАРЫ) ===",
+            "При необходимости консультации или записи на прием, рекомендую следующих специалистов:"
+        ])
+        for vet in (veterinarians or [])[:5]:  # Ограничиваем до 5 для контекста
+            vet_info = f"- {vet.get('first_name', '')} {vet.get('last_name', '')}".strip()
+            if not vet_info or vet_info == "-":
+                vet_info = f"- {vet.get('username', 'Ветеринар')}"
+            if vet.get('clinic'):
+                vet_info += f" ({vet.get('clinic')})"
+            if vet.get('specialization'):
+                vet_info += f", специализация: {vet.get('specialization')}"
+            if vet.get('city'):
+                vet_info += f", город: {vet.get('city')}"
+            vets_section.add(vet_info)
+        if veterinarians and len(veterinarians) > 5:
+            vets_section.add(f"... и еще {len(veterinarians) - 5} специалистов")
         
         # Информация о товарах
-        if products:
-            context_parts.append("\n=== ДОСТУПНЫЕ ТОВАРЫ ===")
-            context_parts.append("При необходимости покупки товаров для питомца, рекомендую следующие варианты:")
-            # Группируем товары по категориям для лучшей структуры
-            products_by_category = {}
-            for product in products[:10]:  # Ограничиваем до 10 для контекста
-                category = product.get('subcategory', {}).get('name_ru', 'Без категории') if product.get('subcategory') else 'Без категории'
-                if category not in products_by_category:
-                    products_by_category[category] = []
-                products_by_category[category].append(product)
-            
-            for category, cat_products in list(products_by_category.items())[:3]:  # Максимум 3 категории
-                context_parts.append(f"\n{category}:")
-                for product in cat_products[:3]:  # Максимум 3 товара на категорию
-                    product_info = f"  - {product.get('name_ru', 'Товар')}"
-                    if product.get('price'):
-                        product_info += f" ({product.get('price')} сом)"
-                    if product.get('description'):
-                        desc = product.get('description', '')[:50]  # Первые 50 символов
-                        product_info += f" - {desc}..."
-                    context_parts.append(product_info)
-        
-        # Добавляем инструкции для AI
-        context_parts.append("\n=== ИНСТРУКЦИИ ДЛЯ AI ===")
-        context_parts.append("1. При ответах на вопросы о здоровье питомцев используй информацию о конкретных питомцах пользователя")
-        context_parts.append("2. Если вопрос касается симптомов или проблем со здоровьем, РЕКОМЕНДУЙ обратиться к специалисту из списка выше")
-        context_parts.append("3. При вопросах о товарах (корм, игрушки, аксессуары) МОЖЕШЬ РЕКОМЕНДОВАТЬ товары из списка выше")
-        context_parts.append("4. Всегда учитывай возраст, породу и особые пометки питомцев при даче рекомендаций")
-        context_parts.append("5. Если вопрос касается конкретного питомца, используй его имя и характеристики")
-        
-        return "\n".join(context_parts)
+        products_section = ContextSection("products", priority=1, header=[
+            "\n=== ДОСТУПНЫЕ ТОВАРЫ ===",
+            "При необходимости покупки товаров для питомца, рекомендую следующие варианты:"
+        ])
+        # Группируем товары по категориям для лучшей структуры
+        products_by_category = {}
+        for product in (products or [])[:10]:  # Ограничиваем до 10 для контекста
+            category = product.get('subcategory', {}).get('name_ru', 'Без категории') if product.get('subcategory') else 'Без категории'
+            if category not in products_by_category:
+                products_by_category[category] = []
+            products_by_category[category].append(product)
+        
+        for category, cat_products in list(products_by_category.items())[:3]:  # Максимум 3 категории
+            product_lines = []
+            # Краткая форма категории - товары без описаний
+            compact_lines = []
+            for product in cat_products[:3]:  # Максимум 3 товара на категорию
+                product_info = f"  - {product.get('name_ru', 'Товар')}"
+                if product.get('price'):
+                    product_info += f" ({product.get('price')} сом)"
+                compact_lines.append(product_info)
+                if product.get('description'):
+                    desc = product.get('description', '')[:50]  # Первые 50 символов
+                    product_info += f" - {desc}..."
+                product_lines.append(product_info)
+            products_section.add(
+                f"\n{category}:\n" + "\n".join(product_lines),
+                f"\n{category}:\n" + "\n".join(compact_lines)
+            )
+        
+        # Добавляем инструкции для AI (не сжимаются)
+        instructions = [
+            "1. При ответах на вопросы о здоровье питомцев используй информацию о конкретных питомцах пользователя",
+            "2. Если вопрос касается симптомов или проблем со здоровьем, РЕКОМЕНДУЙ обратиться к специалисту из списка выше",
+            "3. При вопросах о товарах (корм, игрушки, аксессуары) МОЖЕШЬ РЕКОМЕНДОВАТЬ товары из списка выше",
+            "4. Всегда учитывай возраст, породу и особые пометки питомцев при даче рекомендаций",
+            "5. Если вопрос касается конкретного питомца, используй его имя и характеристики",
+        ]
+        instructions_section = ContextSection(
+            "instructions", priority=4, min_items=len(instructions),
+            header=["\n=== ИНСТРУКЦИИ ДЛЯ AI ==="]
+        )
+        for line in instructions:
+            instructions_section.add(line)
+        
+        return [pets_section, vets_section, products_section, instructions_section]
+    
+    def _build_prompt(
+        self,
+        message: str,
+        pets: List[Pet],
+        species_dict: Dict[int, str],
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        history_summary: Optional[str] = None,
+        veterinarians: Optional[List[Dict[str, Any]]] = None,
+        products: Optional[List[Dict[str, Any]]] = None,
+        usage: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Собирает сообщения для модели в пределах окна контекста.
+        
+        Из AI_CONTEXT_WINDOW_TOKENS вычитается резерв на ответ. Системный промпт и вопрос
+        обязательны, контекст сжимается до AI_PROMPT_CONTEXT_TOKEN_BUDGET, история получает
+        остаток: сначала отбрасываются самые старые реплики, затем краткое содержание.
+        Размер итогового промпта и выполненное сжатие записываются в usage.
+        """
+        budget = settings.AI_CONTEXT_WINDOW_TOKENS - settings.AI_RESPONSE_TOKEN_RESERVE
+        overhead = self.MESSAGE_TOKEN_OVERHEAD
+        
+        # Слишком длинный вопрос обрезаем сами: Ollama молча отбросила бы начало промпта
+        system_tokens = estimate_tokens(self.system_prompt) + overhead
+        message = truncate_to_tokens(message, max(budget // 4, budget - system_tokens - overhead))
+        fixed_tokens = system_tokens + estimate_tokens(message) + overhead
+        
+        sections = self._build_context_sections(message, pets, species_dict, veterinarians, products)
+        context_budget = min(settings.AI_PROMPT_CONTEXT_TOKEN_BUDGET, max(0, budget - fixed_tokens))
+        context_tokens = compact_sections(sections, context_budget)
+        remaining = budget - fixed_tokens - context_tokens
+        
+        summary_tokens = estimate_tokens(history_summary)
+        summary_dropped = summary_tokens > remaining
+        if summary_dropped:
+            history_summary, summary_tokens = None, 0
+        history = list(conversation_history or [])
+        history_tokens = [estimate_tokens(h.get("text", "")) + overhead for h in history]
+        history_dropped = 0
+        while history and sum(history_tokens) > remaining - summary_tokens:
+            history.pop(0)
+            history_tokens.pop(0)
+            history_dropped += 1
+        
+        context = "\n".join(line for section in sections for line in section.lines())
+        messages = self._build_messages(message, context, history, history_summary)
+        prompt_tokens = fixed_tokens + context_tokens + summary_tokens + sum(history_tokens)
+        
+        compacted = {s.name: s.compacted for s in sections if s.compacted}
+        dropped = {s.name: s.dropped for s in sections if s.dropped}
+        if history_dropped:
+            dropped["history"] = history_dropped
+        if summary_dropped:
+            dropped["summary"] = 1
+        
+        metrics.observe("vetcard_ai_prompt_tokens", prompt_tokens)
+        for name, count in compacted.items():
+            metrics.inc("vetcard_ai_prompt_compactions_total", count, section=name, action="compacted")
+        for name, count in dropped.items():
+            metrics.inc("vetcard_ai_prompt_compactions_total", count, section=name, action="dropped")
+        if compacted or dropped:
+            print(f"✂️  Промпт сжат до ~{prompt_tokens} токенов (бюджет {budget}): сжато {compacted}, удалено {dropped}")
+        
+        if usage is not None:
+            usage.update({
+                "prompt_tokens": prompt_tokens,
+                "budget_tokens": budget,
+                "compacted": compacted,
+                "dropped": dropped,
+            })
+        return messages
+    
+    def _build_messages(
+        self,
+        message: str,
+        context: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        history_summary: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """Собирает список сообщений для модели в формате Ollama chat API"""
+        system_content = f"{self.system_prompt}\n\n{context}"
+        if history_summary:
+            system_content += f"\n\n=== КРАТКОЕ СОДЕРЖАНИЕ ПРЕДЫДУЩЕГО РАЗГОВОРА ===\n{history_summary}"
+        
+        messages = [{"role": "system", "content": system_content}]
+        for hist in conversation_history or []:
+            messages.append({
+                "role": "user" if hist.get("sender") == "user" else "assistant",
+                "content": hist.get("text", "")
+            })
+        messages.append({"role": "user", "content": message})
+        return messages
+    
+    def _faq_answer(self, message: str, min_score: float, mode: str) -> Optional[str]:
+        """Ответ из локального FAQ, если найден достаточно близкий вопрос"""
+        match = faq_engine.best_answer(message, min_score)
+        if match is None:
+            return None
+        metrics.inc("vetcard_ai_faq_answers_total", mode=mode, source=match["source"])
+        return faq_engine.format_answer(match)
     
     async def chat(
         self,
@@ -178,7 +606,9 @@ class AIService:
         species_dict: Dict[int, str],
         conversation_history: Optional[List[Dict[str, str]]] = None,
         veterinarians: Optional[List[Dict[str, Any]]] = None,
-        products: Optional[List[Dict[str, Any]]] = None
+        products: Optional[List[Dict[str, Any]]] = None,
+        history_summary: Optional[str] = None,
+        usage: Optional[Dict[str, Any]] = None
     ) -> str:
         """
         Отправляет сообщение в AI и получает ответ
@@ -191,40 +621,36 @@ class AIService:
             conversation_history: История разговора (опционально)
             veterinarians: Список доступных ветеринаров (опционально)
             products: Список доступных товаров (опционально)
+            history_summary: Краткое содержание старых реплик, не вошедших в историю (опционально)
+            usage: Словарь, в который записывается размер промпта и выполненное сжатие (опционально)
         
         Returns:
             Ответ AI ассистента
         """
+        # Частые вопросы с уверенным совпадением отвечаем без модели
+        faq_answer = self._faq_answer(message, settings.AI_FAQ_DIRECT_THRESHOLD, "direct")
+        if faq_answer:
+            if usage is not None:
+                usage["prompt_tokens"] = 0
+            return faq_answer
+        
         try:
-            # Строим контекст о питомцах, специалистах и товарах
-            context = self._build_context(user, pets, species_dict, veterinarians, products)
-            
-            # Формируем полный промпт
-            full_prompt = f"{self.system_prompt}\n\n{context}\n\nВопрос пользователя: {message}\n\nОтвет:"
-            
-            # Если есть история, добавляем её
-            messages = []
-            if conversation_history:
-                for hist in conversation_history:
-                    messages.append({
-                        "role": "user" if hist.get("sender") == "user" else "assistant",
-                        "content": hist.get("text", "")
-                    })
-            
-            # Добавляем текущее сообщение
-            messages.append({"role": "user", "content": full_prompt})
+            # Системный промпт, контекст о питомцах, специалистах и товарах, история и вопрос
+            # в пределах бюджета токенов
+            messages = self._build_prompt(
+                message, pets, species_dict, conversation_history, history_summary,
+                veterinarians, products, usage
+            )
             
             # Вызываем модель через Ollama
             if not OLLAMA_AVAILABLE:
                 return self._get_fallback_response(message, pets, species_dict, veterinarians, products)
             
             try:
-                # Используем простой вызов без истории для начала
-                response = ollama.chat(
-                    model=self.model_name,
-                    messages=[{"role": "user", "content": full_prompt}],
-                    stream=False
-                )
+                response = await self._call_model(messages)
+                if usage is not None and response and response.get("prompt_eval_count"):
+                    # Фактический размер промпта по токенизатору модели
+                    usage["model_prompt_tokens"] = response["prompt_eval_count"]
                 
                 # Извлекаем ответ
                 if response and "message" in response:
@@ -237,6 +663,10 @@ class AIService:
                 else:
                     print("⚠️  Неверный формат ответа от модели")
                     return self._get_fallback_response(message, pets, species_dict, veterinarians, products)
+            except CircuitOpenError:
+                # Ollama недавно не отвечала - сразу отдаем fallback без сетевого вызова
+                metrics.inc("vetcard_ai_requests_total", outcome="short_circuit")
+                return self._get_fallback_response(message, pets, species_dict, veterinarians, products, "Ollama сервер не запущен. Пожалуйста, запустите Ollama.")
             except ConnectionError as e:
                 # Ollama сервер не запущен
                 print(f"❌ Ollama сервер не запущен: {e}")
@@ -251,6 +681,54 @@ class AIService:
             # Общая ошибка
             return self._get_fallback_response(message, pets, species_dict, veterinarians, products, str(e))
     
+    async def chat_stream(
+        self,
+        message: str,
+        user: User,
+        pets: List[Pet],
+        species_dict: Dict[int, str],
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        veterinarians: Optional[List[Dict[str, Any]]] = None,
+        products: Optional[List[Dict[str, Any]]] = None,
+        history_summary: Optional[str] = None,
+        usage: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Потоковая версия chat: отдает ответ фрагментами по мере генерации.
+        
+        Если модель недоступна или вопрос найден в FAQ, отдает ответ одним фрагментом.
+        """
+        faq_answer = self._faq_answer(message, settings.AI_FAQ_DIRECT_THRESHOLD, "direct")
+        if faq_answer:
+            if usage is not None:
+                usage["prompt_tokens"] = 0
+            yield faq_answer
+            return
+        
+        messages = self._build_prompt(
+            message, pets, species_dict, conversation_history, history_summary,
+            veterinarians, products, usage
+        )
+        
+        if not OLLAMA_AVAILABLE:
+            yield self._get_fallback_response(message, pets, species_dict, veterinarians, products)
+            return
+        
+        received = False
+        try:
+            async with aclosing(self._stream_model(messages)) as stream:
+                async for chunk in stream:
+                    received = True
+                    yield chunk
+        except CircuitOpenError:
+            metrics.inc("vetcard_ai_requests_total", outcome="short_circuit")
+            yield self._get_fallback_response(message, pets, species_dict, veterinarians, products, "Ollama сервер не запущен. Пожалуйста, запустите Ollama.")
+        except Exception as e:
+            error_msg = str(e)
+            print(f"❌ Ошибка при обращении к Ollama: {error_msg}")
+            if not received:
+                yield self._get_fallback_response(message, pets, species_dict, veterinarians, products, error_msg)
+    
     def _get_fallback_response(
         self, 
         message: str, 
@@ -261,6 +739,11 @@ class AIService:
         error: str = ""
     ) -> str:
         """Fallback ответ, если AI недоступен"""
+        # Сначала ищем ответ в FAQ и статьях с более мягким порогом, чем для прямых ответов
+        faq_answer = self._faq_answer(message, settings.AI_FAQ_FALLBACK_THRESHOLD, "fallback")
+        if faq_answer:
+            return faq_answer
+        
         message_lower = message.lower()
         
         # Простые ответы на частые вопросы
@@ -320,11 +803,7 @@ class AIService:
                 
                 if OLLAMA_AVAILABLE:
                     try:
-                        response = ollama.chat(
-                            model=self.model_name,
-                            messages=[{"role": "user", "content": prompt}],
-                            stream=False
-                        )
+                        response = await self._call_model([{"role": "user", "content": prompt}])
                         
                         if response and "message" in response:
                             content = response["message"].get("content", "")
@@ -339,7 +818,7 @@ class AIService:
                                         "event": suggestion.get("event", "Напоминание"),
                                         "pet_name": suggestion.get("pet_name", "любой")
                                     }
-                    except:
+                    except Exception:
                         pass
         
         return None
@@ -0,0 +1,89 @@
+"""
+Списки записей к ветеринару: период, статус и постраничная выдача по курсору
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query, lazyload
+from app.models.vet_cabinet import VetAppointment
+from app.services.availability import availability_engine
+from app.services.pet_timeline import InvalidCursor
+
+Cursor = Tuple[datetime, int]
+
+
+class AppointmentList:
+    """
+    Записи ветеринара или владельца за период [date_from, date_to).
+
+    Фильтр по периоду и порядок (appointment_date, id) идут по индексам
+    (vet_id, appointment_date) и (pet_owner_id, appointment_date); следующая
+    страница продолжается с курсора, а не со смещения. Питомец в ответ не
+    входит, поэтому его JOIN отключен.
+    """
+
+    MAX_LIMIT = 500
+
+    @staticmethod
+    def encode_cursor(appointment: VetAppointment) -> str:
+        raw = json.dumps([appointment.appointment_date.isoformat(), appointment.id])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Cursor:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            appointment_date, appointment_id = json.loads(raw)
+            return datetime.fromisoformat(appointment_date), int(appointment_id)
+        except (ValueError, TypeError) as e:
+            raise InvalidCursor(str(e)) from e
+
+    def page(
+        self,
+        query: Query,
+        descending: bool = False,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        status_filter: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[List[Any], Optional[str]]:
+        """Записи страницы и курсор следующей (None - страница последняя или limit не задан)"""
+        query = query.options(lazyload(VetAppointment.pet))
+        # Записи хранятся в местном времени клиники
+        if date_from is not None:
+            query = query.filter(VetAppointment.appointment_date >= availability_engine.local_time(date_from))
+        if date_to is not None:
+            query = query.filter(VetAppointment.appointment_date < availability_engine.local_time(date_to))
+        if status_filter:
+            query = query.filter(VetAppointment.status == status_filter)
+        if cursor:
+            cursor_date, cursor_id = self.decode_cursor(cursor)
+            if descending:
+                after = or_(
+                    VetAppointment.appointment_date < cursor_date,
+                    and_(VetAppointment.appointment_date == cursor_date, VetAppointment.id < cursor_id)
+                )
+            else:
+                after = or_(
+                    VetAppointment.appointment_date > cursor_date,
+                    and_(VetAppointment.appointment_date == cursor_date, VetAppointment.id > cursor_id)
+                )
+            query = query.filter(after)
+
+        if descending:
+            query = query.order_by(VetAppointment.appointment_date.desc(), VetAppointment.id.desc())
+        else:
+            query = query.order_by(VetAppointment.appointment_date, VetAppointment.id)
+        if limit is None:
+            return query.all(), None
+
+        rows = query.limit(limit + 1).all()
+        next_cursor = self.encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+        return rows[:limit], next_cursor
+
+
+# Глобальный экземпляр сервиса
+appointment_list = AppointmentList()
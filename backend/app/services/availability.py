@@ -0,0 +1,219 @@
+"""
+Свободное время ветеринаров и клиник партнеров для записи
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.user import User
+from app.models.vet_cabinet import VetAppointment
+from app.models.partner_cabinet import PartnerSchedule, PartnerScheduleException, PartnerService
+
+Interval = Tuple[datetime, datetime]
+
+# Записи длиннее суток не бывают: дальше этой границы назад занятость не ищем
+MAX_APPOINTMENT_LOOKBACK = timedelta(days=1)
+
+
+def _parse_time(value: str) -> time:
+    hours, minutes = value.split(":")
+    return time(int(hours), int(minutes))
+
+
+def subtract_intervals(free: List[Interval], busy: List[Interval]) -> List[Interval]:
+    """Вычитает занятые интервалы из свободных; оба списка отсортированы по началу"""
+    result = []
+    busy_index = 0
+    for start, end in free:
+        # Занятые интервалы, закончившиеся до начала свободного, больше не нужны
+        while busy_index < len(busy) and busy[busy_index][1] <= start:
+            busy_index += 1
+        cursor = start
+        i = busy_index
+        while i < len(busy) and busy[i][0] < end:
+            busy_start, busy_end = busy[i]
+            if busy_start > cursor:
+                result.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+            i += 1
+        if cursor < end:
+            result.append((cursor, end))
+    return result
+
+
+class AvailabilityEngine:
+    """
+    Рабочее время (график клиники или часы ветеринаров по умолчанию) минус
+    существующие записи = свободные интервалы, нарезанные на слоты.
+
+    Занятость читается одним запросом по индексу (vet_id, appointment_date).
+    Запись проверяется и создается под блокировкой календаря исполнителя,
+    поэтому два одновременных запроса не займут один слот.
+    """
+
+    @staticmethod
+    def provider_role(db: Session, provider_id: int) -> Optional[int]:
+        """2 - ветеринар, 3 - клиника партнера, None - записаться нельзя"""
+        provider = db.query(User).filter(User.id == provider_id, User.is_active == True).first()
+        if provider is None or provider.profile is None or provider.profile.role not in (2, 3):
+            return None
+        return provider.profile.role
+
+    @staticmethod
+    def service_duration(db: Session, provider_id: int, service_id: Optional[int]) -> Optional[int]:
+        """Длительность услуги клиники в минутах; None - услуга не найдена"""
+        if service_id is None:
+            return settings.APPOINTMENT_SLOT_MINUTES
+        service = db.query(PartnerService).filter(
+            PartnerService.id == service_id,
+            PartnerService.partner_id == provider_id,
+            PartnerService.is_active == True
+        ).first()
+        if service is None:
+            return None
+        return service.duration_minutes or settings.APPOINTMENT_SLOT_MINUTES
+
+    @staticmethod
+    def working_intervals(db: Session, provider_id: int, role: int, date_from: date, date_to: date) -> List[Interval]:
+        """
+        Рабочие интервалы по дням [date_from, date_to]; интервал может заканчиваться на следующий день.
+        Особая дата клиники заменяет график на все сутки.
+        """
+        special: Dict[date, Optional[Tuple[time, time]]] = {}
+        if role == 3:
+            week: Dict[int, Tuple[time, time]] = {
+                row.day_of_week: (row.open_time, row.close_time)
+                for row in db.query(PartnerSchedule).filter(PartnerSchedule.partner_id == provider_id).all()
+                if not row.is_closed and row.open_time is not None and row.close_time is not None
+            }
+            special = {
+                row.exception_date: None if row.is_closed else (row.open_time, row.close_time)
+                for row in db.query(PartnerScheduleException).filter(
+                    PartnerScheduleException.partner_id == provider_id,
+                    PartnerScheduleException.exception_date.between(date_from, date_to + timedelta(days=1))
+                ).all()
+            }
+        else:
+            hours = (_parse_time(settings.VET_WORK_START), _parse_time(settings.VET_WORK_END))
+            week = {int(day): hours for day in settings.VET_WORK_DAYS.split(",") if day.strip()}
+
+        intervals = []
+        day = date_from
+        while day <= date_to:
+            next_day = day + timedelta(days=1)
+            hours = special[day] if day in special else week.get(day.weekday())
+            if hours is not None:
+                start = datetime.combine(day, hours[0])
+                end = datetime.combine(day, hours[1])
+                if end <= start:
+                    # Работа после полуночи: закрытие на следующий день, если он не особый
+                    end = datetime.combine(next_day, time.min if next_day in special else hours[1])
+                intervals.append((start, end))
+            day = next_day
+        return intervals
+
+    @staticmethod
+    def busy_intervals(
+        db: Session,
+        provider_id: int,
+        start: datetime,
+        end: datetime,
+        exclude_id: Optional[int] = None
+    ) -> List[Interval]:
+        """Занятые интервалы исполнителя, пересекающие [start, end), отсортированные и слитые"""
+        query = db.query(
+            VetAppointment.appointment_date, VetAppointment.duration_minutes
+        ).filter(
+            VetAppointment.vet_id == provider_id,
+            VetAppointment.appointment_date >= start - MAX_APPOINTMENT_LOOKBACK,
+            VetAppointment.appointment_date < end,
+            VetAppointment.status != "cancelled"
+        )
+        if exclude_id is not None:
+            query = query.filter(VetAppointment.id != exclude_id)
+
+        merged: List[Interval] = []
+        for appointment_start, duration in query.order_by(VetAppointment.appointment_date).all():
+            appointment_end = appointment_start + timedelta(minutes=duration or settings.APPOINTMENT_SLOT_MINUTES)
+            if appointment_end <= start:
+                continue
+            if merged and appointment_start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], appointment_end))
+            else:
+                merged.append((appointment_start, appointment_end))
+        return merged
+
+    def free_slots(
+        self,
+        db: Session,
+        provider_id: int,
+        role: int,
+        date_from: date,
+        date_to: date,
+        duration_minutes: int,
+        now: Optional[datetime] = None
+    ) -> List[Interval]:
+        """Начала и концы свободных слотов длительностью duration_minutes"""
+        now = now or datetime.now()
+        working = self.working_intervals(db, provider_id, role, date_from, date_to)
+        if not working:
+            return []
+        busy = self.busy_intervals(db, provider_id, working[0][0], working[-1][1])
+        duration = timedelta(minutes=duration_minutes)
+        step = timedelta(minutes=settings.APPOINTMENT_SLOT_MINUTES)
+
+        slots = []
+        for start, end in subtract_intervals(working, busy):
+            # Слоты по сетке шага от начала рабочего дня, не в прошлом
+            day_start = next(w[0] for w in working if w[0] <= start < w[1])
+            earliest = max(start, now)
+            slot_start = day_start + -(-(earliest - day_start) // step) * step
+            while slot_start + duration <= end:
+                slots.append((slot_start, slot_start + duration))
+                slot_start += step
+        return slots
+
+    @staticmethod
+    def local_time(value: datetime) -> datetime:
+        """Время записи без часового пояса (записи хранятся в местном времени клиники)"""
+        if value.tzinfo is not None:
+            return value.astimezone().replace(tzinfo=None)
+        return value
+
+    @staticmethod
+    def lock_calendar(db: Session, provider_id: int):
+        """
+        Блокирует календарь исполнителя до конца транзакции.
+
+        Пустой UPDATE строки исполнителя: в PostgreSQL берет блокировку строки,
+        в SQLite - блокировку записи всей БД, так что проверка и вставка
+        выполняются без гонки в обеих СУБД.
+        """
+        db.execute(update(User).where(User.id == provider_id).values(id=User.id))
+
+    def booking_error(
+        self,
+        db: Session,
+        provider_id: int,
+        role: int,
+        start: datetime,
+        duration_minutes: int,
+        exclude_id: Optional[int] = None,
+        now: Optional[datetime] = None
+    ) -> Optional[str]:
+        """Причина, по которой время нельзя занять, или None (вызывать под lock_calendar)"""
+        now = now or datetime.now()
+        end = start + timedelta(minutes=duration_minutes)
+        if start < now:
+            return "Нельзя записаться на прошедшее время"
+        working = self.working_intervals(db, provider_id, role, start.date() - timedelta(days=1), start.date())
+        if not any(w_start <= start and end <= w_end for w_start, w_end in working):
+            return "Выбранное время вне рабочих часов"
+        if self.busy_intervals(db, provider_id, start, end, exclude_id=exclude_id):
+            return "Выбранное время уже занято"
+        return None
+
+
+# Глобальный экземпляр движка
+availability_engine = AvailabilityEngine()
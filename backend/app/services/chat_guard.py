@@ -0,0 +1,85 @@
+"""
+Ограничение одновременных запросов к AI и отмена генерации при отключении клиента
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Dict, Optional
+from starlette.requests import Request
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+class ClientDisconnected(Exception):
+    """Клиент закрыл соединение до получения ответа"""
+
+
+class UserConcurrencyLimiter:
+    """
+    Ограничивает число одновременных запросов к модели от одного пользователя,
+    чтобы один пользователь не занимал все слоты модели.
+
+    Счетчики хранятся в памяти процесса, поэтому лимит действует в пределах воркера.
+    """
+
+    def __init__(self, max_per_user: int):
+        self.max_per_user = max_per_user
+        self._lock = threading.Lock()
+        self._active: Dict[int, int] = {}
+
+    def try_acquire(self, user_id: int) -> bool:
+        """Занимает слот пользователя; False, если лимит исчерпан"""
+        with self._lock:
+            active = self._active.get(user_id, 0)
+            if active >= self.max_per_user:
+                metrics.inc("vetcard_ai_concurrency_rejected_total")
+                return False
+            self._active[user_id] = active + 1
+            return True
+
+    def release(self, user_id: int):
+        """Освобождает слот пользователя"""
+        with self._lock:
+            active = self._active.get(user_id, 0) - 1
+            if active > 0:
+                self._active[user_id] = active
+            else:
+                self._active.pop(user_id, None)
+
+    def active_total(self) -> int:
+        with self._lock:
+            return sum(self._active.values())
+
+
+async def run_until_disconnect(request: Request, awaitable: Awaitable[Any], poll_interval: Optional[float] = None) -> Any:
+    """
+    Выполняет awaitable, периодически проверяя, не отключился ли клиент.
+
+    При отключении задача отменяется (вместе с запросом к Ollama) и
+    выбрасывается ClientDisconnected.
+    """
+    poll_interval = poll_interval or settings.AI_DISCONNECT_POLL_INTERVAL_SECONDS
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                metrics.inc("vetcard_ai_client_disconnects_total")
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+# Глобальный ограничитель для AI чата
+chat_limiter = UserConcurrencyLimiter(settings.AI_MAX_CONCURRENT_CHATS_PER_USER)
+metrics.describe("vetcard_ai_concurrency_rejected_total", "Запросы к AI, отклоненные из-за лимита на пользователя")
+metrics.describe("vetcard_ai_client_disconnects_total", "Генерации, отмененные из-за отключения клиента")
+metrics.describe("vetcard_ai_active_chats", "Запросы к AI, выполняющиеся сейчас")
+metrics.register_gauge("vetcard_ai_active_chats", chat_limiter.active_total)
@@ -0,0 +1,131 @@
+"""
+Автоматический выключатель (circuit breaker) для внешних сервисов
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+from app.core.metrics import metrics
+
+
+class CircuitOpenError(Exception):
+    """Вызов отклонен: выключатель разомкнут, сервис считается недоступным"""
+
+
+class CircuitBreaker:
+    """
+    Выключатель с тремя состояниями:
+
+    - closed: запросы проходят, подряд идущие ошибки считаются;
+    - open: после failure_threshold ошибок запросы сразу отклоняются
+      до истечения паузы (backoff);
+    - half_open: после паузы пропускается один пробный запрос. Успех замыкает
+      выключатель, ошибка снова размыкает его с удвоенной паузой
+      (не больше max_backoff).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        base_backoff_seconds: float = 2.0,
+        max_backoff_seconds: float = 120.0
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._backoff = base_backoff_seconds
+        self._retry_at = 0.0
+        self._opened_at: Optional[datetime] = None
+        self._probe_in_flight = False
+
+        metrics.describe(
+            "vetcard_circuit_state",
+            "Состояние выключателя: 0 - closed, 1 - half_open, 2 - open"
+        )
+        metrics.describe("vetcard_circuit_transitions_total", "Переходы выключателя между состояниями")
+        metrics.describe("vetcard_circuit_rejected_total", "Вызовы, отклоненные разомкнутым выключателем")
+        metrics.set_gauge("vetcard_circuit_state", self.STATE_CODES[self._state], circuit=name)
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Можно ли выполнить вызов. При False вызов нужно сразу заменить fallback-ответом"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() >= self._retry_at:
+                self._transition(self.HALF_OPEN)
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+        metrics.inc("vetcard_circuit_rejected_total", circuit=self.name)
+        return False
+
+    def record_success(self):
+        """Успешный вызов: выключатель замыкается, счетчики сбрасываются"""
+        with self._lock:
+            self._failures = 0
+            self._backoff = self.base_backoff_seconds
+            self._probe_in_flight = False
+            if self._state != self.CLOSED:
+                self._opened_at = None
+                self._transition(self.CLOSED)
+
+    def record_failure(self):
+        """Ошибка сервиса (недоступен, таймаут, 5xx)"""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN:
+                # Пробный запрос не прошел - увеличиваем паузу
+                self._backoff = min(self._backoff * 2, self.max_backoff_seconds)
+                self._open()
+            elif self._state == self.CLOSED and self._failures >= self.failure_threshold:
+                self._backoff = self.base_backoff_seconds
+                self._open()
+
+    def release(self):
+        """Вызов прерван без результата (например, клиент отключился) - освобождаем слот пробы"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Текущее состояние для health-check и метрик"""
+        with self._lock:
+            retry_in = max(0.0, self._retry_at - time.monotonic()) if self._state == self.OPEN else 0.0
+            return {
+                "name": self.name,
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "backoff_seconds": self._backoff,
+                "retry_in_seconds": round(retry_in, 3),
+                "opened_at": self._opened_at,
+            }
+
+    def _open(self):
+        self._probe_in_flight = False
+        self._retry_at = time.monotonic() + self._backoff
+        if self._opened_at is None:
+            self._opened_at = datetime.utcnow()
+        self._transition(self.OPEN)
+        print(f"⚠️  {self.name}: выключатель разомкнут, повторная проверка через {self._backoff:.1f} с")
+
+    def _transition(self, new_state: str):
+        if new_state == self._state and new_state != self.OPEN:
+            return
+        self._state = new_state
+        metrics.set_gauge("vetcard_circuit_state", self.STATE_CODES[new_state], circuit=self.name)
+        metrics.inc("vetcard_circuit_transitions_total", circuit=self.name, to_state=new_state)
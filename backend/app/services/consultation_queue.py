@@ -0,0 +1,190 @@
+"""
+Очередь консультаций клиник и специализаций: ветеринары забирают вопросы по одному
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import func, or_, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.user import User, Profile
+from app.models.vet_cabinet import ConsultationQueueItem, VetConsultation
+
+# Сколько кандидатов просматривать за попытку, если их перехватили другие ветеринары
+CLAIM_CANDIDATES = 5
+CLAIM_ATTEMPTS = 3
+
+
+def normalize_pool(value: Optional[str]) -> Optional[str]:
+    """Клиника или специализация в виде ключа пула ("  Кардиология " -> "кардиология")"""
+    if value is None:
+        return None
+    value = " ".join(value.split()).lower()
+    return value or None
+
+
+class ConsultationQueue:
+    """
+    Ветеринар забирает следующий вопрос своего пула: выше приоритет, раньше срок
+    ответа (SLA), раньше создан. Выборка идет по индексу ix_consultation_queue_next.
+
+    Захват атомарный: кандидаты читаются с FOR UPDATE SKIP LOCKED (PostgreSQL -
+    параллельные ветеринары получают разные строки без ожидания), затем
+    условный UPDATE ... WHERE status = 'queued' - он же защищает от гонки
+    в SQLite, где блокировок строк нет. Проигравший захват пробует следующего
+    кандидата, поэтому один вопрос не достанется двум ветеринарам.
+    """
+
+    def __init__(self):
+        metrics.describe("vetcard_consultations_claimed_total", "Вопросы, забранные ветеринарами из очереди")
+
+    @staticmethod
+    def sla_minutes(priority: int) -> int:
+        minutes = [int(value) for value in settings.CONSULTATION_SLA_MINUTES.split(",") if value.strip()]
+        return minutes[min(max(priority, 0), len(minutes) - 1)]
+
+    @staticmethod
+    def pool_vet_ids(db: Session, clinic: Optional[str], specialization: Optional[str]) -> List[int]:
+        """Активные ветеринары, которые могут забрать вопрос пула"""
+        # Сравнение в Python: lower() в SQLite не переводит кириллицу в нижний регистр
+        vets = db.query(Profile.user_id, Profile.clinic, Profile.specialization).join(
+            User, User.id == Profile.user_id
+        ).filter(
+            Profile.role == 2,
+            User.is_active == True
+        ).all()
+        return [
+            vet_id for vet_id, vet_clinic, vet_specialization in vets
+            if clinic in (None, normalize_pool(vet_clinic))
+            and specialization in (None, normalize_pool(vet_specialization))
+        ]
+
+    def submit(self, db: Session, owner_id: int, data: Dict[str, Any]) -> ConsultationQueueItem:
+        """Ставит вопрос в очередь (коммит - за вызывающим)"""
+        now = datetime.utcnow()
+        item = ConsultationQueueItem(
+            pet_owner_id=owner_id,
+            pet_id=data["pet_id"],
+            question=data["question"],
+            pool_clinic=normalize_pool(data.get("clinic")),
+            pool_specialization=normalize_pool(data.get("specialization")),
+            priority=data.get("priority", 0),
+            due_at=now + timedelta(minutes=self.sla_minutes(data.get("priority", 0))),
+            status="queued",
+            created_at=now
+        )
+        db.add(item)
+        return item
+
+    @staticmethod
+    def _eligible(profile: Profile):
+        """Вопросы пулов ветеринара: пустое поле пула подходит любому"""
+        clinic = normalize_pool(profile.clinic)
+        specialization = normalize_pool(profile.specialization)
+        return [
+            ConsultationQueueItem.status == "queued",
+            or_(ConsultationQueueItem.pool_clinic.is_(None), ConsultationQueueItem.pool_clinic == clinic),
+            or_(
+                ConsultationQueueItem.pool_specialization.is_(None),
+                ConsultationQueueItem.pool_specialization == specialization
+            ),
+        ]
+
+    def claim(self, db: Session, vet: User) -> Optional[VetConsultation]:
+        """Забирает следующий вопрос и создает консультацию ветеринара; None - очередь пуста"""
+        for _ in range(CLAIM_ATTEMPTS):
+            candidates: List[int] = [
+                item_id for (item_id,) in db.query(ConsultationQueueItem.id).filter(
+                    *self._eligible(vet.profile)
+                ).order_by(
+                    ConsultationQueueItem.priority.desc(),
+                    ConsultationQueueItem.due_at,
+                    ConsultationQueueItem.id
+                ).limit(CLAIM_CANDIDATES).with_for_update(skip_locked=True).all()
+            ]
+            if not candidates:
+                db.rollback()
+                return None
+
+            now = datetime.utcnow()
+            for item_id in candidates:
+                claimed = db.execute(
+                    update(ConsultationQueueItem).where(
+                        ConsultationQueueItem.id == item_id,
+                        ConsultationQueueItem.status == "queued"
+                    ).values(
+                        status="claimed", claimed_by=vet.id, claimed_at=now
+                    ).returning(
+                        ConsultationQueueItem.pet_owner_id, ConsultationQueueItem.pet_id,
+                        ConsultationQueueItem.question, ConsultationQueueItem.created_at
+                    ).execution_options(synchronize_session=False)
+                ).first()
+                if claimed is None:
+                    continue
+                consultation = VetConsultation(
+                    vet_id=vet.id,
+                    pet_owner_id=claimed.pet_owner_id,
+                    pet_id=claimed.pet_id,
+                    question=claimed.question,
+                    status="pending",
+                    created_at=claimed.created_at
+                )
+                db.add(consultation)
+                db.flush()
+                db.execute(
+                    update(ConsultationQueueItem).where(ConsultationQueueItem.id == item_id).values(
+                        consultation_id=consultation.id
+                    ).execution_options(synchronize_session=False)
+                )
+                db.commit()
+                metrics.inc("vetcard_consultations_claimed_total")
+                return consultation
+            # Всех кандидатов перехватили - берем следующих
+            db.rollback()
+        return None
+
+    @staticmethod
+    def release(db: Session, vet_id: int, consultation: VetConsultation) -> Optional[Any]:
+        """
+        Возвращает неотвеченный вопрос в очередь (коммит - за вызывающим).
+        Результат - пул и приоритет вопроса или None, если вопрос не из очереди.
+        """
+        returned = db.execute(
+            update(ConsultationQueueItem).where(
+                ConsultationQueueItem.consultation_id == consultation.id,
+                ConsultationQueueItem.claimed_by == vet_id,
+                ConsultationQueueItem.status == "claimed"
+            ).values(
+                status="queued", claimed_by=None, claimed_at=None, consultation_id=None
+            ).returning(
+                ConsultationQueueItem.pool_clinic, ConsultationQueueItem.pool_specialization,
+                ConsultationQueueItem.priority, ConsultationQueueItem.due_at
+            ).execution_options(synchronize_session=False)
+        ).first()
+        if returned is None:
+            return None
+        db.delete(consultation)
+        return returned
+
+    @staticmethod
+    def mark_answered(db: Session, consultation_id: int):
+        """Отмечает вопрос очереди отвеченным (если консультация пришла из очереди)"""
+        db.execute(
+            update(ConsultationQueueItem).where(
+                ConsultationQueueItem.consultation_id == consultation_id
+            ).values(status="answered").execution_options(synchronize_session=False)
+        )
+
+    def summary(self, db: Session, vet: User) -> Dict[str, Any]:
+        """Размер очереди ветеринара, просроченные вопросы и ближайший срок"""
+        now = datetime.utcnow()
+        queued, overdue, next_due_at = db.query(
+            func.count(ConsultationQueueItem.id),
+            func.count(ConsultationQueueItem.id).filter(ConsultationQueueItem.due_at < now),
+            func.min(ConsultationQueueItem.due_at)
+        ).filter(*self._eligible(vet.profile)).one()
+        return {"queued": queued, "overdue": overdue, "next_due_at": next_due_at}
+
+
+# Глобальный экземпляр очереди
+consultation_queue = ConsultationQueue()
@@ -0,0 +1,133 @@
+"""
+Сервис для хранения диалогов с AI ассистентом и окна истории с бюджетом токенов
+"""
+import re
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.conversation import Conversation, ConversationMessage
+from app.models.user import User
+from app.services.tokens import estimate_tokens
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s")
+
+
+class ConversationService:
+    """
+    Хранит сообщения диалога в базе и собирает для модели окно истории.
+
+    В окно попадают последние сообщения, пока их суммарный размер не превысит
+    бюджет токенов. Более старые сообщения сворачиваются в краткое содержание
+    (rolling summary), которое само ограничено отдельным бюджетом. Поэтому
+    размер промпта не растет вместе с длиной диалога.
+    """
+
+    SUMMARY_LINE_MAX_CHARS = 160
+    TITLE_MAX_CHARS = 60
+
+    def __init__(
+        self,
+        history_token_budget: int = settings.AI_HISTORY_TOKEN_BUDGET,
+        summary_token_budget: int = settings.AI_SUMMARY_TOKEN_BUDGET
+    ):
+        self.history_token_budget = history_token_budget
+        self.summary_token_budget = summary_token_budget
+
+    def get_conversation(self, db: Session, user: User, conversation_id: int) -> Optional[Conversation]:
+        """Возвращает диалог пользователя или None, если он не найден"""
+        return db.query(Conversation).filter(
+            Conversation.id == conversation_id,
+            Conversation.user_id == user.id
+        ).first()
+
+    def create_conversation(
+        self,
+        db: Session,
+        user: User,
+        first_message: str,
+        history: Optional[List[Dict[str, str]]] = None
+    ) -> Conversation:
+        """
+        Создает новый диалог.
+
+        history - история, присланная клиентом, который еще не знает conversation_id;
+        она сохраняется один раз, дальше клиент передает только conversation_id.
+        """
+        conversation = Conversation(
+            user_id=user.id,
+            title=first_message.strip()[:self.TITLE_MAX_CHARS] or None
+        )
+        db.add(conversation)
+        db.flush()
+
+        for item in history or []:
+            self.add_message(db, conversation, item.get("sender", "user"), item.get("text", ""))
+
+        return conversation
+
+    def add_message(self, db: Session, conversation: Conversation, sender: str, text: str) -> ConversationMessage:
+        """Добавляет сообщение в диалог"""
+        message = ConversationMessage(
+            conversation_id=conversation.id,
+            sender="user" if sender == "user" else "ai",
+            text=text,
+            token_count=estimate_tokens(text)
+        )
+        db.add(message)
+        conversation.updated_at = datetime.utcnow()
+        db.flush()
+        return message
+
+    def build_history(self, db: Session, conversation: Conversation) -> Tuple[List[Dict[str, str]], Optional[str]]:
+        """
+        Собирает окно истории для модели.
+
+        Returns:
+            (история в формате [{"sender", "text"}], краткое содержание старых реплик)
+        """
+        # Читаем только еще не свернутые сообщения: их объем ограничен бюджетом окна
+        pending = db.query(ConversationMessage).filter(
+            ConversationMessage.conversation_id == conversation.id,
+            ConversationMessage.id > conversation.summarized_until_id
+        ).order_by(ConversationMessage.id.desc()).all()
+
+        window: List[ConversationMessage] = []
+        overflow: List[ConversationMessage] = []
+        used_tokens = 0
+        for index, message in enumerate(pending):
+            if used_tokens + message.token_count > self.history_token_budget:
+                overflow = pending[index:]
+                break
+            window.append(message)
+            used_tokens += message.token_count
+
+        if overflow:
+            # overflow отсортирован от новых к старым
+            new_lines = [self._summarize_message(m) for m in reversed(overflow)]
+            conversation.summary = self._merge_summary(conversation.summary, new_lines)
+            conversation.summarized_until_id = overflow[0].id
+            db.flush()
+
+        history = [{"sender": m.sender, "text": m.text} for m in reversed(window)]
+        return history, conversation.summary
+
+    def _summarize_message(self, message: ConversationMessage) -> str:
+        """Сжимает реплику до первого предложения"""
+        text = " ".join(message.text.split())
+        first_sentence = _SENTENCE_END_RE.split(text, maxsplit=1)[0]
+        if len(first_sentence) > self.SUMMARY_LINE_MAX_CHARS:
+            first_sentence = first_sentence[:self.SUMMARY_LINE_MAX_CHARS].rstrip() + "…"
+        author = "Пользователь" if message.sender == "user" else "Ассистент"
+        return f"{author}: {first_sentence}"
+
+    def _merge_summary(self, summary: Optional[str], new_lines: List[str]) -> str:
+        """Дописывает новые строки в summary и отбрасывает самые старые, пока не уложится в бюджет"""
+        lines = (summary.split("\n") if summary else []) + new_lines
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_token_budget:
+            lines.pop(0)
+        return "\n".join(lines)
+
+
+# Глобальный экземпляр сервиса
+conversation_service = ConversationService()
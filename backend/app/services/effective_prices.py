@@ -0,0 +1,171 @@
+"""
+Цены товаров с учетом действующих акций: хранятся в ref_shop и пересчитываются при изменениях
+"""
+import asyncio
+import re
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import bindparam, or_, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.partner_cabinet import PartnerPromotion
+from app.models.reference import RefShop
+
+PRICE_PATTERN = re.compile(r"\d+(?:[.,]\d+)?")
+
+
+def parse_price(value: Optional[str]) -> Optional[float]:
+    """Число из строки цены ("1 200,50 сом" -> 1200.5); None - цену не разобрать"""
+    if not value:
+        return None
+    match = PRICE_PATTERN.search(value.replace(" ", "").replace("\u00a0", ""))
+    if match is None:
+        return None
+    return float(match.group().replace(",", "."))
+
+
+class EffectivePrices:
+    """
+    Для каждого товара в ref_shop хранится цена с лучшей действующей скидкой
+    (effective_price, по ней идет сортировка каталога), процент скидки, акция
+    и время ее окончания. Каталог читает только ref_shop и акции не присоединяет.
+
+    Пересчет:
+    - товаров акции - при создании, изменении и удалении акции;
+    - товара - при изменении его цены;
+    - товаров акций, у которых с прошлой проверки наступило начало или окончание, -
+      фоновой задачей каждые EFFECTIVE_PRICES_REFRESH_SECONDS секунд;
+    - всего каталога - при старте приложения.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._checked_at: Optional[datetime] = None
+
+    @staticmethod
+    def _best_discounts(db: Session, now: datetime, product_ids: Optional[Iterable[int]]) -> Dict[int, Tuple[int, int, datetime]]:
+        """product_id -> (скидка, id акции, окончание) лучшей действующей акции"""
+        # Учитываются только акции владельца товара с корректной скидкой
+        query = db.query(
+            PartnerPromotion.product_id, PartnerPromotion.discount_percent,
+            PartnerPromotion.id, PartnerPromotion.end_date
+        ).join(
+            RefShop, (RefShop.id == PartnerPromotion.product_id) & (RefShop.user_id == PartnerPromotion.partner_id)
+        ).filter(
+            PartnerPromotion.is_active == True,
+            PartnerPromotion.start_date <= now,
+            PartnerPromotion.end_date > now,
+            PartnerPromotion.discount_percent.between(1, 100)
+        )
+        if product_ids is not None:
+            query = query.filter(PartnerPromotion.product_id.in_(product_ids))
+        best = {}
+        for product_id, percent, promotion_id, end_date in query.all():
+            current = best.get(product_id)
+            # Большая скидка, при равной - та, что действует дольше
+            if current is None or (percent, end_date) > (current[0], current[2]):
+                best[product_id] = (percent, promotion_id, end_date)
+        return best
+
+    def recompute(self, db: Session, product_ids: Optional[Iterable[int]] = None, now: Optional[datetime] = None) -> int:
+        """
+        Пересчитывает цены товаров product_ids (None - всего каталога) в текущей
+        транзакции; записываются только изменившиеся строки. Возвращает их количество.
+        """
+        now = now or datetime.utcnow()
+        if product_ids is not None:
+            product_ids = {product_id for product_id in product_ids if product_id is not None}
+            if not product_ids:
+                return 0
+        discounts = self._best_discounts(db, now, product_ids)
+
+        query = db.query(
+            RefShop.id, RefShop.price, RefShop.effective_price, RefShop.discount_percent,
+            RefShop.discount_promotion_id, RefShop.discount_ends_at
+        )
+        if product_ids is not None:
+            query = query.filter(RefShop.id.in_(product_ids))
+        rows = []
+        for product_id, price, *stored in query.all():
+            base = parse_price(price)
+            percent, promotion_id, ends_at = discounts.get(product_id, (None, None, None))
+            effective = base
+            if base is not None and percent:
+                effective = round(base * (100 - percent) / 100, 2)
+            values = [effective, percent, promotion_id, ends_at]
+            if values != stored:
+                rows.append({
+                    "product_id": product_id, "new_effective_price": effective, "new_discount_percent": percent,
+                    "new_discount_promotion_id": promotion_id, "new_discount_ends_at": ends_at,
+                })
+        if rows:
+            table = RefShop.__table__
+            db.connection().execute(
+                update(table).where(table.c.id == bindparam("product_id")).values(
+                    effective_price=bindparam("new_effective_price"),
+                    discount_percent=bindparam("new_discount_percent"),
+                    discount_promotion_id=bindparam("new_discount_promotion_id"),
+                    discount_ends_at=bindparam("new_discount_ends_at"),
+                ),
+                sorted(rows, key=lambda row: row["product_id"])
+            )
+        return len(rows)
+
+    def refresh_boundaries(self, db: Session, now: Optional[datetime] = None) -> int:
+        """Пересчитывает товары акций, начавшихся или закончившихся с прошлой проверки"""
+        now = now or datetime.utcnow()
+        since, self._checked_at = self._checked_at, now
+        if since is None:
+            updated = self.recompute(db, now=now)
+        else:
+            product_ids = [
+                product_id for (product_id,) in db.query(PartnerPromotion.product_id).filter(
+                    PartnerPromotion.product_id.isnot(None),
+                    or_(
+                        PartnerPromotion.start_date.between(since, now),
+                        PartnerPromotion.end_date.between(since, now)
+                    )
+                ).distinct().all()
+            ]
+            updated = self.recompute(db, product_ids, now=now)
+        db.commit()
+        return updated
+
+    def _refresh_with_session(self) -> int:
+        from app.database import SessionLocal
+        db = SessionLocal()
+        try:
+            return self.refresh_boundaries(db)
+        finally:
+            db.close()
+
+    async def run_loop(self):
+        """Фоновая задача: учет начала и окончания акций каждые EFFECTIVE_PRICES_REFRESH_SECONDS секунд"""
+        while True:
+            try:
+                updated = await asyncio.to_thread(self._refresh_with_session)
+                if updated:
+                    print(f"🏷️  Цены со скидками пересчитаны: {updated} товаров")
+            except Exception as e:
+                print(f"⚠️  Ошибка пересчета цен со скидками: {e}")
+            await asyncio.sleep(settings.EFFECTIVE_PRICES_REFRESH_SECONDS)
+
+    def start(self):
+        """Запускает фоновую задачу (первый проход пересчитывает весь каталог)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run_loop())
+
+    async def stop(self):
+        """Останавливает фоновую задачу"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+# Глобальный экземпляр сервиса
+effective_prices = EffectivePrices()
@@ -0,0 +1,199 @@
+"""
+События для пользователей в реальном времени: подписки SSE и рассылка между воркерами
+"""
+import asyncio
+import json
+import select
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.metrics import metrics
+
+Deliver = Callable[[str], None]
+
+PG_CHANNEL = "vetcard_events"
+
+# Поля, которые остаются в событии, если оно не помещается в сообщение бэкенда
+BRIEF_FIELDS = ("id", "status")
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Форматирует событие Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+class LocalEventsBackend:
+    """Доставка только внутри процесса (один воркер)"""
+
+    MAX_PAYLOAD_BYTES: Optional[int] = None
+
+    def start(self, deliver: Deliver):
+        self._deliver = deliver
+
+    def publish(self, message: str):
+        self._deliver(message)
+
+    def stop(self):
+        pass
+
+
+class PostgresEventsBackend:
+    """
+    Рассылка между воркерами через LISTEN/NOTIFY PostgreSQL: событие уходит
+    в канал, и каждый воркер (включая отправителя) получает его своим
+    слушателем и доставляет своим подписчикам.
+    """
+
+    POLL_SECONDS = 1.0
+    # pg_notify принимает сообщения меньше 8000 байт
+    MAX_PAYLOAD_BYTES: Optional[int] = 7999
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def start(self, deliver: Deliver):
+        self._deliver = deliver
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._listen, name="events-listener", daemon=True)
+        self._thread.start()
+
+    def publish(self, message: str):
+        from app.database import engine
+        with engine.begin() as conn:
+            conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": PG_CHANNEL, "payload": message})
+
+    def _listen(self):
+        from app.database import engine
+        while not self._stopping.is_set():
+            raw = None
+            try:
+                raw = engine.raw_connection()
+                connection = raw.driver_connection
+                connection.autocommit = True
+                connection.cursor().execute(f"LISTEN {PG_CHANNEL}")
+                while not self._stopping.is_set():
+                    if select.select([connection], [], [], self.POLL_SECONDS) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        self._deliver(connection.notifies.pop(0).payload)
+            except Exception as e:
+                print(f"⚠️  Ошибка слушателя событий PostgreSQL: {e}")
+                self._stopping.wait(self.POLL_SECONDS)
+            finally:
+                if raw is not None:
+                    raw.invalidate()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.POLL_SECONDS * 2)
+            self._thread = None
+
+
+# Доступные бэкенды рассылки (settings.EVENTS_BACKEND)
+EVENTS_BACKENDS: Dict[str, Callable[[], Any]] = {
+    "local": LocalEventsBackend,
+    "postgres": PostgresEventsBackend,
+}
+
+
+class EventsHub:
+    """
+    Подписчики - открытые потоки SSE пользователя (очередь asyncio на каждый).
+    publish() вызывается из обработчиков после commit и из фоновых потоков;
+    сообщение проходит через бэкенд рассылки и доставляется в event loop
+    воркера. Если подписчик не успевает читать, старые события вытесняются.
+
+    События - подсказка клиенту обновить данные, а не надежная доставка:
+    пропущенное за время разрыва соединения нужно перечитать обычными запросами.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.backend = LocalEventsBackend()
+        self.backend.start(self._receive)
+        metrics.describe("vetcard_events_published_total", "События, отправленные пользователям")
+        metrics.register_gauge("vetcard_events_subscribers", lambda: sum(len(q) for q in self._subscribers.values()))
+
+    def start(self):
+        """Подключает бэкенд из настроек (вызывается при старте приложения)"""
+        self._loop = asyncio.get_running_loop()
+        backend_class = EVENTS_BACKENDS.get(settings.EVENTS_BACKEND)
+        if backend_class is None:
+            print(f"⚠️  Неизвестный EVENTS_BACKEND={settings.EVENTS_BACKEND}, используется local")
+            backend_class = LocalEventsBackend
+        self.backend = backend_class()
+        self.backend.start(self._receive)
+
+    def stop(self):
+        self.backend.stop()
+        self.backend = LocalEventsBackend()
+        self.backend.start(self._receive)
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        queues = self._subscribers.get(user_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[user_id]
+
+    def publish(self, user_ids: Iterable[int], event: str, data: Dict[str, Any]):
+        """Отправляет событие пользователям; ошибки рассылки не прерывают запрос"""
+        users = sorted({user_id for user_id in user_ids if user_id is not None})
+        if not users:
+            return
+        try:
+            for message in self._messages(users, event, data):
+                self.backend.publish(message)
+            metrics.inc("vetcard_events_published_total", len(users), event=event)
+        except Exception as e:
+            print(f"⚠️  Не удалось отправить событие {event}: {e}")
+
+    def _messages(self, users: list, event: str, data: Dict[str, Any]) -> Iterable[str]:
+        """
+        Сообщения для бэкенда в пределах MAX_PAYLOAD_BYTES: длинный список
+        получателей делится на части, а событие, не помещающееся и для одного
+        получателя (например, ответ с длинным текстом), уходит только с id и
+        статусом - остальное клиент перечитывает запросом.
+        """
+        message = json.dumps({"users": users, "event": event, "data": data}, ensure_ascii=False, default=str)
+        limit = self.backend.MAX_PAYLOAD_BYTES
+        if limit is None or len(message.encode()) <= limit:
+            return [message]
+        if len(users) > 1:
+            middle = len(users) // 2
+            return [*self._messages(users[:middle], event, data), *self._messages(users[middle:], event, data)]
+        brief = {key: data[key] for key in BRIEF_FIELDS if key in data}
+        return [json.dumps({"users": users, "event": event, "data": brief}, ensure_ascii=False, default=str)]
+
+    def _receive(self, message: str):
+        """Сообщение от бэкенда (из любого потока) -> доставка в event loop воркера"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._deliver, message)
+
+    def _deliver(self, message: str):
+        payload = json.loads(message)
+        event = {"event": payload["event"], "data": payload["data"]}
+        for user_id in payload["users"]:
+            for queue in self._subscribers.get(user_id, ()):
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(event)
+
+
+# Глобальный экземпляр хаба
+events_hub = EventsHub()
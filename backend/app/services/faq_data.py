@@ -0,0 +1,297 @@
+"""
+Проверенные ответы на частые вопросы владельцев питомцев.
+
+Используются FAQ-движком (faq_engine.py) для ответа без обращения к модели.
+У каждой записи несколько формулировок вопроса: индексируются именно они,
+поэтому добавляйте варианты так, как их пишут пользователи.
+"""
+
+FAQ_ENTRIES = [
+    {
+        "questions": [
+            "Когда делать первую прививку щенку?",
+            "Во сколько недель прививать щенка",
+            "График прививок для щенка",
+        ],
+        "answer": (
+            "Щенкам первую комплексную прививку (DHPPi) обычно делают в 6-8 недель, "
+            "вторую - в 10-12 недель, третью вместе с прививкой от бешенства - в 14-16 недель. "
+            "Дальше - ежегодная ревакцинация. За 10-14 дней до прививки проведите дегельминтизацию. "
+            "Точный график составит ветеринар с учетом здоровья щенка."
+        ),
+    },
+    {
+        "questions": [
+            "Когда делать первую прививку котенку?",
+            "Во сколько недель прививать котенка",
+            "График прививок для кошки",
+        ],
+        "answer": (
+            "Котятам первую комплексную прививку (FVRCP) делают в 8-9 недель, вторую - в 12 недель, "
+            "третью вместе с прививкой от бешенства - в 16 недель, затем ревакцинация раз в год. "
+            "Перед вакцинацией нужна дегельминтизация за 10-14 дней. График лучше согласовать с ветеринаром."
+        ),
+    },
+    {
+        "questions": [
+            "Как часто давать глистогонное?",
+            "Как часто проводить дегельминтизацию",
+            "Когда давать таблетки от глистов",
+        ],
+        "answer": (
+            "Взрослым собакам и кошкам дегельминтизацию обычно проводят раз в 3 месяца, "
+            "а также за 10-14 дней до каждой прививки. Щенкам и котятам - чаще, по схеме ветеринара. "
+            "Дозировка препарата зависит от веса питомца."
+        ),
+    },
+    {
+        "questions": [
+            "Как защитить собаку от клещей?",
+            "Средство от клещей и блох",
+            "Как обработать кошку от блох",
+        ],
+        "answer": (
+            "Для защиты от блох и клещей используют капли на холку, таблетки или ошейники. "
+            "Обработку проводят регулярно по инструкции препарата, особенно с весны до поздней осени. "
+            "После прогулок осматривайте шерсть, уши и подмышки. Клеща удаляйте целиком специальным "
+            "выкручивателем; если после укуса питомец вялый или отказывается от еды - срочно к ветеринару."
+        ),
+    },
+    {
+        "questions": [
+            "Сколько раз в день кормить собаку?",
+            "Как часто кормить взрослую собаку",
+            "Режим кормления собаки",
+        ],
+        "answer": (
+            "Взрослую собаку обычно кормят 2 раза в день, мелкие породы - 2-3 раза небольшими порциями. "
+            "Щенков до 3 месяцев кормят 4-5 раз в день, постепенно уменьшая число кормлений. "
+            "Вода должна быть в свободном доступе. Объем порции смотрите на упаковке корма и корректируйте по весу."
+        ),
+    },
+    {
+        "questions": [
+            "Сколько раз в день кормить кошку?",
+            "Как часто кормить кота",
+            "Сколько раз в день кормить кота",
+            "Режим кормления кошки",
+        ],
+        "answer": (
+            "Взрослую кошку кормят 2-3 раза в день, котят - 4-6 раз небольшими порциями. "
+            "Следите за суточной нормой корма по весу, держите чистую воду в нескольких местах. "
+            "Резкие смены корма делайте постепенно, за 7-10 дней."
+        ),
+    },
+    {
+        "questions": [
+            "Можно ли кормить собаку с общего стола?",
+            "Какие продукты нельзя давать собаке",
+            "Чем нельзя кормить кошку",
+        ],
+        "answer": (
+            "Еда со стола вредна для питомцев. Опасны: шоколад, виноград и изюм, лук и чеснок, "
+            "ксилит (заменитель сахара), алкоголь, кофе, трубчатые кости, жирное, соленое и острое. "
+            "Если питомец съел что-то из этого списка, сразу свяжитесь с ветеринаром."
+        ),
+    },
+    {
+        "questions": [
+            "Собака съела шоколад, что делать?",
+            "Кошка отравилась, что делать",
+            "Признаки отравления у собаки",
+        ],
+        "answer": (
+            "При подозрении на отравление срочно обратитесь к ветеринару: важна каждая минута. "
+            "Не вызывайте рвоту и не давайте лекарства без указания врача. Возьмите с собой упаковку "
+            "съеденного продукта или препарата. Тревожные признаки: рвота, слюнотечение, дрожь, судороги, вялость."
+        ),
+    },
+    {
+        "questions": [
+            "У собаки рвота, что делать?",
+            "Кошку тошнит",
+            "Питомца рвет несколько раз",
+        ],
+        "answer": (
+            "Однократная рвота без других симптомов бывает при переедании или поедании травы. "
+            "Уберите еду на несколько часов, оставьте воду. Срочно к ветеринару, если рвота повторяется, "
+            "в ней есть кровь, питомец вялый, отказывается пить или есть, или у него вздут живот."
+        ),
+    },
+    {
+        "questions": [
+            "У собаки понос, что делать?",
+            "Диарея у кошки",
+            "Жидкий стул у щенка",
+        ],
+        "answer": (
+            "При легкой диарее у взрослого питомца обеспечьте доступ к воде и легкую диету. "
+            "Обратитесь к ветеринару, если диарея длится больше суток, в стуле кровь, есть рвота, "
+            "температура или вялость. Щенков и котят с диареей показывайте врачу сразу: они быстро обезвоживаются."
+        ),
+    },
+    {
+        "questions": [
+            "Питомец отказывается от еды",
+            "Собака не ест",
+            "Кошка ничего не ест второй день",
+        ],
+        "answer": (
+            "Отказ от еды на один прием бывает из-за жары или стресса. Если собака не ест больше суток, "
+            "а кошка - больше 24 часов, или отказ сопровождается вялостью, рвотой, температурой, - "
+            "обратитесь к ветеринару. Для кошек длительное голодание особенно опасно из-за риска болезни печени."
+        ),
+    },
+    {
+        "questions": [
+            "Какая нормальная температура у собаки?",
+            "Нормальная температура тела кошки",
+            "Как измерить температуру питомцу",
+        ],
+        "answer": (
+            "Нормальная температура тела у собак - 37.5-39.0 °C (у щенков до 39.2 °C), "
+            "у кошек - 38.0-39.2 °C. Измеряют ректально детским электронным термометром. "
+            "Температура выше 39.5 °C или ниже 37.5 °C - повод обратиться к ветеринару."
+        ),
+    },
+    {
+        "questions": [
+            "Когда стерилизовать кошку?",
+            "В каком возрасте кастрировать кота",
+            "Стерилизация собаки возраст",
+        ],
+        "answer": (
+            "Кошек и котов обычно стерилизуют с 5-6 месяцев. Собак мелких пород - с 6-9 месяцев, "
+            "крупных - по решению ветеринара, часто после окончания роста. Стерилизация снижает риск "
+            "опухолей и воспалений репродуктивных органов. Перед операцией нужен осмотр и анализы."
+        ),
+    },
+    {
+        "questions": [
+            "Как часто мыть собаку?",
+            "Как часто купать кошку",
+            "Можно ли часто мыть собаку шампунем",
+        ],
+        "answer": (
+            "Собак моют по мере загрязнения, в среднем раз в 1-2 месяца, специальным шампунем для животных. "
+            "Кошки обычно справляются сами, купание нужно редко. Частое мытье сушит кожу. "
+            "Лапы после прогулки достаточно протирать или ополаскивать водой."
+        ),
+    },
+    {
+        "questions": [
+            "Как ухаживать за зубами собаки?",
+            "Нужно ли чистить зубы кошке",
+            "Неприятный запах изо рта у собаки",
+        ],
+        "answer": (
+            "Зубы питомцу чистят 2-3 раза в неделю специальной пастой для животных (человеческая не подходит). "
+            "Помогают жевательные лакомства и игрушки. Неприятный запах, налет, покраснение десен - "
+            "повод показать питомца ветеринару: может понадобиться санация ротовой полости."
+        ),
+    },
+    {
+        "questions": [
+            "Как стричь когти собаке?",
+            "Как часто подстригать когти кошке",
+        ],
+        "answer": (
+            "Когти подстригают когтерезом примерно раз в 2-4 недели, срезая только прозрачный кончик, "
+            "не задевая розовую часть с сосудом. Кошкам нужна когтеточка. Если боитесь навредить, "
+            "попросите ветеринара или грумера показать технику."
+        ),
+    },
+    {
+        "questions": [
+            "Сколько гулять с собакой?",
+            "Как часто выгуливать собаку",
+        ],
+        "answer": (
+            "Взрослую собаку выгуливают минимум 2 раза в день, в сумме от 1 до 2 часов в зависимости от породы "
+            "и возраста. Активным породам нужны игры и нагрузки. Щенков после полного курса прививок и карантина "
+            "выгуливают чаще, но короче."
+        ),
+    },
+    {
+        "questions": [
+            "Тепловой удар у собаки",
+            "Собаке жарко, как помочь",
+            "Можно ли оставлять собаку в машине летом",
+        ],
+        "answer": (
+            "Никогда не оставляйте питомца в закрытой машине: температура там быстро становится смертельной. "
+            "Признаки перегрева: частое дыхание с высунутым языком, слабость, рвота. Переместите питомца в тень, "
+            "смочите прохладной (не ледяной) водой, дайте попить и срочно свяжитесь с ветеринаром."
+        ),
+    },
+    {
+        "questions": [
+            "Когда нужно срочно к ветеринару?",
+            "Экстренные симптомы у собаки",
+            "Опасные признаки у кошки",
+        ],
+        "answer": (
+            "Срочно обращайтесь к ветеринару, если у питомца: затрудненное дыхание, судороги, "
+            "потеря сознания, кровотечение, вздутый твердый живот, невозможность помочиться, "
+            "травма после падения или ДТП, подозрение на отравление, многократная рвота."
+        ),
+    },
+    {
+        "questions": [
+            "Кот не ходит в туалет",
+            "Кошка часто ходит в лоток по чуть-чуть",
+            "Кровь в моче у кота",
+        ],
+        "answer": (
+            "Частые походы в лоток с малым количеством мочи, кровь в моче или безуспешные попытки помочиться - "
+            "признаки цистита или мочекаменной болезни. У котов закупорка уретры опасна для жизни: "
+            "если кот не может помочиться больше 12 часов, это экстренная ситуация, срочно к ветеринару."
+        ),
+    },
+    {
+        "questions": [
+            "Сколько живут собаки?",
+            "Продолжительность жизни кошки",
+        ],
+        "answer": (
+            "Собаки в среднем живут 10-15 лет: мелкие породы дольше, крупные - меньше. "
+            "Кошки живут 12-18 лет. На продолжительность жизни влияют питание, вес, "
+            "профилактика (прививки, обработки) и ежегодные осмотры у ветеринара."
+        ),
+    },
+    {
+        "questions": [
+            "Как часто нужен осмотр у ветеринара?",
+            "Как часто водить собаку к ветеринару",
+            "Плановый осмотр кошки",
+        ],
+        "answer": (
+            "Здоровых взрослых питомцев показывают ветеринару раз в год, пожилых (старше 7-8 лет) - "
+            "раз в полгода с анализами крови. Плановый визит удобно совместить с ежегодной прививкой."
+        ),
+    },
+    {
+        "questions": [
+            "Как подготовить питомца к перевозке?",
+            "Перевозка собаки в самолете",
+            "Документы для поездки с кошкой",
+        ],
+        "answer": (
+            "Для поездок нужен ветеринарный паспорт с отметкой о прививке от бешенства (не позднее чем за 21 день "
+            "и не раньше года до поездки), при выезде за границу - чип и ветеринарная справка. "
+            "Приучите питомца к переноске заранее, не кормите плотно за 3-4 часа до дороги."
+        ),
+    },
+    {
+        "questions": [
+            "Как приучить котенка к лотку?",
+            "Котенок ходит мимо лотка",
+        ],
+        "answer": (
+            "Поставьте лоток в тихом доступном месте и сажайте котенка туда после сна и еды. "
+            "Используйте наполнитель, к которому он привык, убирайте лоток ежедневно. "
+            "Не ругайте за промахи: место «ошибки» обработайте средством от запаха. "
+            "Если взрослая кошка перестала ходить в лоток, исключите болезни у ветеринара."
+        ),
+    },
+]
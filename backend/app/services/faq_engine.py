@@ -0,0 +1,253 @@
+"""
+Локальный поиск ответов по частым вопросам и статьям (без обращения к модели)
+"""
+import asyncio
+import re
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+import numpy as np
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.faq_data import FAQ_ENTRIES
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Служебные слова не несут смысла вопроса и только зашумляют близость
+_STOP_WORDS = frozenset("""
+а без бы в во вот все всё где да для до его ее её если есть же за и из или им к как
+какая какие какой ли либо мне мой моя мое моё мои мы на над не нет но ну о об от по
+под при про с со так там то только у уже чем что чтобы это этот я ты вы он она оно они
+можно нужно надо делать сделать почему когда сколько зачем ли ещё еще очень
+""".split())
+
+
+class FaqIndex:
+    """
+    Неизменяемый TF-IDF индекс по хешированным символьным n-граммам.
+
+    Матрица документов хранится в разреженном виде (row_ids/indices/data
+    в массивах NumPy), поиск - одно векторное умножение по ненулевым элементам.
+    Символьные n-граммы устойчивы к падежам и опечаткам, что важно для русского текста.
+    """
+
+    def __init__(self, documents: List[Dict[str, Any]], n_features: int, ngram_sizes=(3, 4, 5)):
+        self.documents = documents
+        self.n_features = n_features
+        self.ngram_sizes = ngram_sizes
+
+        rows, indices, counts = [], [], []
+        for row, doc in enumerate(documents):
+            features, feature_counts = self._features(doc["text"])
+            rows.append(np.full(len(features), row, dtype=np.int32))
+            indices.append(features)
+            counts.append(feature_counts)
+
+        n_docs = len(documents)
+        self.row_ids = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int32)
+        self.indices = np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64)
+        tf = np.concatenate(counts) if counts else np.zeros(0, dtype=np.float32)
+
+        # Сглаженный IDF, как в scikit-learn
+        doc_freq = np.bincount(self.indices, minlength=n_features).astype(np.float32)
+        self.idf = np.log((1 + n_docs) / (1 + doc_freq)).astype(np.float32) + 1.0
+
+        # Сублинейный TF * IDF, затем L2-нормировка строк
+        data = (1.0 + np.log(tf)) * self.idf[self.indices]
+        norms = np.sqrt(np.bincount(self.row_ids, weights=data * data, minlength=n_docs))
+        norms[norms == 0] = 1.0
+        self.data = (data / norms[self.row_ids]).astype(np.float32)
+
+    def _features(self, text: str):
+        """Хешированные n-граммы текста и их количество"""
+        text = text.lower().replace("ё", "е")
+        hashes = []
+        for word in _WORD_RE.findall(text):
+            if word in _STOP_WORDS:
+                continue
+            padded = f" {word} "
+            hashes.append(zlib.crc32(word.encode("utf-8")))
+            for n in self.ngram_sizes:
+                for i in range(len(padded) - n + 1):
+                    hashes.append(zlib.crc32(padded[i:i + n].encode("utf-8")))
+        if not hashes:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        features, feature_counts = np.unique(
+            np.asarray(hashes, dtype=np.int64) % self.n_features,
+            return_counts=True
+        )
+        return features, feature_counts.astype(np.float32)
+
+    def search(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
+        """Документы, наиболее похожие на запрос (косинусная близость)"""
+        if not self.documents:
+            return []
+        features, feature_counts = self._features(query)
+        if len(features) == 0:
+            return []
+
+        query_weights = (1.0 + np.log(feature_counts)) * self.idf[features]
+        query_weights /= np.linalg.norm(query_weights) or 1.0
+        query_vector = np.zeros(self.n_features, dtype=np.float32)
+        query_vector[features] = query_weights
+
+        scores = np.bincount(
+            self.row_ids,
+            weights=self.data * query_vector[self.indices],
+            minlength=len(self.documents)
+        )
+
+        top = np.argsort(-scores)[:top_k * 4]
+        results, seen = [], set()
+        for row in top:
+            doc = self.documents[row]
+            # Несколько формулировок одного вопроса - один результат
+            if doc["key"] in seen or scores[row] <= 0:
+                continue
+            seen.add(doc["key"])
+            results.append({**doc, "score": float(scores[row])})
+            if len(results) == top_k:
+                break
+        return results
+
+
+class FaqEngine:
+    """
+    Отвечает на частые вопросы без модели.
+
+    Индекс строится из проверенных ответов (faq_data.py) и опубликованных статей.
+    Сначала доступен индекс только по FAQ (строится мгновенно), полный индекс
+    со статьями перестраивается в фоне при старте, после изменения статей
+    и раз в AI_FAQ_REFRESH_INTERVAL_SECONDS секунд.
+    """
+
+    ARTICLE_TEXT_MAX_CHARS = 2000
+    ARTICLE_ANSWER_MAX_CHARS = 400
+    # Как часто фоновая задача проверяет, не устарел ли индекс
+    REFRESH_CHECK_SECONDS = 5.0
+
+    def __init__(self, n_features: int = 2 ** 18):
+        self.n_features = n_features
+        self._lock = threading.Lock()
+        self._index: Optional[FaqIndex] = None
+        self._built_at: Optional[float] = None
+        self._dirty = True
+
+        metrics.describe("vetcard_ai_faq_answers_total", "Ответы AI ассистента из локального FAQ")
+
+    def invalidate(self):
+        """Помечает индекс устаревшим (например, после изменения статей)"""
+        self._dirty = True
+
+    def needs_rebuild(self) -> bool:
+        if self._dirty or self._built_at is None:
+            return True
+        return time.monotonic() - self._built_at >= settings.AI_FAQ_REFRESH_INTERVAL_SECONDS
+
+    def rebuild(self, db=None):
+        """Перестраивает индекс; статьи загружаются из БД, если передана сессия"""
+        self._dirty = False
+        documents = self._faq_documents()
+        if db is not None:
+            documents += self._article_documents(db)
+        index = FaqIndex(documents, self.n_features)
+        with self._lock:
+            self._index = index
+            self._built_at = time.monotonic()
+
+    def rebuild_from_db(self):
+        """Перестраивает индекс в отдельной сессии БД (для фоновой задачи)"""
+        from app.database import SessionLocal
+        db = SessionLocal()
+        try:
+            self.rebuild(db)
+        finally:
+            db.close()
+
+    async def refresh_loop(self):
+        """Фоновая задача: перестраивает индекс при старте, после изменения статей и по расписанию"""
+        while True:
+            if self.needs_rebuild():
+                started = time.perf_counter()
+                try:
+                    # Построение индекса - работа CPU и запросы к БД, не блокируем event loop
+                    await asyncio.to_thread(self.rebuild_from_db)
+                    print(f"✅ Индекс FAQ перестроен: {len(self._index.documents)} документов за {time.perf_counter() - started:.2f} с")
+                except Exception as e:
+                    self._dirty = True
+                    print(f"⚠️  Не удалось перестроить индекс FAQ: {e}")
+            await asyncio.sleep(self.REFRESH_CHECK_SECONDS)
+
+    def search(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
+        """Ищет ответы на вопрос; у каждого результата есть score от 0 до 1"""
+        if self._index is None:
+            # Первый запрос до фонового построения: индекс только по FAQ
+            with self._lock:
+                if self._index is None:
+                    self._index = FaqIndex(self._faq_documents(), self.n_features)
+        return self._index.search(query, top_k)
+
+    def best_answer(self, query: str, min_score: float) -> Optional[Dict[str, Any]]:
+        """Лучший ответ, если его близость к вопросу не ниже min_score"""
+        if not settings.AI_FAQ_ENABLED:
+            return None
+        results = self.search(query, top_k=1)
+        if results and results[0]["score"] >= min_score:
+            return results[0]
+        return None
+
+    @staticmethod
+    def format_answer(match: Dict[str, Any]) -> str:
+        """Текст ответа для пользователя"""
+        if match["source"] == "faq":
+            return match["answer"]
+        return f"{match['answer']}\n\nПодробнее - в статье «{match['title']}»."
+
+    def _faq_documents(self) -> List[Dict[str, Any]]:
+        documents = []
+        for number, entry in enumerate(FAQ_ENTRIES):
+            for question in entry["questions"]:
+                documents.append({
+                    "key": f"faq:{number}",
+                    "source": "faq",
+                    "title": entry["questions"][0],
+                    "text": question,
+                    "answer": entry["answer"],
+                })
+        return documents
+
+    def _article_documents(self, db) -> List[Dict[str, Any]]:
+        # Импорт здесь, чтобы модуль можно было использовать без загрузки моделей
+        from app.models.article import Article
+        from app.models.vet_cabinet import VetArticle
+
+        documents = []
+        vet_articles = db.query(
+            VetArticle.id, VetArticle.title, VetArticle.excerpt, VetArticle.content
+        ).filter(VetArticle.is_published == True).all()
+        articles = db.query(
+            Article.id, Article.title, Article.excerpt, Article.content
+        ).all()
+
+        for prefix, rows in (("vet_article", vet_articles), ("article", articles)):
+            for row in rows:
+                body = row.content or row.excerpt or ""
+                if not body and not row.title:
+                    continue
+                answer = row.excerpt or body
+                if len(answer) > self.ARTICLE_ANSWER_MAX_CHARS:
+                    answer = answer[:self.ARTICLE_ANSWER_MAX_CHARS].rsplit(" ", 1)[0] + "…"
+                documents.append({
+                    "key": f"{prefix}:{row.id}",
+                    "source": prefix,
+                    "title": row.title,
+                    # Заголовок повторяем, чтобы он весил больше текста статьи
+                    "text": f"{row.title}. {row.title}. {(row.excerpt or '')} {body[:self.ARTICLE_TEXT_MAX_CHARS]}",
+                    "answer": answer,
+                })
+        return documents
+
+
+# Глобальный экземпляр движка
+faq_engine = FaqEngine()
@@ -0,0 +1,152 @@
+"""
+Поиск партнеров рядом с точкой: сетка координат в БД и векторный расчет расстояний
+"""
+import math
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.models.partner_cabinet import PartnerLocation
+from app.models.user import User, Profile
+from app.services.partner_hours import partner_hours
+
+EARTH_RADIUS_KM = 6371.0088
+# Размер ячейки сетки в градусах (~5.5 км по широте)
+CELL_DEGREES = 0.05
+GRID_ROWS = int(math.ceil(180 / CELL_DEGREES))
+GRID_COLUMNS = int(math.ceil(360 / CELL_DEGREES))
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def _row(latitude: float) -> int:
+    return min(GRID_ROWS - 1, max(0, int((latitude + 90) // CELL_DEGREES)))
+
+
+def _column(longitude: float) -> int:
+    return int(((longitude + 180) % 360) // CELL_DEGREES) % GRID_COLUMNS
+
+
+def grid_cell(latitude: float, longitude: float) -> int:
+    """Номер ячейки сетки: строка по широте * число столбцов + столбец по долготе"""
+    return _row(latitude) * GRID_COLUMNS + _column(longitude)
+
+
+def haversine_km(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Расстояния по поверхности Земли от точки до массива точек, км"""
+    lat1, lon1 = math.radians(latitude), math.radians(longitude)
+    lat2, lon2 = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class PartnerGeo:
+    """
+    Поиск по сетке: у каждой геолокации хранится номер ячейки (grid_cell, индекс).
+    Круг поиска покрывается диапазонами ячеек по строкам сетки, кандидаты из
+    этих ячеек читаются по индексу, точные расстояния считаются векторно.
+    """
+
+    @staticmethod
+    def cell_ranges(latitude: float, longitude: float, radius_km: float) -> List[Tuple[int, int]]:
+        """Диапазоны номеров ячеек (включительно), покрывающие круг радиуса radius_km"""
+        lat_delta = radius_km / KM_PER_DEGREE
+        first_row, last_row = _row(latitude - lat_delta), _row(latitude + lat_delta)
+        # Долгота сжимается к полюсам: берем самую широкую по долготе широту круга
+        widest = min(89.9, max(abs(latitude - lat_delta), abs(latitude + lat_delta)))
+        lon_delta = radius_km / (KM_PER_DEGREE * math.cos(math.radians(widest)))
+
+        if lon_delta >= 180:
+            column_spans = [(0, GRID_COLUMNS - 1)]
+        else:
+            first_column, last_column = _column(longitude - lon_delta), _column(longitude + lon_delta)
+            if first_column <= last_column:
+                column_spans = [(first_column, last_column)]
+            else:
+                # Круг пересекает меридиан 180°
+                column_spans = [(first_column, GRID_COLUMNS - 1), (0, last_column)]
+
+        return [
+            (row * GRID_COLUMNS + first, row * GRID_COLUMNS + last)
+            for row in range(first_row, last_row + 1)
+            for first, last in column_spans
+        ]
+
+    @staticmethod
+    def assign_cell(location: PartnerLocation):
+        location.grid_cell = grid_cell(location.latitude, location.longitude)
+
+    @staticmethod
+    def backfill_cells(db: Session) -> int:
+        """Заполняет grid_cell у геолокаций, сохраненных до появления колонки"""
+        locations = db.query(PartnerLocation).filter(PartnerLocation.grid_cell.is_(None)).all()
+        for location in locations:
+            PartnerGeo.assign_cell(location)
+        db.commit()
+        return len(locations)
+
+    def nearby(
+        self,
+        db: Session,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        limit: int,
+        offset: int = 0,
+        open_at: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Партнеры в радиусе radius_km, от ближних к дальним; open_at - только открытые в этот момент"""
+        ranges = self.cell_ranges(latitude, longitude, radius_km)
+        query = db.query(
+            PartnerLocation.partner_id, PartnerLocation.latitude, PartnerLocation.longitude
+        ).join(
+            User, User.id == PartnerLocation.partner_id
+        ).filter(
+            or_(*(PartnerLocation.grid_cell.between(first, last) for first, last in ranges)),
+            User.is_active == True
+        )
+        if open_at is not None:
+            query = query.filter(PartnerLocation.partner_id.in_(partner_hours.open_partner_ids(open_at)))
+        rows = query.all()
+
+        result = {"total": 0, "items": []}
+        if not rows:
+            return result
+
+        partner_ids = np.fromiter((row.partner_id for row in rows), dtype=np.int64, count=len(rows))
+        latitudes = np.fromiter((row.latitude for row in rows), dtype=np.float64, count=len(rows))
+        longitudes = np.fromiter((row.longitude for row in rows), dtype=np.float64, count=len(rows))
+        distances = haversine_km(latitude, longitude, latitudes, longitudes)
+
+        inside = np.flatnonzero(distances <= radius_km)
+        # Сортировка по расстоянию, при равенстве - по id партнера
+        order = inside[np.lexsort((partner_ids[inside], distances[inside]))]
+        result["total"] = int(len(order))
+        page = order[offset:offset + limit]
+        if not len(page):
+            return result
+
+        page_ids = partner_ids[page].tolist()
+        details = {
+            location.partner_id: (location, profile)
+            for location, profile in db.query(PartnerLocation, Profile).outerjoin(
+                Profile, Profile.user_id == PartnerLocation.partner_id
+            ).filter(PartnerLocation.partner_id.in_(page_ids)).all()
+        }
+        for partner_id, distance in zip(page_ids, distances[page].tolist()):
+            location, profile = details[partner_id]
+            result["items"].append({
+                "partner_id": partner_id,
+                "name": (profile.name_of_organization or profile.clinic) if profile else None,
+                "type": profile.type if profile else None,
+                "phone": profile.phone if profile else None,
+                "address": location.address,
+                "latitude": location.latitude,
+                "longitude": location.longitude,
+                "distance_km": round(distance, 3),
+            })
+        return result
+
+
+# Глобальный экземпляр сервиса
+partner_geo = PartnerGeo()
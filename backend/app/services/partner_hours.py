@@ -0,0 +1,219 @@
+"""
+Время работы партнеров в минутах недели: "открыто сейчас" без разбора графика по дням
+"""
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, exists, insert, select, union
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.partner_cabinet import PartnerSchedule, PartnerScheduleException, PartnerOpenInterval
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+DAY_NAMES = ["понедельник", "вторник", "среда", "четверг", "пятница", "суббота", "воскресенье"]
+
+
+def minute_of_week(moment: datetime) -> int:
+    """Минута недели: понедельник 00:00 = 0"""
+    return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+def _day_intervals(schedules: Iterable[Any]) -> List[Tuple[int, int, int]]:
+    """
+    (start, end, day_of_week) рабочих дней, по началу. Закрытие не позже открытия означает
+    работу после полуночи, поэтому end может выходить за конец недели.
+    """
+    intervals = []
+    for schedule in schedules:
+        if schedule.is_closed or schedule.open_time is None or schedule.close_time is None:
+            continue
+        day_start = schedule.day_of_week * MINUTES_PER_DAY
+        start = day_start + schedule.open_time.hour * 60 + schedule.open_time.minute
+        end = day_start + schedule.close_time.hour * 60 + schedule.close_time.minute
+        if end <= start:
+            end += MINUTES_PER_DAY
+        intervals.append((start, end, schedule.day_of_week))
+    return sorted(intervals)
+
+
+def week_intervals(schedules: Iterable[Any]) -> List[Tuple[int, int]]:
+    """
+    Интервалы [start, end) минут недели из графика по дням, отсортированные и слитые;
+    интервал, переходящий через конец воскресенья, делится на два.
+    """
+    raw = []
+    for start, end, _ in _day_intervals(schedules):
+        if end > MINUTES_PER_WEEK:
+            raw.append((start, MINUTES_PER_WEEK))
+            raw.append((0, end - MINUTES_PER_WEEK))
+        else:
+            raw.append((start, end))
+
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(raw):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def schedule_error(schedules: List[Any]) -> Optional[str]:
+    """Причина, по которой график недели некорректен, или None"""
+    days = [schedule.day_of_week for schedule in schedules]
+    if any(day < 0 or day > 6 for day in days):
+        return "День недели должен быть от 0 (понедельник) до 6 (воскресенье)"
+    if len(set(days)) != len(days):
+        return "День недели указан несколько раз"
+    for schedule in schedules:
+        if schedule.is_closed:
+            continue
+        if schedule.open_time is None or schedule.close_time is None:
+            return f"Для рабочего дня ({DAY_NAMES[schedule.day_of_week]}) укажите время открытия и закрытия"
+        if schedule.open_time == schedule.close_time:
+            return f"Время открытия и закрытия совпадают ({DAY_NAMES[schedule.day_of_week]})"
+
+    # Работа после полуночи не должна заходить на часы следующего дня
+    intervals = _day_intervals(schedules)
+    pairs = list(zip(intervals, intervals[1:]))
+    if len(intervals) > 1:
+        last = intervals[-1]
+        pairs.append(((last[0] - MINUTES_PER_WEEK, last[1] - MINUTES_PER_WEEK, last[2]), intervals[0]))
+    for previous, following in pairs:
+        if following[0] < previous[1]:
+            return (
+                f"Часы работы пересекаются: {DAY_NAMES[previous[2]]} "
+                f"заканчивается после открытия ({DAY_NAMES[following[2]]})"
+            )
+    return None
+
+
+def exception_error(exceptions: List[Any]) -> Optional[str]:
+    """Причина, по которой особые даты некорректны, или None"""
+    if len(exceptions) > settings.PARTNER_SCHEDULE_MAX_EXCEPTIONS:
+        return f"Не больше {settings.PARTNER_SCHEDULE_MAX_EXCEPTIONS} особых дат за запрос"
+    dates = [exception.exception_date for exception in exceptions]
+    if len(set(dates)) != len(dates):
+        return "Особая дата указана несколько раз"
+    for exception in exceptions:
+        if exception.is_closed:
+            continue
+        if exception.open_time is None or exception.close_time is None:
+            return f"Для рабочей особой даты {exception.exception_date} укажите время открытия и закрытия"
+        if exception.open_time >= exception.close_time:
+            return f"Часы работы в особую дату {exception.exception_date} должны быть в пределах одних суток"
+    return None
+
+
+def _upsert(db: Session, model, rows: List[Dict[str, Any]], keys: List[str]):
+    """Многострочный INSERT ... ON CONFLICT (keys) DO UPDATE одной командой"""
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(model).values(rows)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=keys,
+        set_={column: statement.excluded[column] for column in rows[0] if column not in keys}
+    ))
+
+
+class PartnerHours:
+    """
+    Пересчет интервалов работы и фильтр "открыт в момент времени" для запросов.
+
+    Особая дата (PartnerScheduleException) заменяет график на все календарные
+    сутки, включая продолжение работы предыдущего дня после полуночи.
+    """
+
+    @staticmethod
+    def rebuild(db: Session, partner_id: int):
+        """Пересчитывает интервалы партнера из его графика (в текущей транзакции, без commit)"""
+        schedules = db.query(PartnerSchedule).filter(PartnerSchedule.partner_id == partner_id).all()
+        db.execute(delete(PartnerOpenInterval).where(PartnerOpenInterval.partner_id == partner_id))
+        intervals = week_intervals(schedules)
+        if intervals:
+            db.execute(insert(PartnerOpenInterval), [
+                {"partner_id": partner_id, "start_minute": start, "end_minute": end}
+                for start, end in intervals
+            ])
+
+    def backfill(self, db: Session) -> int:
+        """Считает интервалы для партнеров с графиком, у которых их еще нет"""
+        partner_ids = [
+            partner_id for (partner_id,) in db.query(PartnerSchedule.partner_id).filter(
+                ~exists().where(PartnerOpenInterval.partner_id == PartnerSchedule.partner_id)
+            ).distinct().all()
+        ]
+        for partner_id in partner_ids:
+            self.rebuild(db, partner_id)
+        db.commit()
+        return len(partner_ids)
+
+    def save_week(
+        self,
+        db: Session,
+        partner_id: int,
+        days: List[Dict[str, Any]],
+        exceptions: List[Dict[str, Any]],
+        replace: bool
+    ):
+        """
+        Сохраняет дни недели и особые даты одним многострочным upsert на таблицу
+        и пересчитывает интервалы; replace=True удаляет неуказанные дни и даты.
+        Коммит - за вызывающим.
+        """
+        if days:
+            _upsert(db, PartnerSchedule, [{"partner_id": partner_id, **day} for day in days], ["partner_id", "day_of_week"])
+        if exceptions:
+            _upsert(
+                db, PartnerScheduleException,
+                [{"partner_id": partner_id, **exception} for exception in exceptions],
+                ["partner_id", "exception_date"]
+            )
+        if replace:
+            db.execute(delete(PartnerSchedule).where(
+                PartnerSchedule.partner_id == partner_id,
+                PartnerSchedule.day_of_week.notin_([day["day_of_week"] for day in days])
+            ))
+            db.execute(delete(PartnerScheduleException).where(
+                PartnerScheduleException.partner_id == partner_id,
+                PartnerScheduleException.exception_date.notin_([e["exception_date"] for e in exceptions])
+            ))
+        self.rebuild(db, partner_id)
+
+    @staticmethod
+    def week(db: Session, partner_id: int, date_from: Optional[date] = None) -> Dict[str, Any]:
+        """Дни недели и особые даты партнера (особые даты - начиная с date_from)"""
+        exceptions = db.query(PartnerScheduleException).filter(PartnerScheduleException.partner_id == partner_id)
+        if date_from is not None:
+            exceptions = exceptions.filter(PartnerScheduleException.exception_date >= date_from)
+        return {
+            "days": db.query(PartnerSchedule).filter(
+                PartnerSchedule.partner_id == partner_id
+            ).order_by(PartnerSchedule.day_of_week).all(),
+            "exceptions": exceptions.order_by(PartnerScheduleException.exception_date).all(),
+        }
+
+    @staticmethod
+    def open_partner_ids(moment: Optional[datetime] = None):
+        """Подзапрос id партнеров, открытых в момент moment (местное время; по умолчанию - сейчас)"""
+        moment = moment or datetime.now()
+        minute = minute_of_week(moment)
+        weekly = select(PartnerOpenInterval.partner_id).where(
+            PartnerOpenInterval.start_minute <= minute,
+            PartnerOpenInterval.end_minute > minute,
+            ~exists().where(
+                PartnerScheduleException.partner_id == PartnerOpenInterval.partner_id,
+                PartnerScheduleException.exception_date == moment.date()
+            )
+        )
+        special = select(PartnerScheduleException.partner_id).where(
+            PartnerScheduleException.exception_date == moment.date(),
+            PartnerScheduleException.is_closed == False,
+            PartnerScheduleException.open_time <= moment.time(),
+            PartnerScheduleException.close_time > moment.time()
+        )
+        return union(weekly, special)
+
+
+# Глобальный экземпляр сервиса
+partner_hours = PartnerHours()
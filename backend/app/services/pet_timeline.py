@@ -0,0 +1,129 @@
+"""
+Лента событий питомца: записи к ветеринару, консультации и напоминания
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import DateTime, String, Text, and_, case, cast, literal, null, or_, select, type_coerce, union_all
+from sqlalchemy.orm import Session
+from app.models.pet import Pet
+from app.models.reminder import Reminder
+from app.models.vet_cabinet import VetAppointment, VetConsultation
+
+Cursor = Tuple[datetime, str, int]
+
+
+class InvalidCursor(ValueError):
+    """Курсор не удалось разобрать"""
+
+
+class PetTimelineService:
+    """
+    Страница ленты одним запросом UNION ALL.
+
+    Порядок - от новых событий к старым по (event_at, kind, id). Каждая ветка
+    читает не больше limit + 1 строк по своему индексу (pet_id, дата) начиная
+    с курсора, поэтому стоимость страницы не зависит от длины истории питомца.
+    """
+
+    DEFAULT_LIMIT = 20
+    MAX_LIMIT = 100
+
+    @staticmethod
+    def encode_cursor(item: Dict[str, Any]) -> str:
+        raw = json.dumps([item["event_at"].isoformat(), item["kind"], item["id"]])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Cursor:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            event_at, kind, item_id = json.loads(raw)
+            return datetime.fromisoformat(event_at), str(kind), int(item_id)
+        except (ValueError, TypeError) as e:
+            raise InvalidCursor(str(e)) from e
+
+    @staticmethod
+    def _reminder_event_at(db: Session):
+        """Дата напоминания как datetime начала дня, сравнимая с остальными ветками"""
+        if db.get_bind().dialect.name == "sqlite":
+            # В SQLite DateTime хранится строкой с микросекундами, CAST дал бы число
+            return type_coerce(type_coerce(Reminder.date_assistant, String) + " 00:00:00.000000", DateTime)
+        return cast(Reminder.date_assistant, DateTime)
+
+    @staticmethod
+    def _before(position: Cursor, kind: str, event_at, id_column):
+        """Условие "после курсора" в порядке (event_at, kind, id) по убыванию для ветки с постоянным kind"""
+        cursor_at, cursor_kind, cursor_id = position
+        if kind < cursor_kind:
+            return event_at <= cursor_at
+        if kind > cursor_kind:
+            return event_at < cursor_at
+        return or_(event_at < cursor_at, and_(event_at == cursor_at, id_column < cursor_id))
+
+    def page(self, db: Session, pet: Pet, cursor: Optional[str] = None, limit: int = DEFAULT_LIMIT) -> Dict[str, Any]:
+        """Возвращает {"items": [...], "next_cursor": str | None}"""
+        limit = max(1, min(limit, self.MAX_LIMIT))
+        position = self.decode_cursor(cursor) if cursor else None
+
+        appointments = select(
+            literal("appointment", String).label("kind"),
+            VetAppointment.id.label("id"),
+            VetAppointment.appointment_date.label("event_at"),
+            VetAppointment.reason.label("title"),
+            VetAppointment.status.label("status"),
+            type_coerce(VetAppointment.notes, Text).label("details"),
+            VetAppointment.vet_id.label("vet_id")
+        ).where(VetAppointment.pet_id == pet.id)
+
+        consultations = select(
+            literal("consultation", String).label("kind"),
+            VetConsultation.id.label("id"),
+            VetConsultation.created_at.label("event_at"),
+            type_coerce(VetConsultation.question, String).label("title"),
+            VetConsultation.status.label("status"),
+            VetConsultation.answer.label("details"),
+            VetConsultation.vet_id.label("vet_id")
+        ).where(VetConsultation.pet_id == pet.id)
+
+        reminder_event_at = self._reminder_event_at(db)
+        reminders = select(
+            literal("reminder", String).label("kind"),
+            Reminder.id.label("id"),
+            reminder_event_at.label("event_at"),
+            Reminder.assistant_sms.label("title"),
+            case((Reminder.status == True, "planned"), else_="done").label("status"),
+            type_coerce(null(), Text).label("details"),
+            type_coerce(null(), Reminder.id.type).label("vet_id")
+        ).where(or_(
+            Reminder.pet_id == pet.id,
+            # Напоминания, созданные до появления pet_id, связаны с питомцем по имени
+            and_(Reminder.pet_id.is_(None), Reminder.user_id == pet.user_id, Reminder.animal_name == pet.name)
+        ))
+
+        branches = []
+        for branch, kind, event_at, id_column, index_column in (
+            (appointments, "appointment", VetAppointment.appointment_date, VetAppointment.id, VetAppointment.appointment_date),
+            (consultations, "consultation", VetConsultation.created_at, VetConsultation.id, VetConsultation.created_at),
+            (reminders, "reminder", reminder_event_at, Reminder.id, Reminder.date_assistant),
+        ):
+            if position is not None:
+                branch = branch.where(self._before(position, kind, event_at, id_column))
+                if index_column is Reminder.date_assistant:
+                    # Граница по самой колонке, чтобы работал индекс (pet_id, date_assistant)
+                    branch = branch.where(Reminder.date_assistant <= position[0].date())
+            branches.append(branch.order_by(index_column.desc(), id_column.desc()).limit(limit + 1).subquery())
+
+        timeline = union_all(*(select(*b.c) for b in branches)).subquery("timeline")
+        rows = db.execute(select(timeline).order_by(
+            timeline.c.event_at.desc(), timeline.c.kind.desc(), timeline.c.id.desc()
+        ).limit(limit + 1)).mappings().all()
+
+        items: List[Dict[str, Any]] = [dict(row) for row in rows[:limit]]
+        next_cursor = self.encode_cursor(items[-1]) if len(rows) > limit else None
+        return {"items": items, "next_cursor": next_cursor}
+
+
+# Глобальный экземпляр сервиса
+pet_timeline_service = PetTimelineService()
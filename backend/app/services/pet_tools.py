@@ -3,6 +3,7 @@
 """
 from typing import List, Dict, Optional
 from app.models.pet import Pet
+from app.services.vaccination_engine import vaccination_engine
 from datetime import datetime, timedelta
 
 
@@ -60,6 +61,24 @@ class PetTools:
         Returns:
             Список рекомендуемых прививок
         """
+        # График из правил вакцинации (таблица vaccination_rules), если они загружены
+        rules = vaccination_engine.rules()
+        ruled = []
+        for r in range(len(rules)):
+            if rules.species_ids[r] != pet.species:
+                continue
+            doses = int(rules.doses[r])
+            for dose in range(doses):
+                age_days = int(rules.first_dose[r] + dose * rules.interval[r])
+                vaccine = f"{rules.names[r]} (доза {dose + 1})" if doses > 1 else rules.names[r]
+                ruled.append((age_days, {"age": f"{age_days // 7} недель", "vaccine": vaccine}))
+            booster = int(rules.booster[r])
+            if booster:
+                age = "Ежегодно" if booster == 365 else f"Каждые {booster} дней"
+                ruled.append((10 ** 6 + booster, {"age": age, "vaccine": f"{rules.names[r]} - ревакцинация"}))
+        if ruled:
+            return [item for _, item in sorted(ruled, key=lambda x: x[0])]
+        
         species_name = species_dict.get(pet.species, "").lower()
         schedule = []
         
@@ -0,0 +1,215 @@
+"""
+Аналитика по всем питомцам: распределения веса по видам и возрасту, просроченные прививки
+"""
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+import numpy as np
+from sqlalchemy import String, cast, func, select
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.pet import Pet
+from app.models.reference import TypeOfAnimal
+from app.models.reminder import Reminder
+from app.models.vaccination import VaccinationReminderLog
+from app.services.vaccination_engine import vaccination_engine, to_days
+
+# Возрастные группы: нижние границы в годах
+AGE_BAND_EDGES = [0, 1, 3, 7, 10]
+AGE_BAND_LABELS = ["до 1 года", "1-3 года", "3-7 лет", "7-10 лет", "10 лет и старше"]
+UNKNOWN_AGE_LABEL = "возраст не указан"
+PERCENTILES = [10, 25, 50, 75, 90]
+HISTOGRAM_BINS = 20
+FETCH_CHUNK_SIZE = 50000
+
+
+def _summary(values: np.ndarray) -> Dict[str, Any]:
+    """Количество, среднее и перцентили"""
+    if not len(values):
+        return {"count": 0}
+    percentiles = np.percentile(values, PERCENTILES)
+    summary = {"count": int(len(values)), "mean": round(float(values.mean()), 2)}
+    summary.update({f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, percentiles)})
+    return summary
+
+
+def _histogram(weights: np.ndarray) -> Dict[str, List[float]]:
+    """Гистограмма по диапазону 1-99 перцентилей; выбросы попадают в крайние интервалы"""
+    if not len(weights):
+        return {"bin_edges": [], "counts": []}
+    low, high = np.percentile(weights, [1, 99])
+    if high <= low:
+        high = low + 1.0
+    counts, edges = np.histogram(np.clip(weights, low, high), bins=HISTOGRAM_BINS, range=(low, high))
+    return {"bin_edges": [round(float(e), 2) for e in edges], "counts": counts.tolist()}
+
+
+class PopulationAnalytics:
+    """
+    Сводка по всей таблице pets.
+
+    Нужные колонки читаются одним запросом (частями по FETCH_CHUNK_SIZE строк)
+    в массивы NumPy; возрастные группы, перцентили и гистограммы считаются
+    векторно. Результат кэшируется на ANALYTICS_CACHE_TTL_SECONDS секунд.
+    """
+
+    CACHE_KEY = "population"
+
+    def __init__(self):
+        self.cache = TTLCache(ttl=settings.ANALYTICS_CACHE_TTL_SECONDS)
+
+    @staticmethod
+    def _load_pets(db: Session) -> Dict[str, np.ndarray]:
+        ids, species, births, weights = [], [], [], []
+        # Запрос через Core без ORM-объектов; дата как текст ISO - NumPy разбирает ее сам
+        result = db.connection().execution_options(yield_per=FETCH_CHUNK_SIZE).execute(
+            select(Pet.id, Pet.species, cast(Pet.birth_date, String), Pet.weight)
+        )
+        for chunk in result.partitions():
+            chunk_ids, chunk_species, chunk_births, chunk_weights = zip(*chunk)
+            ids.append(np.array(chunk_ids, dtype=np.int64))
+            species.append(np.array(chunk_species, dtype=np.int64))
+            births.append(np.array(chunk_births, dtype="datetime64[D]"))
+            weights.append(np.array(chunk_weights, dtype=np.float64))
+        if not ids:
+            empty = np.zeros(0, dtype=np.int64)
+            return {"id": empty, "species": empty, "birth": empty.astype("datetime64[D]"), "weight": empty.astype(np.float64)}
+        return {
+            "id": np.concatenate(ids),
+            "species": np.concatenate(species),
+            "birth": np.concatenate(births),
+            "weight": np.concatenate(weights),
+        }
+
+    @staticmethod
+    def _overdue_vaccinations(db: Session, pets: Dict[str, np.ndarray], today: date) -> Dict[str, Any]:
+        """Прививки со сроком в окне просрочки, по которым напоминание не отмечено выполненным"""
+        rules = vaccination_engine.rules(db)
+        known = ~np.isnat(pets["birth"])
+        result = {"pets": 0, "doses": 0, "by_species": {}}
+        if not len(rules) or not known.any():
+            return result
+
+        window_end = to_days(today) - 1
+        window_start = window_end - settings.VACCINATION_OVERDUE_WINDOW_DAYS + 1
+        pet_ids = pets["id"][known]
+        species = pets["species"][known]
+        due = vaccination_engine.compute_due(
+            rules, species, pets["birth"][known].astype(np.int64), window_start, window_end
+        )
+        if not len(due["pet_index"]):
+            return result
+
+        due_pet = pet_ids[due["pet_index"]]
+        due_keys = np.stack([due_pet, rules.ids[due["rule_index"]], due["due_day"]], axis=1).astype(np.int64)
+        done = db.query(
+            VaccinationReminderLog.pet_id, VaccinationReminderLog.rule_id, VaccinationReminderLog.due_date
+        ).join(
+            Reminder, Reminder.id == VaccinationReminderLog.reminder_id
+        ).filter(
+            Reminder.status == False,
+            VaccinationReminderLog.due_date >= today - timedelta(days=settings.VACCINATION_OVERDUE_WINDOW_DAYS)
+        ).all()
+        done_keys = np.array(
+            [(pet_id, rule_id, to_days(due_date)) for pet_id, rule_id, due_date in done],
+            dtype=np.int64
+        ).reshape(-1, 3)
+        # Строки (питомец, правило, день) нумеруются общим np.unique, и сравниваются номера:
+        # точное совпадение без упаковки в одно число и ограничений на размер id
+        _, codes = np.unique(np.concatenate([due_keys, done_keys]), axis=0, return_inverse=True)
+        codes = codes.reshape(-1)
+        overdue = ~np.isin(codes[:len(due_keys)], codes[len(due_keys):])
+
+        overdue_pets, first = np.unique(due_pet[overdue], return_index=True)
+        overdue_species = species[due["pet_index"][overdue]][first]
+        species_ids, counts = np.unique(overdue_species, return_counts=True)
+        result["pets"] = int(len(overdue_pets))
+        result["doses"] = int(overdue.sum())
+        result["by_species"] = dict(zip(species_ids.tolist(), counts.tolist()))
+        return result
+
+    def compute(self, db: Session, today: Optional[date] = None) -> Dict[str, Any]:
+        """Считает сводку заново (без кэша)"""
+        started = time.perf_counter()
+        today = today or date.today()
+        pets = self._load_pets(db)
+        species_names = dict(db.query(TypeOfAnimal.id, TypeOfAnimal.name_ru).all())
+
+        # Возраст в годах и номер возрастной группы (-1 - дата рождения не указана)
+        known = ~np.isnat(pets["birth"])
+        age_years = np.full(len(pets["id"]), np.nan)
+        age_years[known] = (np.datetime64(today, "D") - pets["birth"][known]).astype(np.int64) / 365.25
+        band = np.full(len(pets["id"]), -1, dtype=np.int64)
+        band[known] = np.clip(np.digitize(age_years[known], AGE_BAND_EDGES) - 1, 0, len(AGE_BAND_EDGES) - 1)
+        has_weight = ~np.isnan(pets["weight"]) & (pets["weight"] > 0)
+
+        species_stats = []
+        species_ids, species_counts = np.unique(pets["species"], return_counts=True)
+        for species_id, count in zip(species_ids.tolist(), species_counts.tolist()):
+            in_species = pets["species"] == species_id
+            weights = pets["weight"][in_species & has_weight]
+            bands = []
+            for band_index, label in enumerate(AGE_BAND_LABELS + [UNKNOWN_AGE_LABEL]):
+                band_value = band_index if band_index < len(AGE_BAND_LABELS) else -1
+                in_band = in_species & (band == band_value)
+                bands.append({
+                    "band": label,
+                    "count": int(in_band.sum()),
+                    "weight": _summary(pets["weight"][in_band & has_weight]),
+                })
+            species_stats.append({
+                "species_id": species_id,
+                "species": species_names.get(species_id, "Неизвестный вид"),
+                "count": count,
+                "age": _summary(age_years[in_species & known]),
+                "weight": _summary(weights),
+                "weight_histogram": _histogram(weights),
+                "age_bands": bands,
+            })
+
+        vaccinations = self._overdue_vaccinations(db, pets, today)
+        reminders_overdue, reminders_users = db.query(
+            func.count(Reminder.id), func.count(func.distinct(Reminder.user_id))
+        ).filter(
+            Reminder.status == True,
+            Reminder.date_assistant < today
+        ).one()
+
+        return {
+            "generated_at": datetime.utcnow(),
+            "total_pets": int(len(pets["id"])),
+            "pets_with_birth_date": int(known.sum()),
+            "pets_with_weight": int(has_weight.sum()),
+            "age_bands": AGE_BAND_LABELS + [UNKNOWN_AGE_LABEL],
+            "species": species_stats,
+            "overdue": {
+                "vaccination_pets": vaccinations["pets"],
+                "vaccination_doses": vaccinations["doses"],
+                "vaccination_pets_by_species": [
+                    {"species_id": s, "species": species_names.get(s, "Неизвестный вид"), "pets": n}
+                    for s, n in vaccinations["by_species"].items()
+                ],
+                "reminders": reminders_overdue or 0,
+                "reminder_owners": reminders_users or 0,
+            },
+            "compute_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    def _compute_with_session(self) -> Dict[str, Any]:
+        from app.database import SessionLocal
+        db = SessionLocal()
+        try:
+            return self.compute(db)
+        finally:
+            db.close()
+
+    def population(self, refresh: bool = False) -> Dict[str, Any]:
+        """Сводка из кэша; refresh=True - пересчитать сейчас"""
+        if refresh:
+            self.cache.invalidate(self.CACHE_KEY)
+        return self.cache.get_or_set(self.CACHE_KEY, self._compute_with_session)
+
+
+# Глобальный экземпляр сервиса
+population_analytics = PopulationAnalytics()
@@ -0,0 +1,148 @@
+"""
+Лента действующих акций партнеров для всех пользователей
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.partner_cabinet import PartnerPromotion, PartnerService
+from app.models.reference import RefShop
+from app.models.user import Profile
+from app.services.pet_timeline import InvalidCursor
+
+Cursor = Tuple[datetime, int]
+
+
+class PromotionFeed:
+    """
+    Акции, действующие сейчас (is_active, start_date <= now < end_date; даты в UTC),
+    от новых к старым по (start_date, id). Отбор и сортировка идут по индексу
+    ix_partner_promotions_active_dates, страницы - по курсору, товар, услуга и
+    название партнера присоединяются в том же запросе.
+
+    Первая страница кэшируется до ближайшей границы акций (начало или окончание
+    любой акции), но не дольше PROMOTIONS_FEED_CACHE_TTL_SECONDS.
+    """
+
+    DEFAULT_LIMIT = 20
+    MAX_LIMIT = 100
+
+    def __init__(self):
+        self.cache = TTLCache(ttl=settings.PROMOTIONS_FEED_CACHE_TTL_SECONDS, max_entries=256)
+
+    @staticmethod
+    def encode_cursor(item: Dict[str, Any]) -> str:
+        raw = json.dumps([item["start_date"].isoformat(), item["id"]])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Cursor:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            start_date, item_id = json.loads(raw)
+            return datetime.fromisoformat(start_date), int(item_id)
+        except (ValueError, TypeError) as e:
+            raise InvalidCursor(str(e)) from e
+
+    @staticmethod
+    def _active(now: datetime):
+        return and_(
+            PartnerPromotion.is_active == True,
+            PartnerPromotion.start_date <= now,
+            PartnerPromotion.end_date > now
+        )
+
+    def _load(
+        self,
+        db: Session,
+        now: datetime,
+        limit: int,
+        position: Optional[Cursor] = None,
+        partner_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        query = db.query(
+            PartnerPromotion, RefShop, PartnerService, Profile
+        ).outerjoin(
+            RefShop, RefShop.id == PartnerPromotion.product_id
+        ).outerjoin(
+            PartnerService, PartnerService.id == PartnerPromotion.service_id
+        ).outerjoin(
+            Profile, Profile.user_id == PartnerPromotion.partner_id
+        ).filter(self._active(now))
+        if partner_id is not None:
+            query = query.filter(PartnerPromotion.partner_id == partner_id)
+        if position is not None:
+            start_date, promotion_id = position
+            query = query.filter(or_(
+                PartnerPromotion.start_date < start_date,
+                and_(PartnerPromotion.start_date == start_date, PartnerPromotion.id < promotion_id)
+            ))
+        rows = query.order_by(
+            PartnerPromotion.start_date.desc(), PartnerPromotion.id.desc()
+        ).limit(limit + 1).all()
+
+        items = []
+        for promotion, product, service, profile in rows[:limit]:
+            items.append({
+                "id": promotion.id,
+                "partner_id": promotion.partner_id,
+                "partner_name": (profile.name_of_organization or profile.clinic) if profile else None,
+                "title": promotion.title,
+                "description": promotion.description,
+                "discount_percent": promotion.discount_percent,
+                "start_date": promotion.start_date,
+                "end_date": promotion.end_date,
+                "product": {
+                    "id": product.id, "name_ru": product.name_ru, "img_url": product.img_url, "price": product.price
+                } if product else None,
+                "service": {
+                    "id": service.id, "name_ru": service.name_ru,
+                    "price": service.price, "duration_minutes": service.duration_minutes
+                } if service else None,
+            })
+        next_cursor = self.encode_cursor(items[-1]) if len(rows) > limit else None
+        return {"items": items, "next_cursor": next_cursor}
+
+    def _seconds_to_boundary(self, db: Session, now: datetime) -> float:
+        """Секунды до ближайшего окончания действующей или начала будущей акции"""
+        next_end = db.query(func.min(PartnerPromotion.end_date)).filter(self._active(now)).scalar()
+        next_start = db.query(func.min(PartnerPromotion.start_date)).filter(
+            PartnerPromotion.is_active == True,
+            PartnerPromotion.start_date > now
+        ).scalar()
+        ttl = float(settings.PROMOTIONS_FEED_CACHE_TTL_SECONDS)
+        for boundary in (next_end, next_start):
+            if boundary is not None:
+                ttl = min(ttl, (boundary - now).total_seconds())
+        return max(ttl, 0.0)
+
+    def page(
+        self,
+        db: Session,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_LIMIT,
+        partner_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Возвращает {"items": [...], "next_cursor": str | None}"""
+        now = datetime.utcnow()
+        if cursor:
+            return self._load(db, now, limit, self.decode_cursor(cursor), partner_id)
+
+        key = (limit, partner_id)
+        page = self.cache.get(key)
+        if page is None:
+            page = self._load(db, now, limit, partner_id=partner_id)
+            self.cache.set(key, page, ttl=self._seconds_to_boundary(db, now))
+        return page
+
+    def invalidate(self):
+        """Сбрасывает кэш первых страниц (после изменения акций)"""
+        self.cache.invalidate()
+
+
+# Глобальный экземпляр сервиса
+promotion_feed = PromotionFeed()
@@ -0,0 +1,62 @@
+"""
+Распределение бюджета токенов промпта между частями контекста
+"""
+from typing import Any, Dict, List, Optional
+from app.services.tokens import estimate_tokens
+
+
+class ContextSection:
+    """
+    Раздел контекста модели: заголовок и элементы (питомцы, специалисты, товары).
+
+    У элемента может быть краткая форма - ею он заменяется при нехватке бюджета,
+    прежде чем раздел начнет терять элементы.
+    """
+
+    def __init__(self, name: str, priority: int, header: Optional[List[str]] = None, min_items: int = 0):
+        self.name = name
+        # Чем меньше priority, тем раньше раздел сжимается
+        self.priority = priority
+        self.header = header or []
+        self.min_items = min_items
+        self.items: List[Dict[str, Any]] = []
+        self.compacted = 0
+        self.dropped = 0
+
+    def add(self, text: str, compact: Optional[str] = None):
+        self.items.append({"text": text, "compact": compact})
+
+    def lines(self) -> List[str]:
+        if not self.items and self.header:
+            return []
+        return self.header + [item["text"] for item in self.items]
+
+    def tokens(self) -> int:
+        return sum(estimate_tokens(line) + 1 for line in self.lines())
+
+
+def compact_sections(sections: List[ContextSection], budget: int) -> int:
+    """
+    Укладывает разделы в budget токенов и возвращает их итоговый размер.
+
+    Разделы обрабатываются от наименее ценного: сначала элементы с конца раздела
+    заменяются краткой формой, затем удаляются (но не меньше min_items).
+    """
+    total = sum(section.tokens() for section in sections)
+    for section in sorted(sections, key=lambda s: s.priority):
+        if total <= budget:
+            break
+        for item in reversed(section.items):
+            if total <= budget:
+                break
+            if item["compact"] and item["compact"] != item["text"]:
+                before = section.tokens()
+                item["text"], item["compact"] = item["compact"], None
+                section.compacted += 1
+                total += section.tokens() - before
+        while total > budget and len(section.items) > section.min_items:
+            before = section.tokens()
+            section.items.pop()
+            section.dropped += 1
+            total += section.tokens() - before
+    return total
@@ -0,0 +1,158 @@
+"""
+Диспетчер напоминаний: ставит уведомления о наступивших напоминаниях в очередь (outbox)
+"""
+import asyncio
+import time
+from collections import Counter
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.events_hub import events_hub
+from app.models.reminder import Reminder
+from app.models.notification import NotificationOutbox
+
+
+def _insert_ignore_conflicts(db: Session, rows: List[Dict[str, Any]]):
+    """Вставка в outbox без ошибки на уже существующих уведомлениях (ON CONFLICT DO NOTHING)"""
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    db.execute(dialect.insert(NotificationOutbox).on_conflict_do_nothing(), rows)
+
+
+class ReminderDispatcher:
+    """
+    Периодически выбирает запланированные напоминания с наступившей датой,
+    которые еще не отправлялись, и для каждого в одной транзакции:
+    - добавляет уведомление в notification_outbox;
+    - проставляет reminders.notified_at.
+
+    Выборка идет по частичному индексу ix_reminders_due_pending (status, date_assistant)
+    только по неотправленным напоминаниям, поэтому стоимость пачки не зависит от
+    размера истории. Строки блокируются с SKIP LOCKED (PostgreSQL), так что
+    несколько воркеров разбирают очередь без пересечений.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        metrics.describe("vetcard_reminders_dispatched_total", "Напоминания, поставленные в очередь уведомлений")
+        metrics.describe("vetcard_reminder_dispatch_seconds", "Длительность одного прохода диспетчера напоминаний")
+
+    def dispatch_batch(self, db: Session, today: date, batch_size: int) -> int:
+        """Обрабатывает одну пачку наступивших напоминаний; возвращает их количество"""
+        reminders = db.query(
+            Reminder.id, Reminder.user_id, Reminder.animal_name,
+            Reminder.assistant_sms, Reminder.date_assistant
+        ).filter(
+            Reminder.status == True,
+            Reminder.notified_at.is_(None),
+            Reminder.date_assistant <= today
+        ).order_by(
+            Reminder.date_assistant, Reminder.id
+        ).limit(batch_size).with_for_update(skip_locked=True).all()
+        if not reminders:
+            db.rollback()
+            return 0
+
+        now = datetime.utcnow()
+        _insert_ignore_conflicts(db, [
+            {
+                "user_id": r.user_id,
+                "reminder_id": r.id,
+                "due_date": r.date_assistant,
+                "channel": "in_app",
+                "title": f"Напоминание: {r.animal_name}",
+                "body": r.assistant_sms,
+                "status": "pending",
+                "attempts": 0,
+                "created_at": now,
+            }
+            for r in reminders
+        ])
+        # Условие notified_at IS NULL делает отметку идемпотентной
+        db.execute(
+            update(Reminder).where(
+                Reminder.id.in_([r.id for r in reminders]),
+                Reminder.notified_at.is_(None)
+            ).values(notified_at=now).execution_options(synchronize_session=False)
+        )
+        db.commit()
+        # Одно событие на пользователя: клиент перечитывает /notifications/
+        per_user = Counter(r.user_id for r in reminders)
+        for user_id, count in per_user.items():
+            events_hub.publish([user_id], "notifications.created", {"count": count})
+        return len(reminders)
+
+    def dispatch_once(
+        self,
+        db: Session,
+        today: Optional[date] = None,
+        batch_size: Optional[int] = None,
+        max_batches: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Один проход: пачки по batch_size, пока очередь не опустеет или не будет
+        обработано max_batches пачек (остаток заберет следующий проход).
+        """
+        today = today or date.today()
+        batch_size = batch_size or settings.REMINDER_DISPATCH_BATCH_SIZE
+        max_batches = max_batches or settings.REMINDER_DISPATCH_MAX_BATCHES_PER_TICK
+        started = time.perf_counter()
+        stats = {"batches": 0, "dispatched": 0, "seconds": 0.0}
+
+        while stats["batches"] < max_batches:
+            count = self.dispatch_batch(db, today, batch_size)
+            if not count:
+                break
+            stats["batches"] += 1
+            stats["dispatched"] += count
+            if count < batch_size:
+                break
+
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        metrics.inc("vetcard_reminders_dispatched_total", stats["dispatched"])
+        metrics.observe("vetcard_reminder_dispatch_seconds", stats["seconds"])
+        return stats
+
+    def _dispatch_with_session(self) -> Dict[str, Any]:
+        """Проход в отдельной сессии БД (для фоновой задачи)"""
+        from app.database import SessionLocal
+        db = SessionLocal()
+        try:
+            return self.dispatch_once(db)
+        finally:
+            db.close()
+
+    async def run_loop(self):
+        """Фоновая задача: проход диспетчера каждые REMINDER_DISPATCH_INTERVAL_SECONDS секунд"""
+        while True:
+            try:
+                # Запросы к БД выполняются в потоке, чтобы не блокировать event loop
+                stats = await asyncio.to_thread(self._dispatch_with_session)
+                if stats["dispatched"]:
+                    print(f"🔔 Напоминаний в очереди уведомлений: {stats['dispatched']} за {stats['seconds']} с")
+            except Exception as e:
+                print(f"⚠️  Ошибка диспетчера напоминаний: {e}")
+            await asyncio.sleep(settings.REMINDER_DISPATCH_INTERVAL_SECONDS)
+
+    def start(self):
+        """Запускает фоновую задачу (вызывается при старте приложения)"""
+        if self._task is None and settings.REMINDER_DISPATCH_ENABLED:
+            self._task = asyncio.create_task(self.run_loop())
+
+    async def stop(self):
+        """Останавливает фоновую задачу"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+# Глобальный экземпляр диспетчера
+reminder_dispatcher = ReminderDispatcher()
@@ -0,0 +1,43 @@
+"""
+Приблизительная оценка количества токенов без загрузки токенизатора модели
+"""
+import math
+import re
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_CYRILLIC_RE = re.compile(r"[а-яёА-ЯЁ]")
+
+
+def _chunk_tokens(chunk: str) -> int:
+    if len(chunk) == 1:
+        return 1
+    if _CYRILLIC_RE.search(chunk):
+        return math.ceil(len(chunk) / 3)
+    return math.ceil(len(chunk) / 4)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Оценивает количество токенов в тексте для llama-подобных токенизаторов.
+
+    Кириллица кодируется плотнее латиницы: в среднем ~3 символа на токен
+    против ~4 для английского текста. Каждый знак препинания считается
+    отдельным токеном.
+    """
+    if not text:
+        return 0
+    return sum(_chunk_tokens(chunk) for chunk in _TOKEN_RE.findall(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Обрезает текст по границе слова так, чтобы оценка не превышала max_tokens"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    total = 0
+    for match in _TOKEN_RE.finditer(text):
+        total += _chunk_tokens(match.group())
+        # Один токен оставляем под многоточие
+        if total > max_tokens - 1:
+            return text[:match.start()].rstrip() + "…"
+    return text
@@ -0,0 +1,348 @@
+"""
+Расчет сроков вакцинации по правилам из БД для всех питомцев сразу
+"""
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.pet import Pet
+from app.models.reference import TypeOfAnimal
+from app.models.reminder import Reminder
+from app.models.vaccination import VaccinationRule, VaccinationReminderLog
+
+_EPOCH = date(1970, 1, 1)
+
+# Правила по умолчанию (вид животных -> прививки); уточняются ветеринаром в таблице vaccination_rules
+DEFAULT_RULES = {
+    "Собака": [
+        {"code": "dog_dhppi", "name": "Комплексная прививка (DHPPi)", "first_dose_age_days": 49,
+         "doses": 3, "dose_interval_days": 21, "booster_interval_days": 365},
+        {"code": "dog_rabies", "name": "Прививка от бешенства", "first_dose_age_days": 105,
+         "doses": 1, "dose_interval_days": 0, "booster_interval_days": 365},
+    ],
+    "Кошка": [
+        {"code": "cat_fvrcp", "name": "Комплексная прививка (FVRCP)", "first_dose_age_days": 60,
+         "doses": 3, "dose_interval_days": 28, "booster_interval_days": 365},
+        {"code": "cat_rabies", "name": "Прививка от бешенства", "first_dose_age_days": 112,
+         "doses": 1, "dose_interval_days": 0, "booster_interval_days": 365},
+    ],
+    "Хорек": [
+        {"code": "ferret_distemper", "name": "Прививка от чумы плотоядных", "first_dose_age_days": 56,
+         "doses": 2, "dose_interval_days": 21, "booster_interval_days": 365},
+        {"code": "ferret_rabies", "name": "Прививка от бешенства", "first_dose_age_days": 90,
+         "doses": 1, "dose_interval_days": 0, "booster_interval_days": 365},
+    ],
+    "Кролик": [
+        {"code": "rabbit_myxo_vhd", "name": "Прививка от миксоматоза и ВГБК", "first_dose_age_days": 45,
+         "doses": 2, "dose_interval_days": 90, "booster_interval_days": 365},
+    ],
+}
+
+
+def to_days(value: date) -> int:
+    """Дата -> число дней от 1970-01-01 (формат массивов движка)"""
+    return (value - _EPOCH).days
+
+
+def from_days(days: int) -> date:
+    return _EPOCH + timedelta(days=int(days))
+
+
+class CompiledRules:
+    """Правила вакцинации в виде массивов NumPy (по одному элементу на правило)"""
+
+    def __init__(self, rules: List[VaccinationRule]):
+        self.ids = np.array([r.id for r in rules], dtype=np.int64)
+        self.species_ids = np.array([r.species_id for r in rules], dtype=np.int64)
+        self.first_dose = np.array([r.first_dose_age_days for r in rules], dtype=np.int64)
+        self.doses = np.array([max(1, r.doses or 1) for r in rules], dtype=np.int64)
+        self.interval = np.array([r.dose_interval_days or 0 for r in rules], dtype=np.int64)
+        # 0 - без ревакцинации
+        self.booster = np.array([r.booster_interval_days or 0 for r in rules], dtype=np.int64)
+        self.codes = [r.code for r in rules]
+        self.names = [r.name for r in rules]
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def species(self) -> List[int]:
+        return sorted(set(self.species_ids.tolist()))
+
+
+class VaccinationEngine:
+    """
+    Движок сроков вакцинации.
+
+    Правила загружаются из таблицы vaccination_rules и компилируются в массивы при старте
+    приложения (load_rules). Сроки считаются пакетно: для каждого правила - векторные
+    операции над датами рождения всех питомцев этого вида, без цикла по питомцам.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rules: Optional[CompiledRules] = None
+
+    def load_rules(self, db: Session) -> CompiledRules:
+        """Загружает и компилирует активные правила"""
+        rules = db.query(VaccinationRule).filter(
+            VaccinationRule.is_active == True
+        ).order_by(VaccinationRule.id).all()
+        compiled = CompiledRules(rules)
+        with self._lock:
+            self._rules = compiled
+        return compiled
+
+    def rules(self, db: Optional[Session] = None) -> CompiledRules:
+        """Скомпилированные правила (загружаются при первом обращении, если еще не загружены)"""
+        if self._rules is None:
+            if db is None:
+                return CompiledRules([])
+            return self.load_rules(db)
+        return self._rules
+
+    def invalidate(self):
+        """Сбрасывает скомпилированные правила (после изменения таблицы)"""
+        with self._lock:
+            self._rules = None
+
+    @staticmethod
+    def ensure_default_rules(db: Session) -> int:
+        """Добавляет правила по умолчанию для существующих видов животных; возвращает число новых"""
+        created = 0
+        species = {t.name_ru: t.id for t in db.query(TypeOfAnimal).all()}
+        for species_name, rules in DEFAULT_RULES.items():
+            species_id = species.get(species_name)
+            if species_id is None:
+                continue
+            for rule in rules:
+                exists = db.query(VaccinationRule.id).filter(
+                    VaccinationRule.species_id == species_id,
+                    VaccinationRule.code == rule["code"]
+                ).first()
+                if not exists:
+                    db.add(VaccinationRule(species_id=species_id, **rule))
+                    created += 1
+        db.commit()
+        return created
+
+    @staticmethod
+    def compute_due(
+        rules: CompiledRules,
+        species: np.ndarray,
+        birth_days: np.ndarray,
+        window_start: int,
+        window_end: int
+    ) -> Dict[str, np.ndarray]:
+        """
+        Все прививки питомцев со сроком в окне [window_start, window_end] (дни от 1970-01-01).
+
+        Args:
+            species: ID вида для каждого питомца
+            birth_days: дата рождения каждого питомца в днях
+
+        Returns:
+            Массивы одинаковой длины: pet_index (позиция во входных массивах),
+            rule_index, dose_number, due_day
+        """
+        pet_parts, rule_parts, dose_parts, due_parts = [], [], [], []
+
+        def collect(idx, rule_index, dose_number, due):
+            if len(idx):
+                pet_parts.append(idx)
+                rule_parts.append(np.full(len(idx), rule_index, dtype=np.int64))
+                dose_parts.append(np.broadcast_to(dose_number, idx.shape).astype(np.int64))
+                due_parts.append(due)
+
+        for r in range(len(rules)):
+            idx = np.flatnonzero(species == rules.species_ids[r])
+            if not len(idx):
+                continue
+            births = birth_days[idx]
+
+            # Первичный курс: doses доз через равные интервалы
+            for dose in range(int(rules.doses[r])):
+                due = births + rules.first_dose[r] + dose * rules.interval[r]
+                hit = (due >= window_start) & (due <= window_end)
+                collect(idx[hit], r, dose + 1, due[hit])
+
+            booster = int(rules.booster[r])
+            if booster <= 0:
+                continue
+            # Ревакцинации: первая с номером j >= 1, попадающая в окно, затем каждые booster дней
+            last_primary = births + rules.first_dose[r] + (rules.doses[r] - 1) * rules.interval[r]
+            j = np.maximum(1, -((last_primary - window_start) // booster))
+            due = last_primary + j * booster
+            while True:
+                hit = due <= window_end
+                if not hit.any():
+                    break
+                collect(idx[hit], r, rules.doses[r] + j[hit], due[hit])
+                idx, j, due = idx[hit], j[hit] + 1, due[hit] + booster
+
+        if not pet_parts:
+            empty = np.zeros(0, dtype=np.int64)
+            return {"pet_index": empty, "rule_index": empty, "dose_number": empty, "due_day": empty}
+        return {
+            "pet_index": np.concatenate(pet_parts),
+            "rule_index": np.concatenate(rule_parts),
+            "dose_number": np.concatenate(dose_parts),
+            "due_day": np.concatenate(due_parts),
+        }
+
+    def pet_schedule(self, db: Session, pet: Pet, today: Optional[date] = None) -> List[Dict[str, Any]]:
+        """
+        График прививок одного питомца за последний год и на год вперед.
+
+        Статусы: done - владелец отметил напоминание выполненным, overdue - срок прошел
+        не более VACCINATION_OVERDUE_WINDOW_DAYS дней назад, missed - срок прошел раньше,
+        due - срок в ближайшие VACCINATION_REMINDER_LEAD_DAYS дней, planned - позже.
+        """
+        today = today or date.today()
+        rules = self.rules(db)
+        if not pet.birth_date or not len(rules):
+            return []
+
+        today_day = to_days(today)
+        window_start = max(to_days(pet.birth_date), today_day - 365)
+        due = self.compute_due(
+            rules,
+            np.array([pet.species], dtype=np.int64),
+            np.array([to_days(pet.birth_date)], dtype=np.int64),
+            window_start,
+            today_day + 365
+        )
+
+        # Выполненные прививки - напоминания из журнала, отмеченные владельцем как сделанные
+        logs = db.query(
+            VaccinationReminderLog.rule_id, VaccinationReminderLog.due_date, Reminder.status
+        ).outerjoin(
+            Reminder, Reminder.id == VaccinationReminderLog.reminder_id
+        ).filter(VaccinationReminderLog.pet_id == pet.id).all()
+        reminder_status = {(log.rule_id, log.due_date): log.status for log in logs}
+
+        schedule = []
+        order = np.lexsort((due["rule_index"], due["due_day"]))
+        for i in order:
+            r = int(due["rule_index"][i])
+            due_day = int(due["due_day"][i])
+            due_date = from_days(due_day)
+            key = (int(rules.ids[r]), due_date)
+            if reminder_status.get(key) is False:
+                item_status = "done"
+            elif due_day < today_day - settings.VACCINATION_OVERDUE_WINDOW_DAYS:
+                item_status = "missed"
+            elif due_day < today_day:
+                item_status = "overdue"
+            elif due_day <= today_day + settings.VACCINATION_REMINDER_LEAD_DAYS:
+                item_status = "due"
+            else:
+                item_status = "planned"
+            schedule.append({
+                "rule_id": key[0],
+                "code": rules.codes[r],
+                "vaccine": rules.names[r],
+                "dose_number": int(due["dose_number"][i]),
+                "booster": int(due["dose_number"][i]) > int(rules.doses[r]),
+                "due_date": due_date,
+                "status": item_status,
+                "reminder_created": key in reminder_status,
+            })
+        return schedule
+
+    def generate_reminders(self, db: Session, today: Optional[date] = None, batch_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Создает напоминания о прививках, срок которых наступает в ближайшие
+        VACCINATION_REMINDER_LEAD_DAYS дней или просрочен не более чем на
+        VACCINATION_OVERDUE_WINDOW_DAYS дней. Повторный запуск не создает дублей.
+
+        Питомцы читаются пачками по batch_size (по возрастанию id), каждая пачка -
+        одна транзакция с массовой вставкой напоминаний и записей журнала.
+        """
+        today = today or date.today()
+        batch_size = batch_size or settings.VACCINATION_BATCH_SIZE
+        rules = self.load_rules(db)
+        stats = {"pets": 0, "due": 0, "created": 0, "seconds": 0.0}
+        if not len(rules):
+            return stats
+
+        started = time.perf_counter()
+        window_start = to_days(today) - settings.VACCINATION_OVERDUE_WINDOW_DAYS
+        window_end = to_days(today) + settings.VACCINATION_REMINDER_LEAD_DAYS
+        last_id = 0
+
+        while True:
+            rows = db.query(Pet.id, Pet.species, Pet.birth_date, Pet.user_id, Pet.name).filter(
+                Pet.id > last_id,
+                Pet.birth_date.isnot(None),
+                Pet.species.in_(rules.species)
+            ).order_by(Pet.id).limit(batch_size).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            stats["pets"] += len(rows)
+
+            pet_ids = np.fromiter((row.id for row in rows), dtype=np.int64, count=len(rows))
+            species = np.fromiter((row.species for row in rows), dtype=np.int64, count=len(rows))
+            birth_days = np.array([row.birth_date for row in rows], dtype="datetime64[D]").astype(np.int64)
+
+            due = self.compute_due(rules, species, birth_days, window_start, window_end)
+            stats["due"] += len(due["pet_index"])
+            if not len(due["pet_index"]):
+                continue
+
+            # Уже созданные напоминания этой пачки - одним запросом по диапазону id
+            existing = set(db.query(
+                VaccinationReminderLog.pet_id, VaccinationReminderLog.rule_id, VaccinationReminderLog.due_date
+            ).filter(
+                VaccinationReminderLog.pet_id.between(int(pet_ids[0]), int(pet_ids[-1])),
+                VaccinationReminderLog.due_date.between(from_days(window_start), from_days(window_end))
+            ).all())
+
+            reminders, logs = [], []
+            for pet_index, rule_index, dose_number, due_day in zip(
+                due["pet_index"].tolist(), due["rule_index"].tolist(),
+                due["dose_number"].tolist(), due["due_day"].tolist()
+            ):
+                row = rows[pet_index]
+                rule_id = int(rules.ids[rule_index])
+                due_date = from_days(due_day)
+                if (row.id, rule_id, due_date) in existing:
+                    continue
+                dose_text = f"доза {dose_number}" if dose_number <= rules.doses[rule_index] else "ревакцинация"
+                reminders.append({
+                    "user_id": row.user_id,
+                    "pet_id": row.id,
+                    "animal_name": row.name,
+                    "assistant_sms": f"{rules.names[rule_index]} ({dose_text})",
+                    "date_assistant": due_date,
+                    "status": True,
+                })
+                logs.append({
+                    "pet_id": row.id,
+                    "rule_id": rule_id,
+                    "dose_number": dose_number,
+                    "due_date": due_date,
+                })
+
+            if reminders:
+                reminder_ids = db.execute(
+                    insert(Reminder).returning(Reminder.id, sort_by_parameter_order=True),
+                    reminders
+                ).scalars().all()
+                for log, reminder_id in zip(logs, reminder_ids):
+                    log["reminder_id"] = reminder_id
+                db.execute(insert(VaccinationReminderLog), logs)
+                db.commit()
+                stats["created"] += len(reminders)
+
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        return stats
+
+
+# Глобальный экземпляр движка
+vaccination_engine = VaccinationEngine()
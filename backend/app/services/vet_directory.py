@@ -0,0 +1,87 @@
+"""
+Публичный справочник ветеринаров: снимок в памяти, фильтры без запросов к БД
+"""
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user import User, Profile
+
+# Поля профиля, доступные без авторизации: контакты и номер лицензии не раскрываются
+PUBLIC_FIELDS = [
+    "first_name", "last_name", "third_name", "clinic", "position",
+    "specialization", "experience", "city", "address", "description",
+]
+
+
+def _fold(value: Optional[str]) -> str:
+    """Строка для сравнения без учета регистра и лишних пробелов (включая кириллицу)"""
+    return " ".join((value or "").split()).casefold()
+
+
+class VetDirectory:
+    """
+    Все активные ветеринары читаются одним запросом (без загрузки профилей
+    по одному) и хранятся снимком в памяти; фильтры и страницы применяются
+    к снимку. У снимка есть версия (хэш содержимого), из нее и параметров
+    запроса строится ETag - повторный запрос клиента получает 304.
+
+    Снимок сбрасывается при изменении профиля (auth.update_profile и админка);
+    другие воркеры увидят изменение не позже чем через VET_DIRECTORY_CACHE_TTL_SECONDS.
+    """
+
+    CACHE_KEY = "vets"
+    DEFAULT_LIMIT = 20
+    MAX_LIMIT = 100
+
+    def __init__(self):
+        self.cache = TTLCache(ttl=settings.VET_DIRECTORY_CACHE_TTL_SECONDS, max_entries=1)
+
+    @staticmethod
+    def _load(db: Session) -> Dict[str, Any]:
+        rows = db.query(
+            User.id, User.username, *(getattr(Profile, field) for field in PUBLIC_FIELDS)
+        ).join(
+            Profile, Profile.user_id == User.id
+        ).filter(
+            Profile.role == 2,
+            User.is_active == True
+        ).order_by(Profile.last_name, Profile.first_name, User.id).all()
+        vets = [dict(zip(["id", "username"] + PUBLIC_FIELDS, row)) for row in rows]
+        version = hashlib.sha1(json.dumps(vets, ensure_ascii=False, default=str).encode()).hexdigest()[:16]
+        return {"version": version, "vets": vets}
+
+    def snapshot(self, db: Session) -> Dict[str, Any]:
+        return self.cache.get_or_set(self.CACHE_KEY, lambda: self._load(db))
+
+    def page(
+        self,
+        db: Session,
+        city: Optional[str] = None,
+        specialization: Optional[str] = None,
+        clinic: Optional[str] = None,
+        limit: int = DEFAULT_LIMIT,
+        offset: int = 0
+    ) -> Tuple[List[Dict[str, Any]], int, str]:
+        """(ветеринары страницы, всего по фильтру, ETag)"""
+        snapshot = self.snapshot(db)
+        filters = [(field, _fold(value)) for field, value in (
+            ("city", city), ("specialization", specialization), ("clinic", clinic)
+        ) if value and _fold(value)]
+        vets = [
+            vet for vet in snapshot["vets"]
+            if all(value in _fold(vet[field]) for field, value in filters)
+        ]
+        params = json.dumps([filters, limit, offset], ensure_ascii=False)
+        etag = 'W/"' + snapshot["version"] + "-" + hashlib.sha1(params.encode()).hexdigest()[:8] + '"'
+        return vets[offset:offset + limit], len(vets), etag
+
+    def invalidate(self):
+        """Сбрасывает снимок (после изменения профилей или пользователей)"""
+        self.cache.invalidate()
+
+
+# Глобальный экземпляр справочника
+vet_directory = VetDirectory()
@@ -0,0 +1,126 @@
+"""
+Счетчики просмотров акций и статей: накопление в памяти и периодическая запись в БД
+"""
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.partner_cabinet import PartnerPromotion
+from app.models.vet_cabinet import VetArticle
+
+# Вид объекта -> модель с колонкой views_count
+COUNTED_MODELS = {
+    "promotion": PartnerPromotion,
+    "article": VetArticle,
+}
+
+
+class ViewCounter:
+    """
+    Просмотр только увеличивает счетчик в памяти процесса; раз в
+    VIEW_COUNTER_FLUSH_INTERVAL_SECONDS накопленное записывается одной пачкой
+    UPDATE ... SET views_count = views_count + n (по строке на объект).
+
+    Прибавление атомарно в БД, поэтому воркеры сбрасывают свои счетчики
+    независимо и ничего не перезаписывают. Строки обновляются в порядке id,
+    чтобы параллельные сбросы не блокировали друг друга крест-накрест.
+    При падении процесса теряется не больше одного интервала; при ошибке
+    записи счетчики возвращаются в буфер и уйдут со следующим сбросом.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, int], int] = defaultdict(int)
+        self._task: Optional[asyncio.Task] = None
+        metrics.describe("vetcard_views_flushed_total", "Просмотры акций и статей, записанные в БД")
+
+    def hit(self, kind: str, item_id: int, count: int = 1):
+        """Учитывает просмотр (без обращения к БД)"""
+        with self._lock:
+            self._pending[(kind, item_id)] += count
+
+    def pending(self, kind: str, item_id: int) -> int:
+        """Просмотры объекта, еще не записанные в БД этим процессом"""
+        with self._lock:
+            return self._pending.get((kind, item_id), 0)
+
+    def _restore(self, batch: Dict[Tuple[str, int], int]):
+        with self._lock:
+            for key, count in batch.items():
+                self._pending[key] += count
+
+    def flush(self, db: Session) -> int:
+        """Записывает накопленные просмотры; возвращает их количество"""
+        with self._lock:
+            batch, self._pending = self._pending, defaultdict(int)
+        if not batch:
+            return 0
+
+        try:
+            for kind, model in COUNTED_MODELS.items():
+                rows = sorted(
+                    ({"item_id": item_id, "increment": count} for (k, item_id), count in batch.items() if k == kind),
+                    key=lambda row: row["item_id"]
+                )
+                if not rows:
+                    continue
+                table = model.__table__
+                db.connection().execute(
+                    update(table).where(table.c.id == bindparam("item_id")).values(
+                        views_count=func.coalesce(table.c.views_count, 0) + bindparam("increment")
+                    ),
+                    rows
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            self._restore(batch)
+            raise
+
+        total = sum(batch.values())
+        metrics.inc("vetcard_views_flushed_total", total)
+        return total
+
+    def _flush_with_session(self) -> int:
+        from app.database import SessionLocal
+        db = SessionLocal()
+        try:
+            return self.flush(db)
+        finally:
+            db.close()
+
+    async def run_loop(self):
+        """Фоновая задача: сброс счетчиков каждые VIEW_COUNTER_FLUSH_INTERVAL_SECONDS секунд"""
+        while True:
+            await asyncio.sleep(settings.VIEW_COUNTER_FLUSH_INTERVAL_SECONDS)
+            try:
+                await asyncio.to_thread(self._flush_with_session)
+            except Exception as e:
+                print(f"⚠️  Ошибка записи счетчиков просмотров: {e}")
+
+    def start(self):
+        """Запускает фоновую задачу (вызывается при старте приложения)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run_loop())
+
+    async def stop(self):
+        """Останавливает фоновую задачу и записывает оставшиеся просмотры"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await asyncio.to_thread(self._flush_with_session)
+        except Exception as e:
+            print(f"⚠️  Ошибка записи счетчиков просмотров: {e}")
+
+
+# Глобальный экземпляр счетчика
+view_counter = ViewCounter()
@@ -0,0 +1,156 @@
+"""
+Измерения показателей питомца и история для графиков с прореживанием на сервере
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+import numpy as np
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.pet import Pet
+from app.models.vital import PetVital
+
+# Показатели: единица измерения и допустимый диапазон значений
+VITAL_KINDS = {
+    "weight": {"name": "Вес", "unit": "кг", "min": 0.01, "max": 150.0},
+    "temperature": {"name": "Температура", "unit": "°C", "min": 30.0, "max": 45.0},
+    "heart_rate": {"name": "Пульс", "unit": "уд/мин", "min": 10, "max": 400},
+    "respiratory_rate": {"name": "Частота дыхания", "unit": "вд/мин", "min": 2, "max": 200},
+}
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Время с часовым поясом приводится к UTC без пояса, как хранится в БД"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class VitalsService:
+    """
+    Запись измерений и выдача истории.
+
+    История за любой период возвращается не более чем max_points точками:
+    если измерений больше, период делится на равные по времени интервалы и
+    для каждого считаются min/max/mean (векторно, без цикла по измерениям).
+    """
+
+    @staticmethod
+    def validate(kind: str, value: float) -> Optional[str]:
+        """Текст ошибки или None, если показатель и значение допустимы"""
+        spec = VITAL_KINDS.get(kind)
+        if spec is None:
+            return f"Неизвестный показатель. Допустимые: {', '.join(VITAL_KINDS)}"
+        if not spec["min"] <= value <= spec["max"]:
+            return f"{spec['name']}: значение должно быть от {spec['min']} до {spec['max']} {spec['unit']}"
+        return None
+
+    def record(
+        self,
+        db: Session,
+        pet: Pet,
+        kind: str,
+        value: float,
+        measured_at: Optional[datetime] = None,
+        note: Optional[str] = None,
+        created_by: Optional[int] = None
+    ) -> PetVital:
+        """Добавляет измерение; для веса обновляет Pet.weight, если измерение самое свежее"""
+        vital = PetVital(
+            pet_id=pet.id,
+            kind=kind,
+            value=value,
+            measured_at=_naive_utc(measured_at) or datetime.utcnow(),
+            note=note,
+            created_by=created_by
+        )
+        if kind == "weight":
+            latest = db.query(PetVital.measured_at).filter(
+                PetVital.pet_id == pet.id,
+                PetVital.kind == "weight"
+            ).order_by(PetVital.measured_at.desc()).limit(1).scalar()
+            if latest is None or vital.measured_at >= latest:
+                pet.weight = value
+        db.add(vital)
+        return vital
+
+    @staticmethod
+    def downsample(times: np.ndarray, values: np.ndarray, start: int, end: int, buckets: int) -> Dict[str, np.ndarray]:
+        """
+        Агрегирует отсортированные по времени измерения в buckets равных интервалов [start, end].
+
+        times - микросекунды от эпохи (int64). Возвращает массивы по непустым интервалам:
+        bucket_start, bucket_end, count, min, max, mean.
+        """
+        width = max(1, -(-(end - start + 1) // buckets))  # Округление вверх: весь период покрыт
+        bucket_index = (times - start) // width
+        # Границы групп в отсортированном массиве: reduceat агрегирует каждую группу за один проход
+        starts = np.flatnonzero(np.r_[True, bucket_index[1:] != bucket_index[:-1]])
+        counts = np.diff(np.r_[starts, len(values)])
+        first = start + bucket_index[starts] * width
+        return {
+            "bucket_start": first,
+            "bucket_end": np.minimum(first + width - 1, end),
+            "count": counts,
+            "min": np.minimum.reduceat(values, starts),
+            "max": np.maximum.reduceat(values, starts),
+            "mean": np.add.reduceat(values, starts) / counts,
+        }
+
+    def history(
+        self,
+        db: Session,
+        pet: Pet,
+        kind: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        max_points: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """История показателя за период; при большом числе измерений - прореженная"""
+        start, end = _naive_utc(start), _naive_utc(end)
+        max_points = max(1, min(max_points or settings.VITALS_HISTORY_DEFAULT_POINTS, settings.VITALS_HISTORY_MAX_POINTS))
+        query = db.query(PetVital.measured_at, PetVital.value).filter(
+            PetVital.pet_id == pet.id,
+            PetVital.kind == kind
+        )
+        if start is not None:
+            query = query.filter(PetVital.measured_at >= start)
+        if end is not None:
+            query = query.filter(PetVital.measured_at <= end)
+        rows = query.order_by(PetVital.measured_at).all()
+
+        result = {
+            "kind": kind,
+            "unit": VITAL_KINDS[kind]["unit"],
+            "total": len(rows),
+            "downsampled": len(rows) > max_points,
+            "points": [],
+        }
+        if not rows:
+            return result
+
+        times = np.array([row.measured_at for row in rows], dtype="datetime64[us]").astype(np.int64)
+        values = np.fromiter((row.value for row in rows), dtype=np.float64, count=len(rows))
+        if not result["downsampled"]:
+            aggregated = {
+                "bucket_start": times, "bucket_end": times, "count": np.ones(len(rows), dtype=np.int64),
+                "min": values, "max": values, "mean": values,
+            }
+        else:
+            period_start = int(np.datetime64(start, "us").astype(np.int64)) if start else int(times[0])
+            period_end = int(np.datetime64(end, "us").astype(np.int64)) if end else int(times[-1])
+            aggregated = self.downsample(times, values, period_start, period_end, max_points)
+
+        bucket_start = aggregated["bucket_start"].astype("datetime64[us]").tolist()
+        bucket_end = aggregated["bucket_end"].astype("datetime64[us]").tolist()
+        result["points"] = [
+            {"start": s, "end": e, "count": c, "min": lo, "max": hi, "mean": round(m, 3)}
+            for s, e, c, lo, hi, m in zip(
+                bucket_start, bucket_end, aggregated["count"].tolist(),
+                aggregated["min"].tolist(), aggregated["max"].tolist(), aggregated["mean"].tolist()
+            )
+        ]
+        return result
+
+
+# Глобальный экземпляр сервиса
+vitals_service = VitalsService()
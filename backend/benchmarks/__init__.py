@@ -0,0 +1,3 @@
+"""
+Инструменты нагрузочного тестирования backend
+"""
@@ -0,0 +1,205 @@
+"""
+Нагрузочный тест AI чата: пропускная способность, время до первого токена и задержки
+
+Запускает запросы к POST /api/v1/ai/chat/ (или /chat/stream/) с заданной
+конкурентностью от нескольких тестовых пользователей (у каждого пользователя
+не больше AI_MAX_CONCURRENT_CHATS_PER_USER одновременных запросов).
+
+Пример (из папки backend, backend запущен с OLLAMA_HOST на fake_ollama):
+    python -m benchmarks.chat_benchmark --concurrency 8 --requests 200 --stream
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+# Вопросы, которые не совпадают с локальным FAQ и поэтому доходят до модели
+DEFAULT_MESSAGES = [
+    "Мой питомец последние два дня мало играет и много спит, стоит ли волноваться?",
+    "Посоветуй, как подготовить питомца к переезду в новую квартиру",
+    "Какие игрушки подойдут активному питомцу, который остается дома один?",
+    "Питомец начал чесать ухо после прогулки в парке, что посмотреть в первую очередь?",
+    "Как понять, что питомцу не подходит новый корм?",
+]
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Перцентиль с линейной интерполяцией (q от 0 до 100)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower, upper = math.floor(position), math.ceil(position)
+    if lower == upper:
+        return ordered[lower]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def distribution(values: List[float]) -> Dict[str, Optional[float]]:
+    """Сводка распределения в миллисекундах"""
+    if not values:
+        return {"count": 0}
+    ms = [v * 1000 for v in values]
+    return {
+        "count": len(ms),
+        "mean": round(sum(ms) / len(ms), 1),
+        "p50": round(percentile(ms, 50), 1),
+        "p90": round(percentile(ms, 90), 1),
+        "p99": round(percentile(ms, 99), 1),
+        "max": round(max(ms), 1),
+    }
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> str:
+    """Регистрирует тестового пользователя (если его нет) и возвращает access токен"""
+    await client.post("/api/v1/auth/register/", json={
+        "username": username,
+        "email": f"{username}@vetcard-benchmark.com",
+        "password": password,
+        "password2": password,
+    })
+    response = await client.post("/api/v1/auth/token/", json={"username": username, "password": password})
+    response.raise_for_status()
+    return response.json()["access"]
+
+
+async def send_chat(client: httpx.AsyncClient, token: str, message: str) -> Dict[str, Any]:
+    """Обычный запрос: TTFT совпадает с полной задержкой"""
+    started = time.perf_counter()
+    response = await client.post(
+        "/api/v1/ai/chat/",
+        json={"message": message},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    latency = time.perf_counter() - started
+    result = {"status": response.status_code, "latency": latency, "ttft": latency, "chars": 0, "prompt_tokens": None}
+    if response.status_code == 200:
+        body = response.json()
+        result["chars"] = len(body.get("response", ""))
+        result["prompt_tokens"] = body.get("prompt_tokens")
+    return result
+
+
+async def send_chat_stream(client: httpx.AsyncClient, token: str, message: str) -> Dict[str, Any]:
+    """Потоковый запрос: TTFT - время до первого события delta"""
+    started = time.perf_counter()
+    result = {"status": None, "latency": None, "ttft": None, "chars": 0, "prompt_tokens": None}
+    async with client.stream(
+        "POST",
+        "/api/v1/ai/chat/stream/",
+        json={"message": message},
+        headers={"Authorization": f"Bearer {token}"}
+    ) as response:
+        result["status"] = response.status_code
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+                if event == "delta":
+                    if result["ttft"] is None:
+                        result["ttft"] = time.perf_counter() - started
+                    result["chars"] += len(data.get("text", ""))
+                elif event == "done":
+                    result["prompt_tokens"] = data.get("prompt_tokens")
+    result["latency"] = time.perf_counter() - started
+    return result
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    timeout = httpx.Timeout(args.timeout, connect=10.0)
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=timeout, limits=limits) as client:
+        users = max(1, math.ceil(args.concurrency / args.per_user))
+        tokens = [await login(client, f"{args.user_prefix}{i}", args.password) for i in range(users)]
+        messages = [args.message] if args.message else DEFAULT_MESSAGES
+        send = send_chat_stream if args.stream else send_chat
+
+        results: List[Dict[str, Any]] = []
+        counter = {"next": 0}
+
+        async def worker(worker_id: int, total: int, record: bool):
+            # Каждый воркер работает от своего пользователя, чтобы не упираться в лимит на пользователя
+            token = tokens[worker_id // args.per_user]
+            while counter["next"] < total:
+                number = counter["next"]
+                counter["next"] += 1
+                try:
+                    result = await send(client, token, messages[number % len(messages)])
+                except httpx.HTTPError as e:
+                    result = {"status": e.__class__.__name__, "latency": None, "ttft": None, "chars": 0, "prompt_tokens": None}
+                if record:
+                    results.append(result)
+
+        if args.warmup:
+            print(f"🔥 Прогрев: {args.warmup} запросов")
+            await asyncio.gather(*(worker(i, args.warmup, False) for i in range(min(args.concurrency, args.warmup))))
+            counter["next"] = 0
+
+        print(f"🚀 {args.requests} запросов, конкурентность {args.concurrency}, "
+              f"{'поток' if args.stream else 'обычный ответ'}, пользователей: {users}")
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i, args.requests, True) for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    ok = [r for r in results if r["status"] == 200]
+    statuses: Dict[str, int] = {}
+    for r in results:
+        statuses[str(r["status"])] = statuses.get(str(r["status"]), 0) + 1
+    prompt_tokens = [r["prompt_tokens"] for r in ok if r["prompt_tokens"] is not None]
+
+    return {
+        "requests": len(results),
+        "ok": len(ok),
+        "statuses": statuses,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else None,
+        "output_chars_per_second": round(sum(r["chars"] for r in ok) / elapsed, 1) if elapsed else None,
+        "latency_ms": distribution([r["latency"] for r in ok]),
+        "ttft_ms": distribution([r["ttft"] for r in ok if r["ttft"] is not None]),
+        "prompt_tokens_mean": round(sum(prompt_tokens) / len(prompt_tokens), 1) if prompt_tokens else None,
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print("=" * 50)
+    print(f"Запросов: {report['requests']}, успешных: {report['ok']}, статусы: {report['statuses']}")
+    print(f"Время: {report['elapsed_seconds']} с, пропускная способность: {report['throughput_rps']} запр/с")
+    print(f"Вывод: {report['output_chars_per_second']} символов/с, промпт в среднем: {report['prompt_tokens_mean']} токенов")
+    for title, key in (("Задержка", "latency_ms"), ("TTFT", "ttft_ms")):
+        d = report[key]
+        if d["count"]:
+            print(f"{title}, мс: mean {d['mean']}  p50 {d['p50']}  p90 {d['p90']}  p99 {d['p99']}  max {d['max']}")
+    print("=" * 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест AI чата VetCard")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=4, help="одновременных запросов")
+    parser.add_argument("--requests", type=int, default=50, help="всего запросов (без прогрева)")
+    parser.add_argument("--warmup", type=int, default=0, help="запросов прогрева, не входят в отчет")
+    parser.add_argument("--stream", action="store_true", help="использовать /chat/stream/ (точный TTFT)")
+    parser.add_argument("--message", help="один вопрос для всех запросов вместо набора по умолчанию")
+    parser.add_argument("--per-user", type=int, default=2, help="одновременных запросов на пользователя")
+    parser.add_argument("--user-prefix", default="bench_user_")
+    parser.add_argument("--password", default="benchmark123")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--json-out", help="сохранить отчет в JSON файл")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📄 Отчет сохранен: {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
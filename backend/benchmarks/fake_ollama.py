@@ -0,0 +1,226 @@
+"""
+Имитация сервера Ollama для нагрузочного тестирования AI чата без модели
+
+Реализует те части Ollama API, которые использует AIService:
+GET /api/tags, POST /api/chat (потоковый и обычный ответ), POST /api/generate.
+Скорость генерации, время до первого токена и доля ошибок настраиваются.
+
+Запуск (из папки backend):
+    python -m benchmarks.fake_ollama --port 11435 --tokens-per-second 40 --ttft-ms 300
+
+Backend направляется на имитацию переменной окружения:
+    OLLAMA_HOST=http://localhost:11435
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.services.tokens import estimate_tokens
+
+# Текст, из которого нарезаются ответы
+RESPONSE_WORDS = (
+    "Рекомендую внимательно наблюдать за состоянием питомца, следить за аппетитом, "
+    "активностью и стулом. Обеспечьте доступ к чистой воде и соблюдайте режим кормления. "
+    "Если симптомы сохраняются больше суток или появляются рвота, вялость или температура, "
+    "обратитесь к ветеринару для осмотра. Плановые прививки и обработки от паразитов "
+    "помогают избежать многих проблем со здоровьем."
+).split()
+
+
+class FakeOllamaConfig:
+    """Параметры имитации"""
+
+    def __init__(
+        self,
+        model: str = "llama3.2:1b",
+        tokens_per_second: float = 40.0,
+        ttft_ms: float = 300.0,
+        ttft_jitter_ms: float = 100.0,
+        response_tokens: int = 120,
+        error_rate: float = 0.0,
+        max_parallel: int = 1,
+        load_ms: float = 0.0
+    ):
+        self.model = model
+        self.tokens_per_second = tokens_per_second
+        self.ttft_ms = ttft_ms
+        self.ttft_jitter_ms = ttft_jitter_ms
+        self.response_tokens = response_tokens
+        self.error_rate = error_rate
+        # Как OLLAMA_NUM_PARALLEL: сколько запросов модель обрабатывает одновременно,
+        # остальные ждут в очереди
+        self.max_parallel = max_parallel
+        self.load_ms = load_ms
+
+
+def create_app(config: FakeOllamaConfig) -> FastAPI:
+    """Создает приложение, имитирующее Ollama"""
+    app = FastAPI(title="Fake Ollama")
+    slots = asyncio.Semaphore(config.max_parallel)
+    state = {"loaded": config.load_ms <= 0, "requests": 0, "errors": 0, "in_flight": 0}
+
+    def now() -> str:
+        return datetime.now(timezone.utc).isoformat()
+
+    async def wait_first_token():
+        # Первый запрос после старта ждет "загрузку модели"
+        if not state["loaded"]:
+            await asyncio.sleep(config.load_ms / 1000)
+            state["loaded"] = True
+        jitter = random.uniform(-config.ttft_jitter_ms, config.ttft_jitter_ms)
+        await asyncio.sleep(max(0.0, config.ttft_ms + jitter) / 1000)
+
+    def response_tokens(options: Optional[Dict[str, Any]]) -> List[str]:
+        count = config.response_tokens
+        num_predict = (options or {}).get("num_predict")
+        if num_predict and num_predict > 0:
+            count = min(count, num_predict)
+        return [RESPONSE_WORDS[i % len(RESPONSE_WORDS)] + " " for i in range(count)]
+
+    def final_chunk(started: float, prompt_tokens: int, eval_count: int, content: str) -> Dict[str, Any]:
+        return {
+            "model": config.model,
+            "created_at": now(),
+            "message": {"role": "assistant", "content": content},
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": int((time.perf_counter() - started) * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": eval_count,
+        }
+
+    def should_fail() -> bool:
+        if config.error_rate > 0 and random.random() < config.error_rate:
+            state["errors"] += 1
+            return True
+        return False
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{
+            "name": config.model,
+            "model": config.model,
+            "modified_at": now(),
+            "size": 1_300_000_000,
+            "details": {"family": "llama", "parameter_size": "1.2B"},
+        }]}
+
+    @app.get("/api/version")
+    async def version():
+        return {"version": "0.0.0-fake"}
+
+    @app.get("/api/ps")
+    async def ps():
+        return {"models": [{"name": config.model, "model": config.model}] if state["loaded"] else []}
+
+    @app.get("/stats")
+    async def stats():
+        """Счетчики имитации (не входит в API Ollama)"""
+        return state
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        started = time.perf_counter()
+        # Пустой prompt - загрузка модели (прогрев AIService)
+        if not body.get("prompt"):
+            async with slots:
+                await wait_first_token()
+            return {"model": config.model, "created_at": now(), "response": "", "done": True}
+        if should_fail():
+            return JSONResponse({"error": "fake ollama: simulated failure"}, status_code=500)
+        async with slots:
+            await wait_first_token()
+            tokens = response_tokens(body.get("options"))
+            await asyncio.sleep(len(tokens) / config.tokens_per_second)
+        chunk = final_chunk(started, estimate_tokens(body["prompt"]), len(tokens), "")
+        chunk.pop("message")
+        chunk["response"] = "".join(tokens)
+        return chunk
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        started = time.perf_counter()
+        state["requests"] += 1
+        if body.get("model") != config.model:
+            return JSONResponse({"error": f"model '{body.get('model')}' not found"}, status_code=404)
+        if should_fail():
+            return JSONResponse({"error": "fake ollama: simulated failure"}, status_code=500)
+
+        prompt_tokens = sum(estimate_tokens(m.get("content", "")) for m in body.get("messages", []))
+        tokens = response_tokens(body.get("options"))
+        delay = 1.0 / config.tokens_per_second
+
+        if not body.get("stream", True):
+            async with slots:
+                state["in_flight"] += 1
+                try:
+                    await wait_first_token()
+                    await asyncio.sleep(delay * len(tokens))
+                finally:
+                    state["in_flight"] -= 1
+            return final_chunk(started, prompt_tokens, len(tokens), "".join(tokens))
+
+        async def stream():
+            async with slots:
+                state["in_flight"] += 1
+                try:
+                    await wait_first_token()
+                    for token in tokens:
+                        yield json.dumps({
+                            "model": config.model,
+                            "created_at": now(),
+                            "message": {"role": "assistant", "content": token},
+                            "done": False,
+                        }, ensure_ascii=False) + "\n"
+                        await asyncio.sleep(delay)
+                    yield json.dumps(final_chunk(started, prompt_tokens, len(tokens), ""), ensure_ascii=False) + "\n"
+                finally:
+                    # Клиент мог отключиться - слот освобождается, как у Ollama при отмене
+                    state["in_flight"] -= 1
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Имитация сервера Ollama для нагрузочных тестов")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--model", default="llama3.2:1b")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0, help="скорость генерации")
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="время до первого токена")
+    parser.add_argument("--ttft-jitter-ms", type=float, default=100.0, help="разброс времени до первого токена")
+    parser.add_argument("--response-tokens", type=int, default=120, help="длина ответа в токенах")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля запросов с ошибкой 500 (0..1)")
+    parser.add_argument("--max-parallel", type=int, default=1, help="одновременно обрабатываемые запросы")
+    parser.add_argument("--load-ms", type=float, default=0.0, help="время загрузки модели при первом запросе")
+    args = parser.parse_args()
+
+    config = FakeOllamaConfig(
+        model=args.model,
+        tokens_per_second=args.tokens_per_second,
+        ttft_ms=args.ttft_ms,
+        ttft_jitter_ms=args.ttft_jitter_ms,
+        response_tokens=args.response_tokens,
+        error_rate=args.error_rate,
+        max_parallel=args.max_parallel,
+        load_ms=args.load_ms
+    )
+    print(f"🤖 Fake Ollama: {args.host}:{args.port}, модель {config.model}, "
+          f"{config.tokens_per_second} ток/с, TTFT {config.ttft_ms} мс, ошибки {config.error_rate:.0%}")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -48,6 +48,8 @@ export const Chat = () => {
   const [messages, setMessages] = useState<Message[]>([]);
   const [input, setInput] = useState('');
   const [isLoading, setIsLoading] = useState(false);
+  // ID диалога на сервере: история хранится в бэкенде, повторно ее не отправляем
+  const [conversationId, setConversationId] = useState<number | null>(null);
   const messagesEndRef = useRef<null | HTMLDivElement>(null);
   const textareaRef = useRef<HTMLTextAreaElement>(null);
 
@@ -70,29 +72,29 @@ export const Chat = () => {
 
     try {
       const accessToken = localStorage.getItem('authToken');
-      const conversationHistory = messages.map(msg => ({
-        text: msg.text,
-        sender: msg.sender
-      }));
 
       const response = await api.post<{
         message: string;
-        conversation_history?: Array<{ text: string; sender: string }>;
+        conversation_id?: number;
       }, {
         response: string;
         reminder_suggestion?: {
           event: string;
           pet_name: string;
         };
+        conversation_id?: number;
       }>(
         '/v1/ai/chat/',
-        {
-          message: text,
-          conversation_history: conversationHistory
-        },
+        conversationId !== null
+          ? { message: text, conversation_id: conversationId }
+          : { message: text },
         accessToken ? { Authorization: `Bearer ${accessToken}` } : undefined
       );
 
+      if (response.conversation_id !== undefined) {
+        setConversationId(response.conversation_id);
+      }
+
       const aiResponse: Message = {
         id: (Date.now() + 1).toString(),
         text: response.response,